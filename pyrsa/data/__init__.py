@@ -5,5 +5,7 @@ from .dataset import dataset_from_dict
 from .dataset import merge_subsets
 from .computations import average_dataset
 from .computations import average_dataset_by
+from .computations import group_index
+from .computations import grouped_sums
 from .noise import cov_from_residuals
 from .noise import prec_from_residuals
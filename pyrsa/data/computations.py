@@ -5,6 +5,7 @@ Dataset computations
 """
 
 import numpy as np
+from scipy.sparse import csr_matrix
 
 
 def average_dataset(dataset):
@@ -31,8 +32,59 @@ def average_dataset_by(dataset, by):
     Returns:
         numpy.ndarray: average: average activation vector
     """
-    datasets = dataset.split_obs(by)
-    descriptor = [d.obs_descriptors[by][0] for d in datasets]
-    average = [average_dataset(d) for d in datasets]
-    n_obs = [d.n_obs for d in datasets]
-    return np.array(average), descriptor, n_obs
+    values, group_idx = group_index(dataset.obs_descriptors[by])
+    sums, n_obs = grouped_sums(dataset.measurements, group_idx, len(values))
+    average = sums / n_obs.reshape((-1,) + (1,) * (sums.ndim - 1))
+    return average, list(values), list(n_obs)
+
+
+def group_index(descriptor):
+    """
+    finds the unique values of a descriptor in order of their first
+    occurence and the group index of each entry
+
+    Args:
+        descriptor(numpy.ndarray): descriptor vector
+
+    Returns:
+        numpy.ndarray: values: unique values in order of first occurence
+        numpy.ndarray: group_idx: index into values for each entry
+
+    """
+    values, first_idx, inverse = np.unique(
+        np.asarray(descriptor), return_index=True, return_inverse=True)
+    order = np.argsort(first_idx)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return values[order], rank[inverse.reshape(-1)]
+
+
+def grouped_sums(measurements, group_idx, n_group, squares=False):
+    """
+    sums measurements per group in a single pass over the observations
+
+    Args:
+        measurements(numpy.ndarray): n_obs x ... measurements
+        group_idx(numpy.ndarray): group index in range(n_group) per
+            observation
+        n_group(int): number of groups
+        squares(bool): whether to also return the sums of squares
+
+    Returns:
+        numpy.ndarray: sums: n_group x ... sums per group
+        numpy.ndarray: counts: number of observations per group
+        numpy.ndarray: sums_squares: n_group x ... sums of squared
+            measurements per group (only if squares=True)
+
+    """
+    n_obs = measurements.shape[0]
+    indicator = csr_matrix(
+        (np.ones(n_obs), (group_idx, np.arange(n_obs))),
+        shape=(n_group, n_obs))
+    flat = measurements.reshape(n_obs, -1)
+    sums = (indicator @ flat).reshape((n_group,) + measurements.shape[1:])
+    counts = np.bincount(group_idx, minlength=n_group)
+    if squares:
+        sums_squares = (indicator @ (flat ** 2)).reshape(sums.shape)
+        return sums, counts, sums_squares
+    return sums, counts
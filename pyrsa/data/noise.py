@@ -40,19 +40,23 @@ def cov_from_residuals(residuals, dof=None):
             dof = residuals.shape[0] - 1
         # calculate sample covariance matrix s
         residuals = residuals - np.mean(residuals, axis=0, keepdims=True)
-        xt_x = np.einsum('ij, ik-> ijk', residuals, residuals)
-        s = np.sum(xt_x, axis=0) / xt_x.shape[0]
+        n_res = residuals.shape[0]
+        s = residuals.T @ residuals / n_res
         # calculate the scalar estimators to find the optimal shrinkage:
         # m, d^2, b^2 as in Ledoit & Wolfe paper
         m = np.sum(np.diag(s)) / s.shape[0]
         d2 = np.sum((s - m * np.eye(s.shape[0])) ** 2)
-        b2 = np.sum((xt_x - s) ** 2) / xt_x.shape[0] / xt_x.shape[0]
+        # b^2 = sum_k ||x_k x_k^T - s||^2 / n^2 without forming the
+        # n x p x p tensor of outer products, using
+        # sum_k ||x_k x_k^T - s||^2 = sum_k ||x_k||^4 - n ||s||^2
+        b2 = (np.sum(np.einsum('ij,ij->i', residuals, residuals) ** 2)
+              - n_res * np.sum(s ** 2)) / n_res / n_res
         b2 = min(d2, b2)
         # shrink covariance matrix
         s_shrink = b2 / d2 * m * np.eye(s.shape[0]) \
             + (d2-b2) / d2 * s
         # correction for degrees of freedom
-        s_shrink = s_shrink * xt_x.shape[0] / dof
+        s_shrink = s_shrink * n_res / dof
     return s_shrink
 
 
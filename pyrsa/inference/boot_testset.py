@@ -8,6 +8,8 @@ a testset
 
 import numpy as np
 from pyrsa.util.inference_util import input_check_model
+from pyrsa.util.inference_util import get_sample_rngs
+from pyrsa.util.inference_util import run_samples
 from .bootstrap import bootstrap_sample
 from .bootstrap import bootstrap_sample_rdm
 from .bootstrap import bootstrap_sample_pattern
@@ -15,7 +17,8 @@ from .evaluate import crossval
 
 
 def bootstrap_testset(model, data, method='cosine', fitter=None, N=1000,
-                      pattern_descriptor=None, rdm_descriptor=None):
+                      pattern_descriptor=None, rdm_descriptor=None,
+                      n_jobs=1, seed=None):
     """takes a bootstrap sample and evaluates on the rdms and patterns not
     sampled
     also returns the size of each test_set to allow later weighting
@@ -28,6 +31,10 @@ def bootstrap_testset(model, data, method='cosine', fitter=None, N=1000,
         fitter(function): fitting function
         pattern_descriptor(string): descriptor to group patterns
         rdm_descriptor(string): descriptor to group rdms
+        n_jobs(int): number of worker processes the samples are split over
+            -1 uses all cores
+        seed(int): seed for the random number streams of the samples.
+            For a given seed the results do not depend on n_jobs
 
     Returns:
         numpy.ndarray: vector of evaluations of length N
@@ -36,19 +43,36 @@ def bootstrap_testset(model, data, method='cosine', fitter=None, N=1000,
 
     """
     evaluations, _, fitter = input_check_model(model, None, fitter, N)
-    n_rdm = np.zeros(N, dtype=np.int)
-    n_pattern = np.zeros(N, dtype=np.int)
     if pattern_descriptor is None:
         data.pattern_descriptors['index'] = np.arange(data.n_cond)
         pattern_descriptor = 'index'
     if rdm_descriptor is None:
         data.rdm_descriptors['index'] = np.arange(data.n_rdm)
         rdm_descriptor = 'index'
-    for i_sample in range(N):
+    rngs = get_sample_rngs(N, seed, n_jobs)
+    results = run_samples(
+        _bootstrap_testset_chunk, rngs, n_jobs,
+        model=model, eval_shape=evaluations.shape[1:], data=data,
+        method=method, fitter=fitter, pattern_descriptor=pattern_descriptor,
+        rdm_descriptor=rdm_descriptor)
+    evaluations, n_rdm, n_pattern = [
+        np.concatenate(res) for res in zip(*results)]
+    return evaluations, n_rdm, n_pattern
+
+
+def _bootstrap_testset_chunk(rngs, progress, model, eval_shape, data, method,
+                             fitter, pattern_descriptor, rdm_descriptor):
+    """runs bootstrap_testset for the samples drawn with the random number
+    generators rngs
+    """
+    evaluations = np.zeros((len(rngs),) + eval_shape)
+    n_rdm = np.zeros(len(rngs), dtype=np.int)
+    n_pattern = np.zeros(len(rngs), dtype=np.int)
+    for i_sample, rng in enumerate(rngs):
         sample, rdm_idx, pattern_idx = bootstrap_sample(
             data,
             rdm_descriptor=rdm_descriptor,
-            pattern_descriptor=pattern_descriptor)
+            pattern_descriptor=pattern_descriptor, rng=rng)
         train_set = [[sample, pattern_idx]]
         rdm_idx_test = data.rdm_descriptors[rdm_descriptor]
         rdm_idx_test = np.setdiff1d(rdm_idx_test, rdm_idx)
@@ -62,7 +86,8 @@ def bootstrap_testset(model, data, method='cosine', fitter=None, N=1000,
             evaluations[i_sample] = crossval(
                 model, data, train_set, test_set,
                 method=method, fitter=fitter,
-                pattern_descriptor=pattern_descriptor).evaluations[:, 0]
+                pattern_descriptor=pattern_descriptor,
+                rng=rng).evaluations[:, 0]
         else:
             evaluations[i_sample] = np.nan
         n_rdm[i_sample] = len(rdm_idx_test)
@@ -71,7 +96,8 @@ def bootstrap_testset(model, data, method='cosine', fitter=None, N=1000,
 
 
 def bootstrap_testset_pattern(model, data, method='cosine', fitter=None,
-                              N=1000, pattern_descriptor=None):
+                              N=1000, pattern_descriptor=None,
+                              n_jobs=1, seed=None):
     """takes a bootstrap sample and evaluates on the patterns not
     sampled
     also returns the size of each test_set to allow later weighting
@@ -83,6 +109,10 @@ def bootstrap_testset_pattern(model, data, method='cosine', fitter=None,
         method(string): comparison method to use
         fitter(function): fitting function for the model
         pattern_descriptor(string): descriptor to group patterns
+        n_jobs(int): number of worker processes the samples are split over
+            -1 uses all cores
+        seed(int): seed for the random number streams of the samples.
+            For a given seed the results do not depend on n_jobs
 
     Returns:
         numpy.ndarray: vector of evaluations of length
@@ -90,13 +120,28 @@ def bootstrap_testset_pattern(model, data, method='cosine', fitter=None,
 
     """
     evaluations, _, fitter = input_check_model(model, None, fitter, N)
-    n_pattern = np.zeros(N, dtype=np.int)
     if pattern_descriptor is None:
         data.pattern_descriptors['index'] = np.arange(data.n_cond)
         pattern_descriptor = 'index'
-    for i_sample in range(N):
+    rngs = get_sample_rngs(N, seed, n_jobs)
+    results = run_samples(
+        _bootstrap_testset_pattern_chunk, rngs, n_jobs,
+        model=model, eval_shape=evaluations.shape[1:], data=data,
+        method=method, fitter=fitter, pattern_descriptor=pattern_descriptor)
+    evaluations, n_pattern = [np.concatenate(res) for res in zip(*results)]
+    return evaluations, n_pattern
+
+
+def _bootstrap_testset_pattern_chunk(rngs, progress, model, eval_shape, data,
+                                     method, fitter, pattern_descriptor):
+    """runs bootstrap_testset_pattern for the samples drawn with the random
+    number generators rngs
+    """
+    evaluations = np.zeros((len(rngs),) + eval_shape)
+    n_pattern = np.zeros(len(rngs), dtype=np.int)
+    for i_sample, rng in enumerate(rngs):
         sample, pattern_idx = bootstrap_sample_pattern(
-            data, pattern_descriptor=pattern_descriptor)
+            data, pattern_descriptor=pattern_descriptor, rng=rng)
         train_set = [[sample, pattern_idx]]
         pattern_idx_test = data.pattern_descriptors[pattern_descriptor]
         pattern_idx_test = np.setdiff1d(pattern_idx_test, pattern_idx)
@@ -107,7 +152,8 @@ def bootstrap_testset_pattern(model, data, method='cosine', fitter=None,
             evaluations[i_sample] = crossval(
                 model, data, train_set, test_set,
                 method=method, fitter=fitter,
-                pattern_descriptor=pattern_descriptor).evaluations[:, 0]
+                pattern_descriptor=pattern_descriptor,
+                rng=rng).evaluations[:, 0]
         else:
             evaluations[i_sample] = np.nan
         n_pattern[i_sample] = len(pattern_idx_test)
@@ -115,7 +161,7 @@ def bootstrap_testset_pattern(model, data, method='cosine', fitter=None,
 
 
 def bootstrap_testset_rdm(model, data, method='cosine', fitter=None, N=1000,
-                          rdm_descriptor=None):
+                          rdm_descriptor=None, n_jobs=1, seed=None):
     """takes a bootstrap sample and evaluates on the patterns not
     sampled
     also returns the size of each test_set to allow later weighting
@@ -127,6 +173,10 @@ def bootstrap_testset_rdm(model, data, method='cosine', fitter=None, N=1000,
         method(string): comparison method to use
         fitter(function): fitting function for the model
         pattern_descriptor(string): descriptor to group patterns
+        n_jobs(int): number of worker processes the samples are split over
+            -1 uses all cores
+        seed(int): seed for the random number streams of the samples.
+            For a given seed the results do not depend on n_jobs
 
     Returns:
         numpy.ndarray: vector of evaluations of length
@@ -134,15 +184,30 @@ def bootstrap_testset_rdm(model, data, method='cosine', fitter=None, N=1000,
 
     """
     evaluations, _, fitter = input_check_model(model, None, fitter, N)
-    n_rdm = np.zeros(N, dtype=np.int)
     if rdm_descriptor is None:
         data.rdm_descriptors['index'] = np.arange(data.n_rdm)
         rdm_descriptor = 'index'
     data.pattern_descriptors['index'] = np.arange(data.n_cond)
+    rngs = get_sample_rngs(N, seed, n_jobs)
+    results = run_samples(
+        _bootstrap_testset_rdm_chunk, rngs, n_jobs,
+        model=model, eval_shape=evaluations.shape[1:], data=data,
+        method=method, fitter=fitter, rdm_descriptor=rdm_descriptor)
+    evaluations, n_rdm = [np.concatenate(res) for res in zip(*results)]
+    return evaluations, n_rdm
+
+
+def _bootstrap_testset_rdm_chunk(rngs, progress, model, eval_shape, data,
+                                 method, fitter, rdm_descriptor):
+    """runs bootstrap_testset_rdm for the samples drawn with the random
+    number generators rngs
+    """
+    evaluations = np.zeros((len(rngs),) + eval_shape)
+    n_rdm = np.zeros(len(rngs), dtype=np.int)
     pattern_descriptor = 'index'
-    for i_sample in range(N):
+    for i_sample, rng in enumerate(rngs):
         sample, rdm_idx = bootstrap_sample_rdm(
-            data, rdm_descriptor=rdm_descriptor)
+            data, rdm_descriptor=rdm_descriptor, rng=rng)
         pattern_idx = np.arange(data.n_cond)
         train_set = [[sample, pattern_idx]]
         rdm_idx_test = data.rdm_descriptors[rdm_descriptor]
@@ -153,7 +218,8 @@ def bootstrap_testset_rdm(model, data, method='cosine', fitter=None, N=1000,
             evaluations[i_sample] = crossval(
                 model, data, train_set, test_set,
                 method=method, fitter=fitter,
-                pattern_descriptor=pattern_descriptor).evaluations[:, 0]
+                pattern_descriptor=pattern_descriptor,
+                rng=rng).evaluations[:, 0]
         else:
             evaluations[i_sample] = np.nan
         n_rdm[i_sample] = len(rdm_idx_test)
@@ -7,7 +7,8 @@ import numpy as np
 from pyrsa.util.rdm_utils import add_pattern_index
 
 
-def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
+def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index',
+                     rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -27,6 +28,10 @@ def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
             descriptor to group the patterns by. Each group of patterns will
             be in or out of the sample as a whole
 
+        rng(numpy.random.RandomState):
+            random number generator to draw the sample from
+            defaults to the global numpy random state
+
     Returns:
         pyrsa.rdm.rdms.RDMs: rdms
             subsampled dataset with equal number of groups in both patterns
@@ -39,22 +44,16 @@ def bootstrap_sample(rdms, rdm_descriptor='index', pattern_descriptor='index'):
             sampled pattern descriptor indices
 
     """
-    rdm_select = np.unique(rdms.rdm_descriptors[rdm_descriptor])
-    pattern_descriptor, pattern_select = \
-        add_pattern_index(rdms, pattern_descriptor)
-    rdm_idx = np.random.randint(0, len(rdm_select) - 1,
-                                size=len(rdm_select))
-    rdm_idx = rdm_select[rdm_idx]
+    _, rdm_idx = _sample_rdm_idx(rdms, rdm_descriptor, rng)
     rdms = rdms.subsample(rdm_descriptor, rdm_idx)
-    pattern_idx = np.random.randint(0, len(pattern_select) - 1,
-                                    size=len(pattern_select))
-    pattern_idx = pattern_select[pattern_idx]
+    pattern_descriptor, pattern_idx = \
+        _sample_pattern_idx(rdms, pattern_descriptor, rng)
     rdms = rdms.subsample_pattern(pattern_descriptor,
                                   pattern_idx)
     return rdms, rdm_idx, pattern_idx
 
 
-def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
+def bootstrap_sample_rdm(rdms, rdm_descriptor='index', rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -69,6 +68,10 @@ def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
             the descriptor each sample will either contain all RDMs with
             this value or none
 
+        rng(numpy.random.RandomState):
+            random number generator to draw the sample from
+            defaults to the global numpy random state
+
     Returns:
         pyrsa.rdm.rdms.RDMs: rdm_idx
             subsampled dataset with equal number of groups of rdms
@@ -80,15 +83,12 @@ def bootstrap_sample_rdm(rdms, rdm_descriptor='index'):
             rdm group descritor values
 
     """
-    rdm_select = np.unique(rdms.rdm_descriptors[rdm_descriptor])
-    rdm_sample = np.random.randint(0, len(rdm_select) - 1,
-                                   size=len(rdm_select))
-    rdm_idx = rdm_select[rdm_sample]
+    rdm_sample, rdm_idx = _sample_rdm_idx(rdms, rdm_descriptor, rng)
     rdms = rdms.subsample(rdm_descriptor, rdm_sample)
     return rdms, rdm_idx
 
 
-def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
+def bootstrap_sample_pattern(rdms, pattern_descriptor='index', rng=None):
     """Draws a bootstrap_sample from the data.
 
     This function generates a bootstrap sample of RDMs resampled over
@@ -102,6 +102,10 @@ def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
             descriptor to group the patterns by. Each group of patterns will
             be in or out of the sample as a whole
 
+        rng(numpy.random.RandomState):
+            random number generator to draw the sample from
+            defaults to the global numpy random state
+
     Returns:
         pyrsa.rdm.rdms.RDMs: rdm_idx
             subsampled dataset with equal number of pattern groups
@@ -109,11 +113,60 @@ def bootstrap_sample_pattern(rdms, pattern_descriptor='index'):
         numpy.ndarray: pattern_idx
             sampled pattern descriptor index values for subsampling other rdms
     """
-    pattern_descriptor, pattern_select = \
-        add_pattern_index(rdms, pattern_descriptor)
-    pattern_idx = np.random.randint(0, len(pattern_select) - 1,
-                                    size=len(pattern_select))
-    pattern_idx = pattern_select[pattern_idx]
+    pattern_descriptor, pattern_idx = \
+        _sample_pattern_idx(rdms, pattern_descriptor, rng)
     rdms = rdms.subsample_pattern(pattern_descriptor,
                                   pattern_idx)
     return rdms, pattern_idx
+
+
+def _sample_rdm_idx(rdms, rdm_descriptor='index', rng=None):
+    """draws the rdm descriptor values for a bootstrap sample over rdms
+
+    Args:
+        rdms(pyrsa.rdm.rdms.RDMs): Data to be used
+        rdm_descriptors(String): descriptor to group the rdms by
+        rng(numpy.random.RandomState): random number generator
+
+    Returns:
+        numpy.ndarray: rdm_sample
+            sampled positions in the unique rdm descriptor values
+
+        numpy.ndarray: rdm_idx
+            sampled rdm descriptor values
+
+    """
+    if rng is None:
+        rng = np.random
+    rdm_select = np.unique(rdms.rdm_descriptors[rdm_descriptor])
+    rdm_sample = rng.randint(0, len(rdm_select) - 1,
+                             size=len(rdm_select))
+    rdm_idx = rdm_select[rdm_sample]
+    return rdm_sample, rdm_idx
+
+
+def _sample_pattern_idx(rdms, pattern_descriptor='index', rng=None):
+    """draws the pattern descriptor values for a bootstrap sample over
+    patterns
+
+    Args:
+        rdms(pyrsa.rdm.rdms.RDMs): Data to be used
+        pattern_descriptors(string): descriptor to group the patterns by
+        rng(numpy.random.RandomState): random number generator
+
+    Returns:
+        String: pattern_descriptor
+            the descriptor used
+
+        numpy.ndarray: pattern_idx
+            sampled pattern descriptor values
+
+    """
+    if rng is None:
+        rng = np.random
+    pattern_descriptor, pattern_select = \
+        add_pattern_index(rdms, pattern_descriptor)
+    pattern_idx = rng.randint(0, len(pattern_select) - 1,
+                              size=len(pattern_select))
+    pattern_idx = pattern_select[pattern_idx]
+    return pattern_descriptor, pattern_idx
@@ -84,7 +84,7 @@ def sets_leave_one_out_rdm(rdms, rdm_descriptor='index'):
 
 
 def sets_k_fold(rdms, k_rdm=5, k_pattern=5, random=True,
-                pattern_descriptor=None, rdm_descriptor='index'):
+                pattern_descriptor=None, rdm_descriptor='index', rng=None):
     """ generates training and test set combinations by splitting into k
     similar sized groups. This version splits both over rdms and over patterns
     resulting in k_rdm * k_pattern (training, test) pairs.
@@ -98,6 +98,8 @@ def sets_k_fold(rdms, k_rdm=5, k_pattern=5, random=True,
         k_rdm(int): number of rdm groups
         k_pattern(int): number of pattern groups
         random(bool): whether the assignment shall be randomized
+        rng(numpy.random.RandomState): random number generator for the
+            assignment, defaults to the global numpy random state
 
     Returns:
         train_set(list): list of tuples (rdms, pattern_idx)
@@ -109,8 +111,10 @@ def sets_k_fold(rdms, k_rdm=5, k_pattern=5, random=True,
     rdm_select = np.unique(rdm_select)
     assert k_rdm <= len(rdm_select), \
         'Can make at most as many groups as rdms'
+    if rng is None:
+        rng = np.random
     if random:
-        np.random.shuffle(rdm_select)
+        rng.shuffle(rdm_select)
     group_size_rdm = np.floor(len(rdm_select) / k_rdm)
     additional_rdms = len(rdm_select) % k_rdm
     train_set = []
@@ -134,7 +138,7 @@ def sets_k_fold(rdms, k_rdm=5, k_pattern=5, random=True,
                                     rdm_idx_train)
         train_new, test_new, _ = sets_k_fold_pattern(
             rdms_train, k=k_pattern,
-            pattern_descriptor=pattern_descriptor, random=random)
+            pattern_descriptor=pattern_descriptor, random=random, rng=rng)
         ceil_new = test_new.copy()
         for i_pattern in range(k_pattern):
             test_new[i_pattern][0] = rdms_test.subsample_pattern(
@@ -191,7 +195,8 @@ def sets_k_fold_rdm(rdms, k_rdm=5, random=True, rdm_descriptor='index'):
     return train_set, test_set, ceil_set
 
 
-def sets_k_fold_pattern(rdms, pattern_descriptor='index', k=5, random=False):
+def sets_k_fold_pattern(rdms, pattern_descriptor='index', k=5, random=False,
+                        rng=None):
     """ generates training and test set combinations by splitting into k
     similar sized groups. This version splits in the given order or
     randomizes the order. For k=1 training and test_set are whole dataset,
@@ -208,6 +213,8 @@ def sets_k_fold_pattern(rdms, pattern_descriptor='index', k=5, random=False):
         pattern_descriptor(String): descriptor to select groups
         k(int): number of groups
         random(bool): whether the assignment shall be randomized
+        rng(numpy.random.RandomState): random number generator for the
+            assignment, defaults to the global numpy random state
 
     Returns:
         train_set(list): list of tuples (rdms, pattern_idx)
@@ -219,8 +226,10 @@ def sets_k_fold_pattern(rdms, pattern_descriptor='index', k=5, random=False):
         add_pattern_index(rdms, pattern_descriptor)
     assert k <= len(pattern_select), \
         'Can make at most as many groups as conditions'
+    if rng is None:
+        rng = np.random
     if random:
-        np.random.shuffle(pattern_select)
+        rng.shuffle(pattern_select)
     group_size = np.floor(len(pattern_select) / k)
     additional_patterns = len(pattern_select) % k
     train_set = []
@@ -4,16 +4,26 @@
 evaluate model performance
 """
 
+from inspect import signature
 import numpy as np
 import tqdm
 from collections.abc import Iterable
 from pyrsa.rdm import compare
+from pyrsa.rdm import RDMs
 from pyrsa.inference import bootstrap_sample
-from pyrsa.inference import bootstrap_sample_rdm
-from pyrsa.inference import bootstrap_sample_pattern
 from pyrsa.model import Model
+from pyrsa.model import ModelFixed
 from pyrsa.util.inference_util import input_check_model
+from pyrsa.util.inference_util import get_sample_rngs
+from pyrsa.util.inference_util import run_samples
+from pyrsa.util.rdm_utils import get_subsample_selection
+from pyrsa.util.rdm_utils import get_condensed_index
+from pyrsa.util.rdm_utils import apply_condensed_index
+from pyrsa.util.rdm_utils import _get_n_from_reduced_vectors
+from pyrsa.util.data_utils import extract_dict
 from .result import Result
+from .bootstrap import _sample_rdm_idx
+from .bootstrap import _sample_pattern_idx
 from .crossvalsets import sets_k_fold
 from .noise_ceiling import boot_noise_ceiling
 from .noise_ceiling import cv_noise_ceiling
@@ -38,9 +48,17 @@ def eval_fixed(models, data, theta=None, method='cosine'):
         rdm_pred = models.predict_rdm(theta=theta)
         evaluations = np.array([[compare(rdm_pred, data, method)[0]]])
     elif isinstance(models, Iterable):
-        for k in range(len(models)):
-            rdm_pred = models[k].predict_rdm(theta=theta[k])
-            evaluations[k] = np.mean(compare(rdm_pred, data, method)[0])
+        # the first predicted rdm of each model is compared to the data
+        pred_vectors = np.concatenate(
+            [models[k].predict_rdm(theta=theta[k]).get_vectors()[:1]
+             for k in range(len(models))])
+        nan_idx = np.isnan(pred_vectors)
+        if np.all(nan_idx == nan_idx[0]):
+            evaluations = np.mean(compare(pred_vectors, data, method), axis=1)
+        else:
+            for k in range(len(models)):
+                evaluations[k] = np.mean(compare(pred_vectors[k], data,
+                                                 method)[0])
         evaluations = evaluations.reshape((1, len(models)))
     else:
         raise ValueError('models should be a pyrsa.model.Model or a list of'
@@ -54,7 +72,7 @@ def eval_fixed(models, data, theta=None, method='cosine'):
 
 def eval_bootstrap(models, data, theta=None, method='cosine', N=1000,
                    pattern_descriptor='index', rdm_descriptor='index',
-                   boot_noise_ceil=True):
+                   boot_noise_ceil=True, n_jobs=1, seed=None):
     """evaluates models on data
     performs bootstrapping to get a sampling distribution
 
@@ -66,52 +84,20 @@ def eval_bootstrap(models, data, theta=None, method='cosine', N=1000,
         N(int): number of samples
         pattern_descriptor(string): descriptor to group patterns for bootstrap
         rdm_descriptor(string): descriptor to group rdms for bootstrap
+        n_jobs(int): number of worker processes the samples are split over
+            -1 uses all cores
+        seed(int): seed for the random number streams of the samples.
+            For a given seed the results do not depend on n_jobs
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
-    evaluations, theta, fitter = input_check_model(models, theta, None, N)
-    noise_min = []
-    noise_max = []
-    for i in tqdm.trange(N):
-        sample, rdm_idx, pattern_idx = \
-            bootstrap_sample(data, rdm_descriptor=rdm_descriptor,
-                             pattern_descriptor=pattern_descriptor)
-        if len(np.unique(pattern_idx)) >= 3:
-            if isinstance(models, Model):
-                rdm_pred = models.predict_rdm(theta=theta)
-                rdm_pred = rdm_pred.subsample_pattern(pattern_descriptor,
-                                                      pattern_idx)
-                evaluations[i] = np.mean(compare(rdm_pred, sample, method))
-            elif isinstance(models, Iterable):
-                j = 0
-                for mod in models:
-                    rdm_pred = mod.predict_rdm(theta=theta[j])
-                    rdm_pred = rdm_pred.subsample_pattern(pattern_descriptor,
-                                                          pattern_idx)
-                    evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                        method))
-                    j += 1
-            if boot_noise_ceil:
-                noise_min_sample, noise_max_sample = boot_noise_ceiling(
-                    sample, method=method, rdm_descriptor=rdm_descriptor)
-                noise_min.append(noise_min_sample)
-                noise_max.append(noise_max_sample)
-        else:
-            if isinstance(models, Model):
-                evaluations[i] = np.nan
-            elif isinstance(models, Iterable):
-                evaluations[i, :] = np.nan
-            noise_min.append(np.nan)
-            noise_max.append(np.nan)
-    if isinstance(models, Model):
-        evaluations = evaluations.reshape((N, 1))
-    if boot_noise_ceil:
-        noise_ceil = np.array([noise_min, noise_max])
-    else:
-        noise_ceil = np.array(boot_noise_ceiling(
-            data, method=method, rdm_descriptor=rdm_descriptor))
+    evaluations, noise_ceil = _eval_bootstrap_samples(
+        models, data, theta=theta, method=method, N=N,
+        pattern_descriptor=pattern_descriptor, rdm_descriptor=rdm_descriptor,
+        boot_noise_ceil=boot_noise_ceil,
+        sample_rdms=True, sample_patterns=True, n_jobs=n_jobs, seed=seed)
     result = Result(models, evaluations, method=method,
                     cv_method='bootstrap', noise_ceiling=noise_ceil)
     return result
@@ -119,7 +105,7 @@ def eval_bootstrap(models, data, theta=None, method='cosine', N=1000,
 
 def eval_bootstrap_pattern(models, data, theta=None, method='cosine', N=1000,
                            pattern_descriptor='index', rdm_descriptor='index',
-                           boot_noise_ceil=True):
+                           boot_noise_ceil=True, n_jobs=1, seed=None):
     """evaluates a models on data
     performs bootstrapping over patterns to get a sampling distribution
 
@@ -132,58 +118,28 @@ def eval_bootstrap_pattern(models, data, theta=None, method='cosine', N=1000,
         pattern_descriptor(string): descriptor to group patterns for bootstrap
         rdm_descriptor(string): descriptor to group patterns for noise
             ceiling calculation
+        n_jobs(int): number of worker processes the samples are split over
+            -1 uses all cores
+        seed(int): seed for the random number streams of the samples.
+            For a given seed the results do not depend on n_jobs
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
-    evaluations, theta, fitter = input_check_model(models, theta, None, N)
-    noise_min = []
-    noise_max = []
-    for i in tqdm.trange(N):
-        sample, pattern_idx = \
-            bootstrap_sample_pattern(data, pattern_descriptor)
-        if len(np.unique(pattern_idx)) >= 3:
-            if isinstance(models, Model):
-                rdm_pred = models.predict_rdm(theta=theta)
-                rdm_pred = rdm_pred.subsample_pattern(pattern_descriptor,
-                                                      pattern_idx)
-                evaluations[i] = np.mean(compare(rdm_pred, sample, method))
-            elif isinstance(models, Iterable):
-                j = 0
-                for mod in models:
-                    rdm_pred = mod.predict_rdm(theta=theta[j])
-                    rdm_pred = rdm_pred.subsample_pattern(pattern_descriptor,
-                                                          pattern_idx)
-                    evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                        method))
-                    j += 1
-            if boot_noise_ceil:
-                noise_min_sample, noise_max_sample = boot_noise_ceiling(
-                    sample, method=method, rdm_descriptor=rdm_descriptor)
-                noise_min.append(noise_min_sample)
-                noise_max.append(noise_max_sample)
-        else:
-            if isinstance(models, Model):
-                evaluations[i] = np.nan
-            elif isinstance(models, Iterable):
-                evaluations[i, :] = np.nan
-            noise_min.append(np.nan)
-            noise_max.append(np.nan)
-    if isinstance(models, Model):
-        evaluations = evaluations.reshape((N, 1))
-    if boot_noise_ceil:
-        noise_ceil = np.array([noise_min, noise_max])
-    else:
-        noise_ceil = np.array(boot_noise_ceiling(
-            data, method=method, rdm_descriptor=rdm_descriptor))
+    evaluations, noise_ceil = _eval_bootstrap_samples(
+        models, data, theta=theta, method=method, N=N,
+        pattern_descriptor=pattern_descriptor, rdm_descriptor=rdm_descriptor,
+        boot_noise_ceil=boot_noise_ceil,
+        sample_rdms=False, sample_patterns=True, n_jobs=n_jobs, seed=seed)
     result = Result(models, evaluations, method=method,
                     cv_method='bootstrap_pattern', noise_ceiling=noise_ceil)
     return result
 
 
 def eval_bootstrap_rdm(models, data, theta=None, method='cosine', N=1000,
-                       rdm_descriptor='index', boot_noise_ceil=True):
+                       rdm_descriptor='index', boot_noise_ceil=True,
+                       n_jobs=1, seed=None):
     """evaluates models on data
     performs bootstrapping to get a sampling distribution
 
@@ -194,47 +150,211 @@ def eval_bootstrap_rdm(models, data, theta=None, method='cosine', N=1000,
         method(string): comparison method to use
         N(int): number of samples
         rdm_descriptor(string): rdm_descriptor to group rdms for bootstrap
+        n_jobs(int): number of worker processes the samples are split over
+            -1 uses all cores
+        seed(int): seed for the random number streams of the samples.
+            For a given seed the results do not depend on n_jobs
 
     Returns:
         numpy.ndarray: vector of evaluations
 
     """
-    evaluations, theta, _ = input_check_model(models, theta, None, N)
+    evaluations, noise_ceil = _eval_bootstrap_samples(
+        models, data, theta=theta, method=method, N=N,
+        pattern_descriptor='index', rdm_descriptor=rdm_descriptor,
+        boot_noise_ceil=boot_noise_ceil,
+        sample_rdms=True, sample_patterns=False, n_jobs=n_jobs, seed=seed)
+    result = Result(models, evaluations, method=method,
+                    cv_method='bootstrap_rdm', noise_ceiling=noise_ceil)
+    return result
+
+
+def _eval_bootstrap_samples(models, data, theta=None, method='cosine',
+                            N=1000, pattern_descriptor='index',
+                            rdm_descriptor='index', boot_noise_ceil=True,
+                            sample_rdms=True, sample_patterns=True,
+                            n_jobs=1, seed=None):
+    """evaluates models on bootstrap samples of the data without
+    constructing RDMs objects for the samples.
+
+    The model predictions are computed once. For each sample the drawn
+    rdm and pattern descriptor values are converted into row indices and
+    a condensed-vector index map, which are applied to the raw prediction
+    and data vectors directly. The random draws are the same as for
+    bootstrap_sample, bootstrap_sample_pattern and bootstrap_sample_rdm.
+
+    Args:
+        models(pyrsa.model.Model): models to be evaluated
+        data(pyrsa.rdm.RDMs): data to evaluate on
+        theta(numpy.ndarray): parameter vector for the models
+        method(string): comparison method to use
+        N(int): number of samples
+        pattern_descriptor(string): descriptor to group patterns for bootstrap
+        rdm_descriptor(string): descriptor to group rdms for bootstrap
+        boot_noise_ceil(bool): whether the noise ceiling is computed for
+            each sample
+        sample_rdms(bool): whether rdms are resampled
+        sample_patterns(bool): whether patterns are resampled
+        n_jobs(int): number of worker processes
+        seed(int): seed for the random number streams of the samples
+
+    Returns:
+        numpy.ndarray: evaluations: N x n_model
+        numpy.ndarray: noise_ceil: noise ceiling
+
+    """
+    _, theta, _ = input_check_model(models, theta, None, N)
+    if isinstance(models, Model):
+        models_list = [models]
+        theta = [theta]
+    elif isinstance(models, Iterable):
+        models_list = models
+    pred_groups = _group_predictions(models_list, theta, pattern_descriptor)
+    rngs = get_sample_rngs(N, seed, n_jobs)
+    results = run_samples(
+        _eval_bootstrap_chunk, rngs, n_jobs,
+        pred_groups=pred_groups, n_model=len(models_list), data=data,
+        method=method, pattern_descriptor=pattern_descriptor,
+        rdm_descriptor=rdm_descriptor, boot_noise_ceil=boot_noise_ceil,
+        sample_rdms=sample_rdms, sample_patterns=sample_patterns)
+    evaluations = np.concatenate([res[0] for res in results])
+    if boot_noise_ceil:
+        noise_ceil = np.concatenate([res[1] for res in results], axis=1)
+    else:
+        noise_ceil = np.array(boot_noise_ceiling(
+            data, method=method, rdm_descriptor=rdm_descriptor))
+    return evaluations, noise_ceil
+
+
+def _eval_bootstrap_chunk(rngs, progress, pred_groups, n_model, data,
+                          method, pattern_descriptor, rdm_descriptor,
+                          boot_noise_ceil, sample_rdms, sample_patterns):
+    """evaluates the grouped predictions on the bootstrap samples drawn
+    with the random number generators rngs
+
+    Returns:
+        numpy.ndarray: evaluations: len(rngs) x n_model
+        numpy.ndarray: noise_ceil: 2 x len(rngs) noise ceilings of the
+        samples, empty if boot_noise_ceil is False
+
+    """
+    evaluations = np.zeros((len(rngs), n_model))
+    data_vectors = data.get_vectors()
+    rdm_selection = np.arange(data.n_rdm)
     noise_min = []
     noise_max = []
-    for i in tqdm.trange(N):
-        sample, rdm_idx = bootstrap_sample_rdm(data, rdm_descriptor)
-        if isinstance(models, Model):
-            rdm_pred = models.predict_rdm(theta=theta)
-            evaluations[i] = np.mean(compare(rdm_pred, sample, method))
-        elif isinstance(models, Iterable):
-            j = 0
-            for mod in models:
-                rdm_pred = mod.predict_rdm(theta=theta[j])
-                evaluations[i, j] = np.mean(compare(rdm_pred, sample,
-                                                    method))
-                j += 1
+    for i, rng in enumerate(tqdm.tqdm(rngs, disable=not progress)):
+        if sample_rdms:
+            rdm_sample, rdm_idx = _sample_rdm_idx(data, rdm_descriptor, rng)
+            # bootstrap_sample selects by the drawn descriptor values,
+            # bootstrap_sample_rdm by their positions
+            if sample_patterns:
+                rdm_selection = get_subsample_selection(
+                    data.rdm_descriptors[rdm_descriptor], rdm_idx)
+            else:
+                rdm_selection = get_subsample_selection(
+                    data.rdm_descriptors[rdm_descriptor], rdm_sample)
+        if sample_patterns:
+            pattern_descriptor, pattern_idx = _sample_pattern_idx(
+                data, pattern_descriptor, rng)
+            if len(np.unique(pattern_idx)) < 3:
+                evaluations[i, :] = np.nan
+                noise_min.append(np.nan)
+                noise_max.append(np.nan)
+                continue
+            index_maps = {}
+            sample_vectors = _subsample_vectors(
+                data_vectors[rdm_selection],
+                data.pattern_descriptors[pattern_descriptor],
+                pattern_idx, index_maps)
+            for descriptor, pred_vectors, model_idx in pred_groups:
+                pred_vectors = _subsample_vectors(
+                    pred_vectors, descriptor, pattern_idx, index_maps)
+                _mean_per_model(evaluations[i],
+                                compare(pred_vectors, sample_vectors, method),
+                                model_idx)
+        else:
+            sample_vectors = data_vectors[rdm_selection]
+            for _, pred_vectors, model_idx in pred_groups:
+                _mean_per_model(evaluations[i],
+                                compare(pred_vectors, sample_vectors, method),
+                                model_idx)
         if boot_noise_ceil:
+            sample = RDMs(
+                sample_vectors,
+                dissimilarity_measure=data.dissimilarity_measure,
+                descriptors=data.descriptors,
+                rdm_descriptors=extract_dict(data.rdm_descriptors,
+                                             rdm_selection))
             noise_min_sample, noise_max_sample = boot_noise_ceiling(
                 sample, method=method, rdm_descriptor=rdm_descriptor)
             noise_min.append(noise_min_sample)
             noise_max.append(noise_max_sample)
-    if isinstance(models, Model):
-        evaluations = evaluations.reshape((N, 1))
-    if boot_noise_ceil:
-        noise_ceil = np.array([noise_min, noise_max])
-    else:
-        noise_ceil = np.array(boot_noise_ceiling(
-            data, method=method, rdm_descriptor=rdm_descriptor))
-    result = Result(models, evaluations, method=method,
-                    cv_method='bootstrap_rdm', noise_ceiling=noise_ceil)
-    return result
+    return evaluations, np.array([noise_min, noise_max])
+
+
+def _group_predictions(models, theta, pattern_descriptor):
+    """ computes the model predictions and stacks the rdm vectors of all
+    predictions with equal pattern descriptors, such that each group can be
+    subsampled and compared to the data at once.
+
+    Returns:
+        list: (descriptor, vectors, model_idx) per group, where model_idx
+        gives the model of each row of vectors
+
+    """
+    groups = {}
+    for j, mod in enumerate(models):
+        pred = mod.predict_rdm(theta=theta[j])
+        descriptor = pred.pattern_descriptors[pattern_descriptor]
+        key = _descriptor_key(descriptor)
+        if key not in groups:
+            groups[key] = (descriptor, [], [])
+        groups[key][1].append(pred.get_vectors())
+        groups[key][2].append(np.full(pred.n_rdm, j))
+    return [(descriptor, np.concatenate(vectors), np.concatenate(model_idx))
+            for descriptor, vectors, model_idx in groups.values()]
+
+
+def _mean_per_model(evaluations, comparisons, model_idx):
+    """ writes the mean comparison value of each model's prediction rows
+    into evaluations
+    """
+    n_rows = np.bincount(model_idx)
+    models = np.nonzero(n_rows)[0]
+    row_sums = np.bincount(model_idx, np.mean(comparisons, axis=1))
+    evaluations[models] = row_sums[models] / n_rows[models]
+
+
+def _descriptor_key(descriptor):
+    """ hashable key for the content of a descriptor array """
+    descriptor = np.asarray(descriptor)
+    return (descriptor.dtype.str, descriptor.shape, descriptor.tobytes())
+
+
+def _subsample_vectors(vectors, descriptor, pattern_idx, index_maps):
+    """ subsamples the patterns of raw rdm vectors like
+    RDMs.subsample_pattern. index_maps caches the condensed index maps per
+    descriptor content, such that predictions with the same pattern
+    descriptor as the data reuse its map.
+    """
+    key = _descriptor_key(descriptor)
+    if key not in index_maps:
+        selection = np.sort(get_subsample_selection(descriptor, pattern_idx))
+        n_cond = _get_n_from_reduced_vectors(vectors)
+        index_maps[key] = get_condensed_index(n_cond, selection)
+    index, valid = index_maps[key]
+    return apply_condensed_index(vectors, index, valid)
 
 
 def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
-             fitter=None, pattern_descriptor='index'):
+             fitter=None, pattern_descriptor='index', rng=None):
     """evaluates models on cross-validation sets
 
+    The predictions of all ModelFixed models do not depend on the training
+    data. They are computed once, stacked per pattern descriptor and
+    compared to each test set at once.
+
     Args:
         models(pyrsa.model.Model): models to be evaluated
         rdms(pyrsa.rdm.RDMs): full dataset
@@ -244,6 +364,9 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
             (RDMs, pattern_idx)
         method(string): comparison method to use
         pattern_descriptor(string): descriptor to group patterns
+        rng(numpy.random.RandomState): random number generator passed to
+            fitters which accept an rng argument, like fit_optimize
+            defaults to the global numpy random state
 
     Returns:
         numpy.ndarray: vector of evaluations
@@ -256,6 +379,13 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
             'ceil_set and test_set must have the same length'
     evaluations = []
     noise_ceil = []
+    if isinstance(models, Iterable) and not isinstance(models, Model):
+        fixed_idx = np.array([j for j in range(len(models))
+                              if isinstance(models[j], ModelFixed)],
+                             dtype=int)
+        fixed_groups = _group_predictions(
+            [models[j] for j in fixed_idx], [None] * len(fixed_idx),
+            pattern_descriptor)
     for i in range(len(train_set)):
         train = train_set[i]
         test = test_set[i]
@@ -269,9 +399,10 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
             if isinstance(models, Model):
                 if fitter is None:
                     fitter = models.default_fitter
-                theta = fitter(models, train[0], method=method,
-                               pattern_idx=train[1],
-                               pattern_descriptor=pattern_descriptor)
+                theta = _fit_model(fitter, models, train[0], method=method,
+                                   pattern_idx=train[1],
+                                   pattern_descriptor=pattern_descriptor,
+                                   rng=rng)
                 pred = models.predict_rdm(theta)
                 pred = pred.subsample_pattern(by=pattern_descriptor,
                                               value=test[1])
@@ -279,13 +410,23 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
             elif isinstance(models, Iterable):
                 evals, _, fitter = input_check_model(models, None, fitter)
                 for j in range(len(models)):
-                    theta = fitter[j](models[j], train[0], method=method,
-                                      pattern_idx=train[1],
-                                      pattern_descriptor=pattern_descriptor)
+                    if isinstance(models[j], ModelFixed):
+                        continue
+                    theta = _fit_model(fitter[j], models[j], train[0],
+                                       method=method, pattern_idx=train[1],
+                                       pattern_descriptor=pattern_descriptor,
+                                       rng=rng)
                     pred = models[j].predict_rdm(theta)
                     pred = pred.subsample_pattern(by=pattern_descriptor,
                                                   value=test[1])
                     evals[j] = np.mean(compare(pred, test[0], method))
+                index_maps = {}
+                for descriptor, pred_vectors, model_idx in fixed_groups:
+                    pred_vectors = _subsample_vectors(
+                        pred_vectors, descriptor, test[1], index_maps)
+                    _mean_per_model(evals,
+                                    compare(pred_vectors, test[0], method),
+                                    fixed_idx[model_idx])
             if ceil_set is None:
                 noise_ceil.append(boot_noise_ceiling(
                     rdms.subsample_pattern(by=pattern_descriptor,
@@ -306,10 +447,21 @@ def crossval(models, rdms, train_set, test_set, ceil_set=None, method='cosine',
     return result
 
 
+def _fit_model(fitter, model, data, rng=None, **kwargs):
+    """ fits model to data with fitter. rng is passed on only to fitters
+    which accept an rng argument, such that randomized fitters draw from it
+    instead of the global numpy random state and other fitters are called
+    as before.
+    """
+    if rng is not None and 'rng' in signature(fitter).parameters:
+        kwargs['rng'] = rng
+    return fitter(model, data, **kwargs)
+
+
 def bootstrap_crossval(models, data, method='cosine', fitter=None,
                        k_pattern=5, k_rdm=5, N=1000,
                        pattern_descriptor='index', rdm_descriptor='index',
-                       random=True):
+                       random=True, n_jobs=1, seed=None):
     """evaluates models by k-fold crossvalidation within a bootstrap
 
     If a k is set to 1 no crossvalidation is performed over the
@@ -327,28 +479,58 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
         pattern_descriptor(string): descriptor to group patterns
         rdm_descriptor(string): descriptor to group rdms
         random(bool): randomize group assignments (default: True)
+        n_jobs(int): number of worker processes the samples are split over
+            -1 uses all cores
+        seed(int): seed for the random number streams of the samples.
+            For a given seed the results do not depend on n_jobs
 
     Returns:
         numpy.ndarray: matrix of evaluations (N x k)
 
     """
+    rngs = get_sample_rngs(N, seed, n_jobs)
+    results = run_samples(
+        _bootstrap_crossval_chunk, rngs, n_jobs,
+        models=models, data=data, method=method, fitter=fitter,
+        k_pattern=k_pattern, k_rdm=k_rdm,
+        pattern_descriptor=pattern_descriptor, rdm_descriptor=rdm_descriptor,
+        random=random)
+    evaluations = np.concatenate([res[0] for res in results])
+    noise_ceil = np.concatenate([res[1] for res in results], axis=1)
+    result = Result(models, evaluations, method=method,
+                    cv_method='bootstrap_crossval', noise_ceiling=noise_ceil)
+    return result
+
+
+def _bootstrap_crossval_chunk(rngs, progress, models, data, method, fitter,
+                              k_pattern, k_rdm, pattern_descriptor,
+                              rdm_descriptor, random):
+    """runs bootstrap_crossval for the samples drawn with the random number
+    generators rngs
+
+    Returns:
+        numpy.ndarray: evaluations: len(rngs) x n_model x k
+        numpy.ndarray: noise_ceil: 2 x len(rngs)
+
+    """
+    N = len(rngs)
     if isinstance(models, Model):
         evaluations = np.zeros((N, 1, k_pattern * k_rdm))
     elif isinstance(models, Iterable):
         evaluations = np.zeros((N, len(models), k_pattern * k_rdm))
     noise_ceil = np.zeros((2, N))
-    for i_sample in tqdm.trange(N):
+    for i_sample, rng in enumerate(tqdm.tqdm(rngs, disable=not progress)):
         sample, rdm_idx, pattern_idx = bootstrap_sample(
             data,
             rdm_descriptor=rdm_descriptor,
-            pattern_descriptor=pattern_descriptor)
+            pattern_descriptor=pattern_descriptor, rng=rng)
         if len(np.unique(rdm_idx)) >= k_rdm \
            and len(np.unique(pattern_idx)) >= 3 * k_pattern:
             train_set, test_set, ceil_set = sets_k_fold(
                 sample,
                 pattern_descriptor=pattern_descriptor,
                 rdm_descriptor=rdm_descriptor,
-                k_pattern=k_pattern, k_rdm=k_rdm, random=random)
+                k_pattern=k_pattern, k_rdm=k_rdm, random=random, rng=rng)
             for idx in range(len(test_set)):
                 test_set[idx][1] = _concat_sampling(pattern_idx,
                                                     test_set[idx][1])
@@ -358,7 +540,7 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
                 models, sample,
                 train_set, test_set,
                 method=method, fitter=fitter,
-                pattern_descriptor=pattern_descriptor)
+                pattern_descriptor=pattern_descriptor, rng=rng)
             if isinstance(models, Model):
                 evaluations[i_sample, 0, :] = cv_result.evaluations[0, 0]
             elif isinstance(models, Iterable):
@@ -370,9 +552,7 @@ def bootstrap_crossval(models, data, method='cosine', fitter=None,
             elif isinstance(models, Iterable):
                 evaluations[i_sample, :, :] = np.nan
             noise_ceil[:, i_sample] = np.nan
-    result = Result(models, evaluations, method=method,
-                    cv_method='bootstrap_crossval', noise_ceiling=noise_ceil)
-    return result
+    return evaluations, noise_ceil
 
 
 def _concat_sampling(sample1, sample2):
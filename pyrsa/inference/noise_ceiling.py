@@ -5,6 +5,7 @@ calculation of noise ceilings
 """
 
 import numpy as np
+from scipy.stats import rankdata
 from pyrsa.util.inference_util import pool_rdm
 from pyrsa.rdm import compare
 from .crossvalsets import sets_leave_one_out_rdm
@@ -63,6 +64,9 @@ def boot_noise_ceiling(rdms, method='cosine', rdm_descriptor='index'):
         list: [lower nc-bound, upper nc-bound]
 
     """
+    if method in ['cosine', 'corr', 'spearman', 'rho-a']:
+        return _boot_noise_ceiling_pooled_mean(
+            rdms.get_vectors(), rdms.rdm_descriptors[rdm_descriptor], method)
     _, test_set, ceil_set = sets_leave_one_out_rdm(rdms, rdm_descriptor)
     pred_test = pool_rdm(rdms, method=method)
     noise_min = []
@@ -76,3 +80,63 @@ def boot_noise_ceiling(rdms, method='cosine', rdm_descriptor='index'):
     noise_min = np.mean(np.array(noise_min))
     noise_max = np.mean(np.array(noise_max))
     return noise_min, noise_max
+
+
+def _boot_noise_ceiling_pooled_mean(vectors, rdm_descriptor, method):
+    """ leave one out noise ceiling for comparison methods for which
+    pool_rdm is a mean of normalized rdms. The pooled rdm without group g is
+    then proportional to (sum - sum_g), such that all leave one out
+    predictions are computed at once from the group sums.
+
+    Args:
+        vectors(numpy.ndarray): rdm vectors of the data
+        rdm_descriptor(numpy.ndarray): group of each rdm
+        method(string): 'cosine', 'corr', 'spearman' or 'rho-a'
+
+    Returns:
+        list: [lower nc-bound, upper nc-bound]
+
+    """
+    vectors = vectors[:, ~np.any(np.isnan(vectors), axis=0)]
+    if method in ['spearman', 'rho-a']:
+        vectors = rankdata(vectors, axis=1)
+        tests = vectors - np.mean(vectors, axis=1, keepdims=True)
+    else:
+        if method == 'corr':
+            vectors = vectors - np.mean(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.sqrt(
+            np.einsum('ij,ij->i', vectors, vectors)).reshape(-1, 1)
+        tests = vectors
+    _, group_idx = np.unique(rdm_descriptor, return_inverse=True)
+    n_group = np.max(group_idx) + 1
+    group_sums = np.zeros((n_group, vectors.shape[1]))
+    np.add.at(group_sums, group_idx, vectors)
+    total = np.sum(group_sums, axis=0, keepdims=True)
+    if n_group > 1:
+        pred_train = total - group_sums
+    else:
+        pred_train = total
+    sim_min = _pooled_similarity(pred_train[group_idx], tests, method)
+    sim_max = _pooled_similarity(total, tests, method)
+    n_rdm = np.bincount(group_idx)
+    noise_min = np.mean(np.bincount(group_idx, sim_min) / n_rdm)
+    noise_max = np.mean(np.bincount(group_idx, sim_max) / n_rdm)
+    return noise_min, noise_max
+
+
+def _pooled_similarity(preds, tests, method):
+    """ similarity between pooled rdms and the prepared test vectors
+    for _boot_noise_ceiling_pooled_mean, row by row if preds has more than
+    one row
+    """
+    if method in ['spearman', 'rho-a']:
+        preds = rankdata(preds, axis=1)
+        preds = preds - np.mean(preds, axis=1, keepdims=True)
+    sim = np.einsum('ij,ij->i', np.broadcast_to(preds, tests.shape), tests)
+    if method == 'rho-a':
+        n = tests.shape[1]
+        sim = sim / (n ** 3 - n) * 12
+    else:
+        sim = sim / np.sqrt(np.einsum('ij,ij->i', preds, preds)
+                            * np.einsum('ij,ij->i', tests, tests))
+    return sim
@@ -6,3 +6,4 @@ from .model import Model, ModelFixed, ModelSelect, ModelWeighted
 from .model import ModelInterpolate
 from .model import model_from_dict
 from .fitter import fit_mock, fit_optimize, fit_select, fit_interpolate
+from .fitter import fit_regress_nn
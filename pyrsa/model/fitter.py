@@ -5,8 +5,12 @@ Parameter fitting methods for models
 """
 
 import numpy as np
+import scipy.linalg
 import scipy.optimize as opt
+from pyrsa.rdm import RDMs
 from pyrsa.rdm import compare
+from pyrsa.rdm import compare_gradient
+from pyrsa.rdm.compare import _cov_weighting
 
 
 def fit_mock(model, data, method='cosine', pattern_idx=None,
@@ -33,6 +37,10 @@ def fit_select(model, data, method='cosine', pattern_idx=None,
     """ fits selection models by evaluating each rdm and selcting the one
     with best performance. Works only for ModelSelect
 
+    All candidate rdms are subsampled and compared to the data at once.
+    Only if the candidates have nan entries in different positions, they
+    are compared one by one.
+
     Args:
         model(pyrsa.model.Model): model to be fit
         data(pyrsa.rdm.RDMs): Data to fit to
@@ -44,22 +52,32 @@ def fit_select(model, data, method='cosine', pattern_idx=None,
         theta(int): parameter vector
 
     """
-    evaluations = np.zeros(model.n_rdm)
-    for i_rdm in range(model.n_rdm):
-        pred = model.predict_rdm(i_rdm)
-        if not (pattern_idx is None or pattern_descriptor is None):
-            pred = pred.subsample_pattern(pattern_descriptor, pattern_idx)
-        evaluations[i_rdm] = np.mean(compare(pred, data, method=method))
+    pred = model.rdm_obj
+    if not (pattern_idx is None or pattern_descriptor is None):
+        pred = pred.subsample_pattern(pattern_descriptor, pattern_idx)
+    nan_idx = np.isnan(pred.get_vectors())
+    if np.all(nan_idx == nan_idx[0]):
+        evaluations = np.mean(compare(pred, data, method=method), axis=1)
+    else:
+        evaluations = np.zeros(model.n_rdm)
+        for i_rdm in range(model.n_rdm):
+            evaluations[i_rdm] = np.mean(compare(pred[i_rdm], data,
+                                                 method=method))
     theta = np.argmax(evaluations)
     return theta
 
 
 def fit_optimize(model, data, method='cosine', pattern_idx=None,
-                 pattern_descriptor=None):
+                 pattern_descriptor=None, rng=None):
     """
     fitting theta using optimization
     currently allowed for ModelWeighted only
 
+    For the 'cosine', 'corr', 'cosine_cov' and 'corr_cov' evaluations of
+    models with has_gradient set, the exact gradient of the
+    loss is passed to the optimizer. Otherwise, the gradient is
+    approximated by finite differences.
+
     Args:
         model(Model): the model to be fit
         data(pyrsa.rdm.RDMs): data to be fit
@@ -68,26 +86,114 @@ def fit_optimize(model, data, method='cosine', pattern_idx=None,
             sampled patterns The default is None.
         pattern_descriptor (String, optional)
             descriptor used for fitting. The default is None.
+        rng (numpy.random.RandomState, optional)
+            random number generator for the starting point.
+            The default is the global numpy random state.
 
     Returns:
         numpy.ndarray: theta, parameter vector for the model
 
     """
+    if rng is None:
+        rng = np.random
+
     def _loss_opt(theta):
         return _loss(theta, model, data, method=method,
                      pattern_idx=pattern_idx,
                      pattern_descriptor=pattern_descriptor)
-    theta0 = np.random.rand(model.n_param)
-    theta = opt.minimize(_loss_opt, theta0)
+
+    def _loss_gradient_opt(theta):
+        return _loss_gradient(theta, model, data, method=method,
+                              pattern_idx=pattern_idx,
+                              pattern_descriptor=pattern_descriptor)
+    theta0 = rng.rand(model.n_param)
+    if model.has_gradient and \
+            method in ['cosine', 'corr', 'cosine_cov', 'corr_cov']:
+        theta = opt.minimize(_loss_gradient_opt, theta0, jac=True)
+    else:
+        theta = opt.minimize(_loss_opt, theta0)
     return theta.x
 
 
+def fit_regress_nn(model, data, method='cosine', pattern_idx=None,
+                   pattern_descriptor=None, rng=None):
+    """
+    fitting the non-negative weights of a ModelWeighted without iterating
+    over predicted RDMs
+
+    For the 'cosine', 'corr', 'cosine_cov' and 'corr_cov' evaluations the
+    average similarity to the data is maximized by the projection of the
+    average normalized data RDM onto the cone of non-negative weighted
+    sums of the model RDMs. This projection depends only on the inner
+    products between the model RDMs and of the model RDMs with the average
+    data RDM, which are computed once. The weights are then found by
+    active set non-negative least squares.
+    Other evaluation methods are passed on to fit_optimize.
+
+    Args:
+        model(Model): the model to be fit
+        data(pyrsa.rdm.RDMs): data to be fit
+        method(String, optional): evaluation metric The default is 'cosine'.
+        pattern_idx(numpy.ndarray, optional)
+            sampled patterns The default is None.
+        pattern_descriptor (String, optional)
+            descriptor used for fitting. The default is None.
+        rng (numpy.random.RandomState, optional)
+            random number generator passed on to fit_optimize.
+            The default is the global numpy random state.
+
+    Returns:
+        numpy.ndarray: theta, parameter vector for the model
+
+    """
+    if method not in ['cosine', 'corr', 'cosine_cov', 'corr_cov']:
+        return fit_optimize(model, data, method=method,
+                            pattern_idx=pattern_idx,
+                            pattern_descriptor=pattern_descriptor, rng=rng)
+    if pattern_idx is None or pattern_descriptor is None:
+        vectors = model.rdm
+    else:
+        vectors = model.rdm_obj.subsample_pattern(
+            pattern_descriptor, pattern_idx).get_vectors()
+    data_vectors = data.get_vectors()
+    # remove the entries compare removes for nans in either RDM
+    nan_idx = np.any(np.isnan(vectors), axis=0) \
+        | np.any(np.isnan(data_vectors), axis=0)
+    vectors = vectors[:, ~nan_idx]
+    data_vectors = data_vectors[:, ~nan_idx]
+    if method in ['corr', 'corr_cov']:
+        vectors = vectors - np.mean(vectors, axis=1, keepdims=True)
+        data_vectors = data_vectors \
+            - np.mean(data_vectors, axis=1, keepdims=True)
+    if method in ['cosine_cov', 'corr_cov']:
+        vectors = _cov_weighting(vectors)
+        data_vectors = _cov_weighting(data_vectors)
+    data_vectors = data_vectors / np.sqrt(np.einsum(
+        'ij,ij->i', data_vectors, data_vectors)).reshape(-1, 1)
+    target = np.mean(data_vectors, axis=0)
+    gram = np.einsum('ik,jk->ij', vectors, vectors)
+    products = np.einsum('ik,k->i', vectors, target)
+    theta = _nnls_gram(gram, products)
+    if not np.any(theta > 0):
+        # no weighted sum has a positive average similarity. Then the best
+        # prediction is the single model RDM with the largest similarity
+        theta = np.zeros(model.n_param)
+        theta[np.argmax(products / np.sqrt(np.diag(gram)))] = 1
+    return theta
+
+
 def fit_interpolate(model, data, method='cosine', pattern_idx=None,
-                    pattern_descriptor=None):
+                    pattern_descriptor=None, n_grid=21, n_refine=3):
     """
     fitting theta using bisection optimization
     allowed for ModelInterpolate only
 
+    The losses of all pairs of neighbouring rdms are first evaluated on a
+    shared grid of interpolation weights, comparing the interpolated rdm
+    vectors of all pairs to the data at once. For the best pairs the
+    weight is then refined by a bounded scalar search around their best
+    grid weight.
+
     Args:
         model(Model): the model to be fit
         data(pyrsa.rdm.RDMs): data to be fit
@@ -96,29 +202,61 @@ def fit_interpolate(model, data, method='cosine', pattern_idx=None,
             sampled patterns The default is None.
         pattern_descriptor (String, optional)
             descriptor used for fitting. The default is None.
+        n_grid (int, optional)
+            number of interpolation weights in the shared grid.
+            The default is 21.
+        n_refine (int, optional)
+            number of best pairs whose weight is refined.
+            The default is 3.
 
     Returns:
         numpy.ndarray: theta, parameter vector for the model
 
     """
-    results = []
-    for i_pair in range(model.n_rdm-1):
+    vectors = model.rdm_obj
+    if not (pattern_idx is None or pattern_descriptor is None):
+        vectors = vectors.subsample_pattern(pattern_descriptor, pattern_idx)
+    vectors = vectors.get_vectors()
+    n_pair = model.n_rdm - 1
+    weights = np.linspace(0, 1, n_grid)
+    # n_pair x n_weight x n_dist interpolated rdm vectors
+    preds = weights.reshape(1, -1, 1) * vectors[:-1, np.newaxis] \
+        + (1 - weights).reshape(1, -1, 1) * vectors[1:, np.newaxis]
+    nan_idx = np.isnan(preds[:, 0])
+    if np.all(nan_idx == nan_idx[0]):
+        losses = -np.mean(compare(preds.reshape(-1, preds.shape[2]), data,
+                                  method=method), axis=1)
+        losses = losses.reshape(n_pair, len(weights))
+    else:
+        losses = np.array([-np.mean(compare(pred, data, method=method),
+                                    axis=1) for pred in preds])
+    i_best = np.argmin(losses, axis=1)
+    best_pairs = np.argsort(losses[np.arange(n_pair), i_best],
+                            kind='stable')[:n_refine]
+    # start from the best grid point, which is kept if no refined loss
+    # is valid
+    theta = np.zeros(model.n_rdm)
+    theta[best_pairs[0]] = weights[i_best[best_pairs[0]]]
+    theta[best_pairs[0] + 1] = 1 - weights[i_best[best_pairs[0]]]
+    best_loss = np.inf
+    for i_pair in best_pairs:
         def loss_opt(w):
-            theta = np.zeros(model.n_param)
+            pred = w * vectors[i_pair] + (1 - w) * vectors[i_pair + 1]
+            return -np.mean(compare(pred, data, method=method))
+        i_weight = i_best[i_pair]
+        result = opt.minimize_scalar(
+            loss_opt, method='bounded',
+            bounds=(weights[max(i_weight - 1, 0)],
+                    weights[min(i_weight + 1, len(weights) - 1)]))
+        if result.fun < losses[i_pair, i_weight]:
+            loss, w = result.fun, result.x
+        else:
+            loss, w = losses[i_pair, i_weight], weights[i_weight]
+        if loss < best_loss:
+            best_loss = loss
+            theta = np.zeros(model.n_rdm)
             theta[i_pair] = w
-            theta[i_pair+1] = 1-w
-            return _loss(theta, model, data, method=method,
-                         pattern_idx=pattern_idx,
-                         pattern_descriptor=pattern_descriptor)
-        results.append(
-            opt.minimize_scalar(loss_opt, np.array([.5]),
-                                method='bounded', bounds=(0, 1)))
-    losses = [r.fun for r in results]
-    i_pair = np.argmin(losses)
-    result = results[i_pair]
-    theta = np.zeros(model.n_rdm)
-    theta[i_pair] = result.x
-    theta[i_pair+1] = 1-result.x
+            theta[i_pair + 1] = 1 - w
     return theta
 
 
@@ -148,3 +286,69 @@ def _loss(theta, model, data, method='cosine', cov=None,
     if not (pattern_idx is None or pattern_descriptor is None):
         pred = pred.subsample_pattern(pattern_descriptor, pattern_idx)
     return -np.mean(compare(pred, data, method=method))
+
+
+def _loss_gradient(theta, model, data, method='cosine',
+                   pattern_descriptor=None, pattern_idx=None):
+    """Method for calculating a loss for a model and parameter combination
+    and its gradient with respect to the parameters, for models which
+    implement predict_gradient and the methods supported by
+    compare_gradient
+
+    Args:
+        theta(numpy.ndarray): evaluated parameter value
+        model(Model): the model to be fit
+        data(pyrsa.rdm.RDMs): data to be fit
+        method(String, optional): evaluation metric The default is 'cosine'.
+        pattern_idx(numpy.ndarray, optional)
+            sampled patterns The default is None.
+        pattern_descriptor (String, optional)
+            descriptor used for fitting. The default is None.
+
+    Returns:
+        numpy.ndarray: loss
+        numpy.ndarray: gradient of the loss with respect to theta
+
+    """
+    pred = model.predict_rdm(theta)
+    # the derivatives for each parameter are subsampled like an rdm
+    pred_gradient = RDMs(model.predict_gradient(theta).T,
+                         pattern_descriptors=pred.pattern_descriptors)
+    if not (pattern_idx is None or pattern_descriptor is None):
+        pred = pred.subsample_pattern(pattern_descriptor, pattern_idx)
+        pred_gradient = pred_gradient.subsample_pattern(pattern_descriptor,
+                                                        pattern_idx)
+    sim, gradient = compare_gradient(pred, data, method=method)
+    valid = ~np.isnan(pred.get_vectors()[0])
+    gradient = np.einsum('ij,kj->k', gradient[:, valid],
+                         pred_gradient.get_vectors()[:, valid])
+    return -np.mean(sim), -gradient / len(sim)
+
+
+def _nnls_gram(gram, products):
+    """ solves min_theta theta^T gram theta - 2 theta^T products
+    subject to theta >= 0, given only the inner products of the regressors
+    (gram) and of the regressors with the target (products).
+
+    The problem is passed to the active set solver scipy.optimize.nnls as
+    the equivalent least squares problem with a square root of gram, which
+    has at most as many rows as there are regressors.
+
+    Args:
+        gram(numpy.ndarray): n_param x n_param inner products
+        products(numpy.ndarray): n_param inner products with the target
+
+    Returns:
+        numpy.ndarray: theta, non-negative weights
+
+    """
+    eigval, eigvec = scipy.linalg.eigh(gram, check_finite=False)
+    keep = eigval > eigval[-1] * len(eigval) * np.finfo(float).eps
+    if not np.any(keep):
+        return np.zeros(len(products))
+    eigval = eigval[keep]
+    eigvec = eigvec[:, keep]
+    root = np.sqrt(eigval).reshape(-1, 1) * eigvec.T
+    rhs = np.einsum('ji,j->i', eigvec, products) / np.sqrt(eigval)
+    theta, _ = opt.nnls(root, rhs)
+    return theta
@@ -8,7 +8,8 @@ import numpy as np
 from pyrsa.rdm import RDMs
 from pyrsa.rdm import rdms_from_dict
 from pyrsa.util.rdm_utils import batch_to_vectors
-from .fitter import fit_mock, fit_optimize, fit_select, fit_interpolate
+from .fitter import fit_mock, fit_select, fit_interpolate
+from .fitter import fit_regress_nn
 
 
 class Model:
@@ -17,12 +18,15 @@ class Model:
     Defines members that every class needs to have, but does not implement any
     interesting behavior. Inherit from this class to define specific model
     types
+
+    Model classes which implement predict_gradient set has_gradient to True
     """
 
     def __init__(self, name):
         self.name = name
         self.n_param = 0
         self.default_fitter = fit_mock
+        self.has_gradient = False
         self.rdm_obj = None
 
     def predict(self, theta=None):
@@ -49,6 +53,19 @@ class Model:
         raise NotImplementedError(
             "Predict rdm function not implemented in used model class!")
 
+    def predict_gradient(self, theta=None):
+        """ Returns the derivatives of the rdm vector predicted by
+        predict_rdm with respect to the parameters
+
+        Args:
+            theta(numpy.ndarray): the model parameter vector (one dimensional)
+
+        Returns:
+            numpy.ndarray: n_dist x n_param derivatives
+        """
+        raise NotImplementedError(
+            "Predict gradient function not implemented in used model class!")
+
     def fit(self, data):
         """ fit the model to a RDM object data
 
@@ -109,6 +126,7 @@ class ModelFixed(Model):
             self.n_cond = self.rdm_obj.n_cond
         self.n_param = 0
         self.default_fitter = fit_mock
+        self.has_gradient = True
         self.rdm_obj.pattern_descriptors['index'] = np.arange(self.n_cond)
 
     def predict(self, theta=None):
@@ -139,6 +157,20 @@ class ModelFixed(Model):
         """
         return self.rdm_obj
 
+    def predict_gradient(self, theta=None):
+        """ Returns the derivatives of the predicted rdm vector
+
+        For the fixed model there are no parameters.
+
+        Args:
+            theta(numpy.ndarray): the model parameter vector (one dimensional)
+
+        Returns:
+            numpy.ndarray: n_dist x 0 derivatives
+
+        """
+        return np.zeros((len(self.rdm), 0))
+
 
 class ModelSelect(Model):
     """
@@ -220,7 +252,8 @@ class ModelWeighted(Model):
             self.rdm = batch_to_vectors(rdm)
         self.n_param = self.rdm_obj.n_rdm
         self.n_rdm = self.rdm_obj.n_rdm
-        self.default_fitter = fit_optimize
+        self.default_fitter = fit_regress_nn
+        self.has_gradient = True
 
     def predict(self, theta=None):
         """ Returns the predicted rdm vector
@@ -263,6 +296,25 @@ class ModelWeighted(Model):
             pattern_descriptors=self.rdm_obj.pattern_descriptors)
         return rdms
 
+    def predict_gradient(self, theta=None):
+        """ Returns the derivatives of the predicted rdm vector
+
+        The rdm vector is linear in the weights, except that predict_rdm
+        sets negative weights to 0. Thus, the derivatives are the rdms
+        for positive weights and 0 otherwise.
+
+        Args:
+            theta(numpy.ndarray): the model parameter vector (one dimensional)
+
+        Returns:
+            numpy.ndarray: n_dist x n_param derivatives
+
+        """
+        if theta is None:
+            theta = np.ones(self.n_rdm)
+        theta = np.array(theta).reshape(-1)
+        return self.rdm.T * (theta > 0)
+
 
 class ModelInterpolate(Model):
     """
@@ -11,8 +11,13 @@ from .calc import calc_rdm_mahalanobis
 from .calc import calc_rdm_crossnobis
 from .calc import calc_rdm_correlation
 from .compare import compare
+from .compare import compare_blocked
+from .compare import compare_gradient
 from .compare import compare_correlation
 from .compare import compare_cosine
 from .compare import compare_kendall_tau
 from .compare import compare_spearman
 from .compare import compare_rho_a
+from .searchlight import calc_rdm_searchlight
+from .index import RDMIndex
+from .searchlight import get_searchlight_neighbors
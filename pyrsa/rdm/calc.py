@@ -10,6 +10,8 @@ import numpy as np
 from pyrsa.rdm.rdms import RDMs
 from pyrsa.rdm.rdms import concat
 from pyrsa.data import average_dataset_by
+from pyrsa.data import TemporalDataset
+from pyrsa.data import grouped_sums
 from pyrsa.util.matrix import pairwise_contrast_sparse
 
 
@@ -36,6 +38,11 @@ def calc_rdm(dataset, method='euclidean', descriptor=None, noise=None,
 
     """
     if isinstance(dataset, Iterable):
+        rdm = _calc_rdm_stack(dataset, method=method, descriptor=descriptor,
+                              noise=noise, prior_lambda=prior_lambda,
+                              prior_weight=prior_weight)
+        if rdm is not None:
+            return rdm
         rdms = []
         for i_dat in range(len(dataset)):
             if noise is None:
@@ -75,11 +82,17 @@ def calc_rdm(dataset, method='euclidean', descriptor=None, noise=None,
 
 
 def calc_rdm_movie(dataset, method='euclidean', descriptor=None, noise=None,
-             cv_descriptor=None, prior_lambda=1, prior_weight=0.1,
-             time_descriptor = 'time', bins=None):
+                   cv_descriptor=None, prior_lambda=1, prior_weight=0.1,
+                   time_descriptor='time', bins=None, window=None):
     """
     calculates an RDM movie from an input TemporalDataset
 
+    For the methods 'euclidean', 'correlation', 'mahalanobis', 'crossnobis'
+    and 'poisson' with a single noise precision the conditions are
+    averaged only once on the n_obs x n_channel x n_time measurements and
+    the RDMs for all time points are computed at once. Other methods
+    compute one RDM per time point.
+
     Args:
         dataset (pyrsa.data.dataset.TemporalDataset):
             The dataset the RDM is computed from
@@ -96,6 +109,12 @@ def calc_rdm_movie(dataset, method='euclidean', descriptor=None, noise=None,
             dataset.time_descriptors. Defaults to 'time'.
         bins (array-like): list of bins, with bins[i] containing the vector
             of time-points for the i-th bin. Defaults to no binning.
+        window (int): number of consecutive time points averaged by a
+            sliding window before the RDMs are computed. The time of each
+            RDM is the average time of its window, other numeric
+            time_descriptors are averaged likewise and non-numeric ones
+            take the value at the start of the window.
+            Defaults to no window.
 
     Returns:
         pyrsa.rdm.rdms.RDMs: RDMs object with RDM movie
@@ -105,39 +124,172 @@ def calc_rdm_movie(dataset, method='euclidean', descriptor=None, noise=None,
         rdms = []
         for i_dat, _ in enumerate(dataset):
             if noise is None:
-                rdms.append(calc_rdm_movie(dataset[i_dat], method=method,
-                                     descriptor=descriptor))
+                rdms.append(calc_rdm_movie(
+                    dataset[i_dat], method=method, descriptor=descriptor,
+                    cv_descriptor=cv_descriptor, prior_lambda=prior_lambda,
+                    prior_weight=prior_weight,
+                    time_descriptor=time_descriptor, bins=bins,
+                    window=window))
             elif isinstance(noise, np.ndarray) and noise.ndim == 2:
-                rdms.append(calc_rdm_movie(dataset[i_dat], method=method,
-                                     descriptor=descriptor,
-                                     noise=noise))
+                rdms.append(calc_rdm_movie(
+                    dataset[i_dat], method=method, descriptor=descriptor,
+                    noise=noise, cv_descriptor=cv_descriptor,
+                    prior_lambda=prior_lambda, prior_weight=prior_weight,
+                    time_descriptor=time_descriptor, bins=bins,
+                    window=window))
             elif isinstance(noise, Iterable):
-                rdms.append(calc_rdm_movie(dataset[i_dat], method=method,
-                                     descriptor=descriptor,
-                                     noise=noise[i_dat]))
+                rdms.append(calc_rdm_movie(
+                    dataset[i_dat], method=method, descriptor=descriptor,
+                    noise=noise[i_dat], cv_descriptor=cv_descriptor,
+                    prior_lambda=prior_lambda, prior_weight=prior_weight,
+                    time_descriptor=time_descriptor, bins=bins,
+                    window=window))
         rdm = concat(rdms)
     else:
         if bins is not None:
-            binned_data = dataset.bin_time(time_descriptor, bins)
-            splited_data = binned_data.split_time(time_descriptor)
-            time = binned_data.time_descriptors[time_descriptor]
+            dataset = dataset.bin_time(time_descriptor, bins)
+        time_descriptors = dataset.time_descriptors
+        if window is not None:
+            time_descriptors = _sliding_window_descriptors(time_descriptors,
+                                                           window)
+        time = time_descriptors[time_descriptor]
+        single_noise = noise is None or (isinstance(noise, np.ndarray)
+                                         and noise.ndim == 2)
+        if method in ['euclidean', 'correlation', 'poisson'] or (
+                method in ['mahalanobis', 'crossnobis'] and single_noise):
+            rdm = _calc_rdm_movie_stack(
+                dataset, method=method, descriptor=descriptor, noise=noise,
+                cv_descriptor=cv_descriptor, prior_lambda=prior_lambda,
+                prior_weight=prior_weight, window=window)
         else:
-            splited_data = dataset.split_time(time_descriptor)
-            time = dataset.time_descriptors[time_descriptor]
+            if window is not None:
+                dataset = TemporalDataset(
+                    measurements=_sliding_window_average(
+                        dataset.measurements, window),
+                    descriptors=dataset.descriptors,
+                    obs_descriptors=dataset.obs_descriptors,
+                    channel_descriptors=dataset.channel_descriptors,
+                    time_descriptors=time_descriptors)
+            rdms = []
+            for dat in dataset.split_time(time_descriptor):
+                dat_single = dat.convert_to_dataset(time_descriptor)
+                rdms.append(calc_rdm(dat_single, method=method,
+                                     descriptor=descriptor, noise=noise,
+                                     cv_descriptor=cv_descriptor,
+                                     prior_lambda=prior_lambda,
+                                     prior_weight=prior_weight))
+            rdm = concat(rdms)
+        rdm.rdm_descriptors[time_descriptor] = time
+    return rdm
 
-        rdms = []
-        for dat in splited_data:
-            dat_single = dat.convert_to_dataset(time_descriptor)
-            rdms.append(calc_rdm(dat_single, method=method,
-                                 descriptor=descriptor,noise=noise,
-                                 cv_descriptor=cv_descriptor, prior_lambda=prior_lambda,
-                                 prior_weight=prior_weight))
 
-        rdm = concat(rdms)
-        rdm.rdm_descriptors[time_descriptor] = time
+def _calc_rdm_movie_stack(dataset, method='euclidean', descriptor=None,
+                          noise=None, cv_descriptor=None, prior_lambda=1,
+                          prior_weight=0.1, window=None):
+    """ computes the RDMs for all time points of a TemporalDataset at once.
+    The conditions (and crossvalidation folds) are averaged once on the
+    n_obs x n_channel x n_time measurements. The time axis is then moved
+    to the front, such that the stacked operations used for single RDMs
+    compute all time points at once.
+
+    Returns:
+        pyrsa.rdm.rdms.RDMs: RDMs object with one RDM per time point
+
+    """
+    if method == 'mahalanobis' and noise is None:
+        method = 'euclidean'
+    noise = _check_noise(noise, dataset.n_channel)
+    if method == 'crossnobis':
+        if descriptor is None:
+            raise ValueError('descriptor must be a string! Crossvalidation'
+                             + 'requires multiple measurements to be grouped')
+        if cv_descriptor is None:
+            cv_desc = _gen_default_cv_descriptor(dataset, descriptor)
+            dataset.obs_descriptors['cv_desc'] = cv_desc
+            cv_descriptor = 'cv_desc'
+        dataset.sort_by(descriptor)
+        cv_folds = np.unique(np.array(dataset.obs_descriptors[cv_descriptor]))
+        # n_fold x n_cond x n_channel x n_time
+        measurements_train, measurements_test = _calc_fold_averages(
+            dataset, descriptor, cv_descriptor, cv_folds)
+        if window is not None:
+            measurements_train = _sliding_window_average(measurements_train,
+                                                         window)
+            measurements_test = _sliding_window_average(measurements_test,
+                                                        window)
+        if noise is not None:
+            measurements_test = np.einsum('lj,fijt->filt', noise,
+                                          measurements_test)
+        gram = _calc_gram(np.moveaxis(measurements_train, -1, 0),
+                          np.moveaxis(measurements_test, -1, 0))
+        rdms = np.sum(_gram_to_rdm(gram), axis=1)
+        _, desc, _ = average_dataset_by(dataset, descriptor)
+        dissimilarity_measure = 'crossnobis'
+    else:
+        measurements, desc, descriptor = _parse_input(dataset, descriptor)
+        if window is not None:
+            measurements = _sliding_window_average(measurements, window)
+        # n_time x n_cond x n_channel
+        measurements = np.moveaxis(measurements, -1, 0)
+        rdms, dissimilarity_measure = _calc_rdms_stacked(
+            measurements, method, noise=noise, prior_lambda=prior_lambda,
+            prior_weight=prior_weight)
+    rdm = RDMs(dissimilarities=rdms,
+               dissimilarity_measure=dissimilarity_measure,
+               descriptors=dataset.descriptors)
+    rdm.pattern_descriptors[descriptor] = desc
+    if method in ['mahalanobis', 'crossnobis']:
+        rdm.descriptors['noise'] = noise
+    if method == 'crossnobis':
+        rdm.descriptors['cv_descriptor'] = cv_descriptor
     return rdm
 
 
+def _sliding_window_average(measurements, window):
+    """ averages window consecutive entries along the last axis for all
+    window positions which lie fully within the array
+
+    Args:
+        measurements (numpy.ndarray): ... x n_time
+        window (int): number of entries averaged
+
+    Returns:
+        numpy.ndarray: ... x (n_time - window + 1) averages
+
+    """
+    if window < 1 or window > measurements.shape[-1]:
+        raise ValueError('window must be between 1 and the number of'
+                         + ' time points')
+    cumsum = np.cumsum(measurements, axis=-1)
+    cumsum = np.concatenate(
+        (np.zeros(measurements.shape[:-1] + (1,)), cumsum), axis=-1)
+    return (cumsum[..., window:] - cumsum[..., :-window]) / window
+
+
+def _sliding_window_descriptors(time_descriptors, window):
+    """ applies a sliding window to all time_descriptors of a
+    TemporalDataset. Numeric descriptors are averaged as the measurements,
+    others take the value at the start of each window.
+
+    Args:
+        time_descriptors (dict): descriptors with one entry per time point
+        window (int): number of time points averaged
+
+    Returns:
+        dict: time_descriptors with one entry per window position
+
+    """
+    windowed = {}
+    for key, value in time_descriptors.items():
+        value = np.asarray(value)
+        if np.issubdtype(value.dtype, np.number):
+            windowed[key] = _sliding_window_average(value.astype(float),
+                                                    window)
+        else:
+            windowed[key] = value[:len(value) - window + 1]
+    return windowed
+
+
 def calc_rdm_euclid(dataset, descriptor=None):
     """
     calculates an RDM from an input dataset using euclidean distance
@@ -156,8 +308,8 @@ def calc_rdm_euclid(dataset, descriptor=None):
 
     """
     measurements, desc, descriptor = _parse_input(dataset, descriptor)
-    diff = _calc_pairwise_differences(measurements)
-    rdm = np.einsum('ij,ij->i', diff, diff) / measurements.shape[1]
+    gram = _calc_gram(measurements, measurements)
+    rdm = _gram_to_rdm(gram) / measurements.shape[1]
     rdm = RDMs(dissimilarities=np.array([rdm]),
                dissimilarity_measure='euclidean',
                descriptors=dataset.descriptors)
@@ -220,11 +372,9 @@ def calc_rdm_mahalanobis(dataset, descriptor=None, noise=None):
         measurements, desc, descriptor = _parse_input(dataset, descriptor)
         noise = _check_noise(noise, dataset.n_channel)
         # calculate difference @ precision @ difference for all pairs
-        # first calculate the difference vectors diff and precision @ diff
-        # then calculate the inner product
-        diff = _calc_pairwise_differences(measurements)
-        diff2 = (noise @ diff.T).T
-        rdm = np.einsum('ij,ij->i', diff, diff2) / measurements.shape[1]
+        # from the inner products of the patterns weighted by the precision
+        gram = _calc_gram(measurements, measurements, noise)
+        rdm = _gram_to_rdm(gram) / measurements.shape[1]
         rdm = RDMs(dissimilarities=np.array([rdm]),
                    dissimilarity_measure='Mahalanobis',
                    descriptors=dataset.descriptors)
@@ -282,35 +432,19 @@ def calc_rdm_crossnobis(dataset, descriptor, noise=None,
         cv_descriptor = 'cv_desc'
     dataset.sort_by(descriptor)
     cv_folds = np.unique(np.array(dataset.obs_descriptors[cv_descriptor]))
-    weights = []
     rdms = []
     if noise is None or (isinstance(noise, np.ndarray) and noise.ndim == 2):
-        for i_fold in range(len(cv_folds)):
-            fold = cv_folds[i_fold]
-            data_test = dataset.subset_obs(cv_descriptor, fold)
-            data_train = dataset.subset_obs(cv_descriptor,
-                                            np.setdiff1d(cv_folds, fold))
-            measurements_train, _, _ = \
-                average_dataset_by(data_train, descriptor)
-            measurements_test, _, _ = \
-                average_dataset_by(data_test, descriptor)
-            n_cond = measurements_train.shape[0]
-            rdm = np.empty(int(n_cond * (n_cond-1) / 2))
-            k = 0
-            for i_cond in range(n_cond - 1):
-                for j_cond in range(i_cond + 1, n_cond):
-                    diff_train = measurements_train[i_cond] \
-                        - measurements_train[j_cond]
-                    diff_test = measurements_test[i_cond] \
-                        - measurements_test[j_cond]
-                    if noise is None:
-                        rdm[k] = np.sum(diff_train * diff_test)
-                    else:
-                        rdm[k] = np.sum(diff_train
-                                        * np.matmul(noise, diff_test))
-                    k += 1
-            rdms.append(rdm)
-            weights.append(data_test.n_obs)
+        measurements_train, measurements_test = _calc_fold_averages(
+            dataset, descriptor, cv_descriptor, cv_folds)
+        if noise is not None:
+            measurements_test = np.einsum('lj,fij...->fil...', noise,
+                                          measurements_test)
+        # contrast all pairs in all folds at once through the
+        # n_fold x n_cond x n_cond train/test inner products
+        n_fold, n_cond = measurements_train.shape[:2]
+        gram = _calc_gram(measurements_train.reshape(n_fold, n_cond, -1),
+                          measurements_test.reshape(n_fold, n_cond, -1))
+        rdms = _gram_to_rdm(gram)
     else:  # a list of noises was provided
         measurements = []
         variances = []
@@ -360,9 +494,8 @@ def calc_rdm_poisson(dataset, descriptor=None, prior_lambda=1,
     measurements, desc, descriptor = _parse_input(dataset, descriptor)
     measurements = (measurements + prior_lambda * prior_weight) \
         / (prior_lambda * prior_weight)
-    diff = _calc_pairwise_differences(measurements)
-    diff_log = _calc_pairwise_differences(np.log(measurements))
-    rdm = np.einsum('ij,ij->i', diff, diff_log) / measurements.shape[1]
+    gram = _calc_gram(measurements, np.log(measurements))
+    rdm = _gram_to_rdm(gram) / measurements.shape[1]
     rdm = RDMs(dissimilarities=np.array([rdm]),
                dissimilarity_measure='poisson',
                descriptors=dataset.descriptors)
@@ -415,10 +548,8 @@ def calc_rdm_poisson_cv(dataset, descriptor=None, prior_lambda=1,
         measurements_test = (measurements_test
                              + prior_lambda * prior_weight) \
             / (prior_lambda * prior_weight)
-        diff = _calc_pairwise_differences(measurements_train)
-        diff_log = _calc_pairwise_differences(np.log(measurements_test))
-        rdm = np.einsum('ij,ij->i', diff, diff_log) \
-            / measurements_train.shape[1]
+        gram = _calc_gram(measurements_train, np.log(measurements_test))
+        rdm = _gram_to_rdm(gram) / measurements_train.shape[1]
     rdm = RDMs(dissimilarities=np.array([rdm]),
                dissimilarity_measure='poisson_cv',
                descriptors=dataset.descriptors)
@@ -427,6 +558,148 @@ def calc_rdm_poisson_cv(dataset, descriptor=None, prior_lambda=1,
     return rdm
 
 
+def _calc_rdm_stack(datasets, method='euclidean', descriptor=None,
+                    noise=None, prior_lambda=1, prior_weight=0.1):
+    """ computes the RDMs for a list of datasets at once, if their averaged
+    measurements have equal shapes. The averages are stacked into one
+    n_dataset x n_cond x n_channel array, from which all RDMs are computed
+    with the same stacked operations as for a single dataset.
+    Descriptors are taken from the first dataset as in concat.
+
+    Only the methods without crossvalidation and a single noise
+    precision are computed this way.
+
+    Returns:
+        pyrsa.rdm.rdms.RDMs: RDMs object with one RDM per dataset
+            or None if the datasets cannot be stacked
+
+    """
+    if method == 'mahalanobis' and noise is None:
+        method = 'euclidean'
+    if method == 'mahalanobis':
+        if not (isinstance(noise, np.ndarray) and noise.ndim == 2):
+            return None
+    elif method not in ['euclidean', 'correlation', 'poisson']:
+        return None
+    if len(datasets) == 0:
+        return None
+    # compare the shapes the averages will have before averaging, such
+    # that unstackable datasets are parsed only once by the fallback
+    shapes = []
+    for dat in datasets:
+        if descriptor is None:
+            n_pattern = dat.measurements.shape[0]
+        else:
+            n_pattern = len(np.unique(dat.obs_descriptors[descriptor]))
+        shapes.append((n_pattern,) + dat.measurements.shape[1:])
+    if len(shapes[0]) != 2 or any(shape != shapes[0] for shape in shapes):
+        return None
+    parsed = [_parse_input(dat, descriptor) for dat in datasets]
+    measurements = np.stack([p[0] for p in parsed])
+    _, desc, descriptor = parsed[0]
+    noise = _check_noise(noise, datasets[0].n_channel)
+    rdms, dissimilarity_measure = _calc_rdms_stacked(
+        measurements, method, noise=noise, prior_lambda=prior_lambda,
+        prior_weight=prior_weight)
+    rdm = RDMs(dissimilarities=rdms,
+               dissimilarity_measure=dissimilarity_measure,
+               descriptors=datasets[0].descriptors)
+    rdm.pattern_descriptors[descriptor] = desc
+    if method == 'mahalanobis':
+        rdm.descriptors['noise'] = noise
+    return rdm
+
+
+def _calc_rdms_stacked(measurements, method, noise=None, prior_lambda=1,
+                       prior_weight=0.1):
+    """ computes the RDMs for a stack of averaged measurements with the
+    methods which need no crossvalidation, i.e. 'euclidean',
+    'correlation', 'mahalanobis' and 'poisson'.
+
+    Args:
+        measurements (numpy.ndarray): ... x n_cond x n_channel
+        method (String): the dissimilarity measure
+        noise (numpy.ndarray): n_channel x n_channel precision matrix
+            used only for 'mahalanobis'
+
+    Returns:
+        numpy.ndarray: rdms: ... x n_cond * (n_cond - 1) / 2
+        String: dissimilarity_measure
+
+    """
+    if method == 'euclidean':
+        gram = _calc_gram(measurements, measurements)
+        rdms = _gram_to_rdm(gram) / measurements.shape[-1]
+        dissimilarity_measure = 'euclidean'
+    elif method == 'correlation':
+        measurements = measurements \
+            - measurements.mean(axis=-1, keepdims=True)
+        measurements /= np.sqrt(np.einsum('...ij,...ij->...i', measurements,
+                                          measurements))[..., None]
+        i_cond, j_cond = np.triu_indices(measurements.shape[-2], 1)
+        rdms = 1 - np.einsum('...ik,...jk->...ij', measurements,
+                             measurements)[..., i_cond, j_cond]
+        dissimilarity_measure = 'correlation'
+    elif method == 'mahalanobis':
+        gram = _calc_gram(measurements, measurements, noise)
+        rdms = _gram_to_rdm(gram) / measurements.shape[-1]
+        dissimilarity_measure = 'Mahalanobis'
+    elif method == 'poisson':
+        measurements = (measurements + prior_lambda * prior_weight) \
+            / (prior_lambda * prior_weight)
+        gram = _calc_gram(measurements, np.log(measurements))
+        rdms = _gram_to_rdm(gram) / measurements.shape[-1]
+        dissimilarity_measure = 'poisson'
+    return rdms, dissimilarity_measure
+
+
+def _calc_fold_averages(dataset, descriptor, cv_descriptor, cv_folds):
+    """ computes the training and test set averages per condition for all
+    leave-one-fold-out splits of a dataset at once.
+    The training average of a fold is derived from the total and the fold
+    sums, such that every observation is visited only once.
+
+    Args:
+        dataset (pyrsa.data.dataset.DatasetBase):
+            dataset sorted by descriptor
+        descriptor (String):
+            obs_descriptor used to define the rows/columns of the RDM
+        cv_descriptor (String):
+            obs_descriptor which determines the cross-validation folds
+        cv_folds (numpy.ndarray):
+            sorted unique values of the cv_descriptor
+
+    Returns:
+        numpy.ndarray: measurements_train: n_fold x n_cond x n_channel
+        numpy.ndarray: measurements_test: n_fold x n_cond x n_channel
+            (trailing dimensions of the measurements are kept)
+
+    Raises:
+        ValueError: if a condition is missing in a fold
+
+    """
+    conds, cond_idx = np.unique(dataset.obs_descriptors[descriptor],
+                                return_inverse=True)
+    fold_idx = np.searchsorted(
+        cv_folds, np.array(dataset.obs_descriptors[cv_descriptor]))
+    n_fold = len(cv_folds)
+    n_cond = len(conds)
+    sums, counts = grouped_sums(dataset.measurements,
+                                fold_idx * n_cond + cond_idx,
+                                n_fold * n_cond)
+    if np.any(counts == 0):
+        i_fold, i_cond = divmod(np.flatnonzero(counts == 0)[0], n_cond)
+        raise ValueError(
+            f'condition {conds[i_cond]} of descriptor {descriptor} is'
+            + f' missing in fold {cv_folds[i_fold]} of {cv_descriptor}')
+    sums = sums.reshape((n_fold, n_cond) + sums.shape[1:])
+    counts = counts.reshape((n_fold, n_cond) + (1,) * (sums.ndim - 2))
+    measurements_test = sums / counts
+    measurements_train = (np.sum(sums, axis=0, keepdims=True) - sums) \
+        / (np.sum(counts, axis=0, keepdims=True) - counts)
+    return measurements_train, measurements_test
+
+
 def _calc_rdm_crossnobis_single_sparse(measurements1, measurements2, noise):
     c_matrix = pairwise_contrast_sparse(np.arange(measurements1.shape[0]))
     diff_1 = c_matrix @ measurements1
@@ -437,10 +710,8 @@ def _calc_rdm_crossnobis_single_sparse(measurements1, measurements2, noise):
 
 
 def _calc_rdm_crossnobis_single(measurements1, measurements2, noise):
-    diff_1 = _calc_pairwise_differences(measurements1)
-    diff_2 = _calc_pairwise_differences(measurements2)
-    diff_2 = noise @ diff_2.transpose()
-    rdm = np.einsum('kj,jk->k', diff_1, diff_2) / measurements1.shape[1]
+    gram = _calc_gram(measurements1, measurements2, noise)
+    rdm = _gram_to_rdm(gram) / measurements1.shape[1]
     return rdm
 
 
@@ -461,15 +732,54 @@ def _gen_default_cv_descriptor(dataset, descriptor):
     return cv_descriptor
 
 
-def _calc_pairwise_differences(measurements):
-    n, m = measurements.shape
-    diff = np.zeros((int(n * (n - 1) / 2), m))
-    k = 0
-    for i in range(measurements.shape[0]):
-        for j in range(i+1, measurements.shape[0]):
-            diff[k] = measurements[i] - measurements[j]
-            k += 1
-    return diff
+def _calc_gram(measurements1, measurements2, noise=None):
+    """ computes the inner products between all patterns of two sets of
+    measurements, optionally weighted by a noise precision matrix.
+    Stacks of measurements (... x n_cond x n_channel) are processed at once.
+
+    Both sets are centered across conditions first. This leaves all
+    pairwise differences unchanged, but avoids loosing precision to a large
+    common offset of the patterns.
+
+    Args:
+        measurements1 (numpy.ndarray): ... x n_cond x n_channel
+        measurements2 (numpy.ndarray): ... x n_cond x n_channel
+        noise (numpy.ndarray): n_channel x n_channel precision matrix
+            default: identity matrix
+
+    Returns:
+        numpy.ndarray: gram: ... x n_cond x n_cond matrix of inner products
+            measurements1[i] @ noise @ measurements2[j]
+
+    """
+    measurements1 = measurements1 \
+        - np.mean(measurements1, axis=-2, keepdims=True)
+    measurements2 = measurements2 \
+        - np.mean(measurements2, axis=-2, keepdims=True)
+    if noise is not None:
+        measurements2 = measurements2 @ noise.T
+    gram = measurements1 @ np.swapaxes(measurements2, -1, -2)
+    return gram
+
+
+def _gram_to_rdm(gram):
+    """ converts (stacks of) inner product matrices into vectorized
+    dissimilarities, i.e. computes
+    (m1[i] - m1[j]) @ noise @ (m2[i] - m2[j]) = g_ii + g_jj - g_ij - g_ji
+    for all pairs i < j in the order used for RDM vectors.
+
+    Args:
+        gram (numpy.ndarray): ... x n_cond x n_cond inner products
+
+    Returns:
+        numpy.ndarray: rdm: ... x n_cond * (n_cond - 1) / 2
+
+    """
+    i_cond, j_cond = np.triu_indices(gram.shape[-1], 1)
+    diag = np.diagonal(gram, axis1=-2, axis2=-1)
+    rdm = diag[..., i_cond] + diag[..., j_cond] \
+        - gram[..., i_cond, j_cond] - gram[..., j_cond, i_cond]
+    return rdm
 
 
 def _parse_input(dataset, descriptor):
@@ -3,15 +3,23 @@
 """
 Comparison methods for comparing two RDMs objects
 """
+import os
+import tempfile
 import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+import scipy.linalg
+import scipy.sparse
 import scipy.stats
 from scipy.stats._stats import _kendall_dis
 from pyrsa.util.matrix import pairwise_contrast_sparse
 from pyrsa.util.rdm_utils import _get_n_from_reduced_vectors
-from pyrsa.util.matrix import row_col_indicator_g
+from pyrsa.util.rdm_utils import _get_triu_indices
+from pyrsa.util.rdm_utils import get_dense_ranks
+from pyrsa.util.rdm_utils import _get_sorted_dense_ranks
+from pyrsa.util.rdm_utils import dense_to_average_ranks
 
 
-def compare(rdm1, rdm2, method='cosine', sigma_k=None):
+def compare(rdm1, rdm2, method='cosine', sigma_k=None, paired=False):
     """calculates the distances between two RDMs objects using a chosen method
 
     Args:
@@ -25,33 +33,312 @@ def compare(rdm1, rdm2, method='cosine', sigma_k=None):
             'spearman' = spearman rank correlation distance
             'corr' = pearson correlation distance
             'kendall' = kendall-tau based distance
+        sigma_k (numpy.ndarray):
+            covariance between pattern estimates for 'cosine_cov' and
+            'corr_cov'
+        paired (bool):
+            if True, rdm1 and rdm2 must contain equally many RDMs and only
+            the i-th RDMs of both sets are compared with each other
     Returns:
         numpy.ndarray: dist:
             dissimilarity between the two RDMs
+            n_rdm1 x n_rdm2 or a vector of n_rdm values if paired
 
     """
     if method == 'cosine':
-        sim = compare_cosine(rdm1, rdm2)
+        sim = compare_cosine(rdm1, rdm2, paired=paired)
     elif method == 'spearman':
-        sim = compare_spearman(rdm1, rdm2)
+        sim = compare_spearman(rdm1, rdm2, paired=paired)
     elif method == 'corr':
-        sim = compare_correlation(rdm1, rdm2)
+        sim = compare_correlation(rdm1, rdm2, paired=paired)
     elif method == 'kendall' or method == 'tau-b':
-        sim = compare_kendall_tau(rdm1, rdm2)
+        sim = compare_kendall_tau(rdm1, rdm2, paired=paired)
     elif method == 'tau-a':
-        sim = compare_kendall_tau_a(rdm1, rdm2)
+        sim = compare_kendall_tau_a(rdm1, rdm2, paired=paired)
     elif method == 'rho-a':
-        sim = compare_rho_a(rdm1, rdm2)
+        sim = compare_rho_a(rdm1, rdm2, paired=paired)
     elif method == 'corr_cov':
-        sim = compare_correlation_cov_weighted(rdm1, rdm2, sigma_k=sigma_k)
+        sim = compare_correlation_cov_weighted(rdm1, rdm2, sigma_k=sigma_k,
+                                               paired=paired)
     elif method == 'cosine_cov':
-        sim = compare_cosine_cov_weighted(rdm1, rdm2, sigma_k=sigma_k)
+        sim = compare_cosine_cov_weighted(rdm1, rdm2, sigma_k=sigma_k,
+                                          paired=paired)
     else:
         raise ValueError('Unknown RDM comparison method requested!')
     return sim
 
 
-def compare_cosine(rdm1, rdm2):
+def compare_blocked(rdm1, rdm2, method='cosine', sigma_k=None,
+                    memory_budget=2 ** 30, out=None, filename=None,
+                    n_jobs=1):
+    """calculates the distances between two large sets of RDMs in blocks
+
+    Both sets of RDMs are ranked, centered, weighted and normalized as
+    required by the method only once. This transformation is done in chunks
+    of RDMs, which are written into preallocated arrays. The transformed
+    sets are then split into blocks, for which only the pairwise products
+    are computed and written into a preallocated output matrix. The chunk
+    and block sizes are chosen such that the intermediate arrays of all
+    concurrently processed chunks or blocks stay within memory_budget.
+    Chunks and blocks are processed by a pool of n_jobs threads.
+    As all methods transform each RDM separately, the results are
+    identical to compare, up to rounding in the solves with the rdm
+    covariance for the covariance weighted methods with sigma_k.
+
+    Args:
+        rdm1 (pyrsa.rdm.RDMs or numpy.ndarray):
+            first set of RDMs
+        rdm2 (pyrsa.rdm.RDMs or numpy.ndarray):
+            second set of RDMs
+        method (string):
+            which method to use, see compare
+        sigma_k (numpy.ndarray):
+            covariance between pattern estimates for 'cosine_cov' and
+            'corr_cov'
+        memory_budget (int):
+            approximate memory in bytes for the intermediate arrays
+        out (numpy.ndarray):
+            preallocated n_rdm1 x n_rdm2 output array
+        filename (String):
+            if given and no out is passed, the output is a memory mapped
+            .npy file created at this path. The transformed RDMs are then
+            also held in memory mapped temporary files in its directory.
+        n_jobs (int):
+            number of threads, -1 uses all cores
+
+    Returns:
+        numpy.ndarray: dist:
+            dissimilarity between the two RDMs
+
+    """
+    vectors1 = _get_vectors(rdm1)
+    vectors2 = _get_vectors(rdm2)
+    if not vectors1.shape[1] == vectors2.shape[1]:
+        raise ValueError('rdm1 and rdm2 must be RDMs of equal shape')
+    shape = (vectors1.shape[0], vectors2.shape[0])
+    if out is None:
+        if filename is None:
+            out = np.empty(shape)
+        else:
+            out = np.lib.format.open_memmap(filename, mode='w+',
+                                            dtype=float, shape=shape)
+    elif not out.shape == shape:
+        raise ValueError('out must have shape ' + str(shape))
+    if filename is None:
+        directory = None
+    else:
+        directory = os.path.dirname(os.path.abspath(filename))
+    n_jobs = effective_n_jobs(n_jobs)
+    memory_budget = memory_budget / n_jobs
+    n_valid = np.sum(~np.isnan(vectors1[0]))
+    prepared1 = _prepare_blocked(vectors1, n_valid, method, sigma_k, False,
+                                 memory_budget, n_jobs, directory)
+    prepared2 = _prepare_blocked(vectors2, n_valid, method, sigma_k, True,
+                                 memory_budget, n_jobs, directory)
+    block_size = _get_block_size(prepared1[0].shape[1], method,
+                                 memory_budget)
+    blocks = [(slice(i, i + block_size), slice(j, j + block_size))
+              for i in range(0, shape[0], block_size)
+              for j in range(0, shape[1], block_size)]
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_compare_block)(prepared1, prepared2, out, block, method)
+        for block in blocks)
+    return out
+
+
+def _prepare_blocked(vectors, n_valid, method, sigma_k, solve,
+                     memory_budget, n_jobs, directory):
+    """ transforms a set of RDM vectors for compare_blocked in chunks, such
+    that comparing two blocks only requires the pairwise products.
+    The transformed chunks are written into arrays with one row per RDM,
+    which are memory mapped temporary files if directory is given.
+
+    Returns:
+        tuple: prepared: arrays with one row per RDM, see _prepare_chunk
+
+    """
+    chunk_size = _get_chunk_size(vectors.shape[1], method, memory_budget)
+    chunks = [slice(i, i + chunk_size)
+              for i in range(0, vectors.shape[0], chunk_size)]
+    first = _prepare_chunk(vectors[chunks[0]], n_valid, method, sigma_k,
+                           solve)
+    prepared = tuple(_empty_rows(vectors.shape[0], p, directory)
+                     for p in first)
+    for p, p_chunk in zip(prepared, first):
+        p[chunks[0]] = p_chunk
+    del first
+
+    def _prepare_into(chunk):
+        for p, p_chunk in zip(prepared, _prepare_chunk(
+                vectors[chunk], n_valid, method, sigma_k, solve)):
+            p[chunk] = p_chunk
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_prepare_into)(chunk) for chunk in chunks[1:])
+    return prepared
+
+
+def _prepare_chunk(vectors, n_valid, method, sigma_k, solve):
+    """ transforms a chunk of RDM vectors for compare_blocked.
+    For the cosine based methods the chunk is represented by the
+    transformed vectors and their norms, for rho-a by the centered ranks
+    and for the kendall methods by the output of _dense_ranks. If solve is
+    True, the covariance weighted methods with sigma_k return V^-1 v
+    instead of the vectors v, such that the products of the two sets of
+    RDMs are the weighted inner products.
+
+    Returns:
+        tuple: arrays with one row per RDM in vectors
+
+    """
+    if method in ['spearman', 'rho-a']:
+        vectors = dense_to_average_ranks(get_dense_ranks(vectors))
+    valid = ~np.isnan(vectors)
+    if not np.all(np.sum(valid, axis=1) == n_valid):
+        raise ValueError('rdm1 and rdm2 have different nan positions')
+    vectors = vectors[valid].reshape(vectors.shape[0], n_valid)
+    if method in ['kendall', 'tau-b', 'tau-a']:
+        return _dense_ranks(vectors)
+    if method in ['corr', 'spearman', 'rho-a', 'corr_cov']:
+        vectors = vectors - np.mean(vectors, 1, keepdims=True)
+    if method == 'rho-a':
+        return (vectors,)
+    if method in ['cosine', 'corr', 'spearman']:
+        vectors_m = vectors
+    elif method in ['cosine_cov', 'corr_cov'] and sigma_k is None:
+        vectors = vectors_m = _cov_weighting(vectors)
+    elif method in ['cosine_cov', 'corr_cov']:
+        vectors_m = _solve_v(vectors, sigma_k)
+    else:
+        raise ValueError('Unknown RDM comparison method requested!')
+    norm = np.sqrt(np.einsum('ij,ij->i', vectors, vectors_m))
+    if solve:
+        return vectors_m, norm
+    return vectors, norm
+
+
+def _empty_rows(n_rdm, example, directory):
+    """ allocates an array for n_rdm rows shaped like the rows of example,
+    which is memory mapped to a temporary file if directory is given """
+    shape = (n_rdm,) + example.shape[1:]
+    if directory is None:
+        return np.empty(shape, dtype=example.dtype)
+    with tempfile.TemporaryFile(dir=directory) as file:
+        return np.memmap(file, dtype=example.dtype, mode='w+', shape=shape)
+
+
+def _compare_block(prepared1, prepared2, out, block, method):
+    """ compares one block of RDMs prepared by _prepare_blocked and writes
+    the result into out """
+    prepared1 = tuple(p[block[0]] for p in prepared1)
+    prepared2 = tuple(p[block[1]] for p in prepared2)
+    if method in ['kendall', 'tau-b']:
+        out[block] = _kendall_ranked(prepared1, prepared2, variant='b')
+    elif method == 'tau-a':
+        out[block] = _kendall_ranked(prepared1, prepared2, variant='a')
+    elif method == 'rho-a':
+        n = prepared1[0].shape[1]
+        sim = np.einsum('ij,kj->ik', prepared1[0], prepared2[0])
+        out[block] = sim / (n ** 3 - n) * 12
+    else:
+        cos = np.einsum('ij,kj->ik', prepared1[0], prepared2[0])
+        cos /= prepared1[1].reshape((-1, 1))
+        cos /= prepared2[1].reshape((1, -1))
+        out[block] = cos
+
+
+def _get_chunk_size(n_dist, method, memory_budget):
+    """ number of RDMs transformed at once by _prepare_blocked, such that
+    the intermediates of the transformation take about memory_budget bytes.
+    Ranking and the covariance weighting hold more copies of each vector
+    than centering and normalizing.
+    """
+    if method in ['cosine_cov', 'corr_cov']:
+        n_copies = 12
+    elif method in ['spearman', 'rho-a', 'kendall', 'tau-b', 'tau-a']:
+        n_copies = 10
+    else:
+        n_copies = 4
+    return max(int(memory_budget / (8 * n_copies * n_dist)), 1)
+
+
+def _get_block_size(n_dist, method, memory_budget):
+    """ number of RDMs per block such that comparing two prepared blocks
+    takes about memory_budget bytes. The products of the cosine based
+    methods and rho-a only allocate the output block, while the kendall
+    methods also hold a few permuted rank vectors of the second block.
+    """
+    if method in ['kendall', 'tau-b', 'tau-a']:
+        per_rdm = 8 * 4 * n_dist
+    else:
+        per_rdm = 0
+    # solve 8 * b ** 2 + per_rdm * b = memory_budget for the block size b
+    block_size = (np.sqrt(per_rdm ** 2 + 32 * memory_budget) - per_rdm) / 16
+    return max(int(block_size), 1)
+
+
+def compare_gradient(rdm1, rdm2, method='cosine', sigma_k=None):
+    """calculates the similarities of a single RDM to a set of RDMs and
+    their gradients with respect to the entries of the single RDM
+
+    Only the differentiable methods 'cosine', 'corr', 'cosine_cov' and
+    'corr_cov' are supported. The similarities are the same as computed
+    by compare.
+
+    Args:
+        rdm1 (pyrsa.rdm.RDMs or numpy.ndarray):
+            single RDM, e.g. a model prediction
+        rdm2 (pyrsa.rdm.RDMs or numpy.ndarray):
+            set of RDMs
+        method (string):
+            which method to use, see above
+        sigma_k (numpy.ndarray):
+            covariance between pattern estimates for 'cosine_cov' and
+            'corr_cov'
+    Returns:
+        numpy.ndarray: sim:
+            n_rdm2 similarities of rdm1 to the RDMs in rdm2
+        numpy.ndarray: gradient:
+            n_rdm2 x n_dist derivatives of each similarity with respect to
+            the entries of the rdm1 vector. Entries which are nan and thus
+            excluded from the comparison have derivative 0.
+
+    """
+    if method not in ['cosine', 'corr', 'cosine_cov', 'corr_cov']:
+        raise ValueError('gradients are only available for the methods'
+                         + ' cosine, corr, cosine_cov and corr_cov')
+    valid = ~np.isnan(_get_vectors(rdm1))
+    if not valid.shape[0] == 1:
+        raise ValueError('compare_gradient requires a single RDM as rdm1')
+    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
+    if method in ['corr', 'corr_cov']:
+        vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
+        vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
+    if method in ['cosine', 'corr']:
+        sim, grad = _cosine_gradient(vector1, vector2)
+    elif sigma_k is None:
+        sim, grad = _cosine_gradient(_cov_weighting(vector1),
+                                     _cov_weighting(vector2))
+        grad = _cov_weighting_transposed(
+            grad, _get_n_from_reduced_vectors(vector1))
+    else:
+        # with W = V^-1 the similarity is v1^T W v2 / sqrt(v1^T W v1 v2^T W v2)
+        vector1_m = _solve_v(vector1, sigma_k)
+        vector2_m = _solve_v(vector2, sigma_k)
+        norm1 = np.sqrt(np.einsum('ij,ij->i', vector1, vector1_m))
+        norm2 = np.sqrt(np.einsum('ij,ij->i', vector2,
+                                  vector2_m)).reshape(-1, 1)
+        sim = np.einsum('ij,kj->k', vector1, vector2_m) / norm1 / norm2[:, 0]
+        grad = vector2_m / norm2 / norm1 \
+            - sim.reshape(-1, 1) * vector1_m / (norm1 * norm1)
+    if method in ['corr', 'corr_cov']:
+        # the centering of vector1 is a projection onto zero mean vectors
+        grad = grad - np.mean(grad, 1, keepdims=True)
+    gradient = np.zeros((grad.shape[0], valid.shape[1]))
+    gradient[:, valid[0]] = grad
+    return sim, gradient
+
+
+def compare_cosine(rdm1, rdm2, paired=False):
     """calculates the cosine distances between two RDMs objects
 
     Args:
@@ -59,17 +346,19 @@ def compare_cosine(rdm1, rdm2):
             first set of RDMs
         rdm2 (pyrsa.rdm.RDMs):
             second set of RDMs
+        paired (bool):
+            if True, only the i-th RDMs of both sets are compared
     Returns:
         numpy.ndarray: dist
             cosine distance between the two RDMs
 
     """
-    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
-    sim = _cosine(vector1, vector2)
+    vector1, vector2 = _parse_input_rdms(rdm1, rdm2, paired)
+    sim = _cosine(vector1, vector2, paired)
     return sim
 
 
-def compare_correlation(rdm1, rdm2):
+def compare_correlation(rdm1, rdm2, paired=False):
     """calculates the correlation distances between two RDMs objects
 
     Args:
@@ -77,20 +366,22 @@ def compare_correlation(rdm1, rdm2):
             first set of RDMs
         rdm2 (pyrsa.rdm.RDMs):
             second set of RDMs
+        paired (bool):
+            if True, only the i-th RDMs of both sets are compared
     Returns:
         numpy.ndarray: dist:
             correlation distance between the two RDMs
 
     """
-    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
+    vector1, vector2 = _parse_input_rdms(rdm1, rdm2, paired)
     # compute by subtracting the mean and then calculating cosine similarity
     vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
     vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
-    sim = _cosine(vector1, vector2)
+    sim = _cosine(vector1, vector2, paired)
     return sim
 
 
-def compare_cosine_cov_weighted(rdm1, rdm2, sigma_k=None):
+def compare_cosine_cov_weighted(rdm1, rdm2, sigma_k=None, paired=False):
     """calculates the cosine distances between two RDMs objects
 
     Args:
@@ -98,17 +389,19 @@ def compare_cosine_cov_weighted(rdm1, rdm2, sigma_k=None):
             first set of RDMs
         rdm2 (pyrsa.rdm.RDMs):
             second set of RDMs
+        paired (bool):
+            if True, only the i-th RDMs of both sets are compared
     Returns:
         numpy.ndarray: dist:
             cosine distance between the two RDMs
 
     """
-    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
-    sim = _cosine_cov_weighted(vector1, vector2, sigma_k)
+    vector1, vector2 = _parse_input_rdms(rdm1, rdm2, paired)
+    sim = _cosine_cov_weighted(vector1, vector2, sigma_k, paired)
     return sim
 
 
-def compare_correlation_cov_weighted(rdm1, rdm2, sigma_k=None):
+def compare_correlation_cov_weighted(rdm1, rdm2, sigma_k=None, paired=False):
     """calculates the correlation distances between two RDMs objects
 
     Args:
@@ -116,20 +409,22 @@ def compare_correlation_cov_weighted(rdm1, rdm2, sigma_k=None):
             first set of RDMs
         rdm2 (pyrsa.rdm.RDMs):
             second set of RDMs
+        paired (bool):
+            if True, only the i-th RDMs of both sets are compared
     Returns:
         numpy.ndarray: dist:
             correlation distance between the two RDMs
 
     """
-    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
+    vector1, vector2 = _parse_input_rdms(rdm1, rdm2, paired)
     # compute by subtracting the mean and then calculating cosine similarity
     vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
     vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
-    sim = _cosine_cov_weighted(vector1, vector2, sigma_k)
+    sim = _cosine_cov_weighted(vector1, vector2, sigma_k, paired)
     return sim
 
 
-def compare_spearman(rdm1, rdm2):
+def compare_spearman(rdm1, rdm2, paired=False):
     """calculates the spearman rank correlation distances between
     two RDMs objects
 
@@ -138,21 +433,22 @@ def compare_spearman(rdm1, rdm2):
             first set of RDMs
         rdm2 (pyrsa.rdm.RDMs):
             second set of RDMs
+        paired (bool):
+            if True, only the i-th RDMs of both sets are compared
     Returns:
         numpy.ndarray: dist:
             rank correlation distance between the two RDMs
 
     """
-    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
-    vector1 = np.apply_along_axis(scipy.stats.rankdata, 1, vector1)
-    vector2 = np.apply_along_axis(scipy.stats.rankdata, 1, vector2)
+    vector1, vector2 = _parse_input_rdms(_get_ranks(rdm1), _get_ranks(rdm2),
+                                         paired)
     vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
     vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
-    sim = _cosine(vector1, vector2)
+    sim = _cosine(vector1, vector2, paired)
     return sim
 
 
-def compare_rho_a(rdm1, rdm2):
+def compare_rho_a(rdm1, rdm2, paired=False):
     """calculates the spearman rank correlation distances between
     two RDMs objects
 
@@ -161,22 +457,27 @@ def compare_rho_a(rdm1, rdm2):
             first set of RDMs
         rdm2 (pyrsa.rdm.RDMs):
             second set of RDMs
+        paired (bool):
+            if True, only the i-th RDMs of both sets are compared
     Returns:
         numpy.ndarray: dist:
             rank correlation distance between the two RDMs
 
     """
-    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
-    vector1 = np.apply_along_axis(scipy.stats.rankdata, 1, vector1)
-    vector2 = np.apply_along_axis(scipy.stats.rankdata, 1, vector2)
+    vector1, vector2 = _parse_input_rdms(_get_ranks(rdm1), _get_ranks(rdm2),
+                                         paired)
     vector1 = vector1 - np.mean(vector1, 1, keepdims=True)
     vector2 = vector2 - np.mean(vector2, 1, keepdims=True)
     n = vector1.shape[1]
-    sim = np.einsum('ij,kj->ik', vector1, vector2) / (n ** 3 - n) * 12
+    if paired:
+        sim = np.einsum('ij,ij->i', vector1, vector2)
+    else:
+        sim = np.einsum('ij,kj->ik', vector1, vector2)
+    sim = sim / (n ** 3 - n) * 12
     return sim
 
 
-def compare_kendall_tau(rdm1, rdm2):
+def compare_kendall_tau(rdm1, rdm2, paired=False):
     """calculates the Kendall-tau b based distance between two RDMs objects.
     Kendall-tau b is the version, which corrects for ties.
     We here use the implementation from scipy.
@@ -186,16 +487,18 @@ def compare_kendall_tau(rdm1, rdm2):
                 first set of RDMs
             rdm2 (pyrsa.rdm.RDMs):
                 second set of RDMs
+            paired (bool):
+                if True, only the i-th RDMs of both sets are compared
         Returns:
             numpy.ndarray: dist:
                 kendall-tau based distance between the two RDMs
     """
-    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
-    sim = _all_combinations(vector1, vector2, _kendall_tau)
+    vector1, vector2 = _parse_input_rdms(rdm1, rdm2, paired)
+    sim = _kendall_batch(vector1, vector2, variant='b', paired=paired)
     return sim
 
 
-def compare_kendall_tau_a(rdm1, rdm2):
+def compare_kendall_tau_a(rdm1, rdm2, paired=False):
     """calculates the Kendall-tau a based distance between two RDMs objects.
     adequate when some models predict ties
 
@@ -204,12 +507,14 @@ def compare_kendall_tau_a(rdm1, rdm2):
                 first set of RDMs
             rdm2 (pyrsa.rdm.RDMs):
                 second set of RDMs
+            paired (bool):
+                if True, only the i-th RDMs of both sets are compared
         Returns:
             numpy.ndarray: dist:
                 kendall-tau a based distance between the two RDMs
     """
-    vector1, vector2 = _parse_input_rdms(rdm1, rdm2)
-    sim = _all_combinations(vector1, vector2, _tau_a)
+    vector1, vector2 = _parse_input_rdms(rdm1, rdm2, paired)
+    sim = _kendall_batch(vector1, vector2, variant='a', paired=paired)
     return sim
 
 
@@ -240,8 +545,13 @@ def _all_combinations(vectors1, vectors2, func):
     return value
 
 
-def _cosine_cov_weighted_slow(vector1, vector2, sigma_k=None):
+def _cosine_cov_weighted_slow(vector1, vector2, sigma_k=None, paired=False):
     """computes the cosine angles between two sets of vectors
+    weighted by the RDM covariance V implied by sigma_k
+
+    The inner products v1^T V^-1 v2 are computed from V^-1 v2 as computed
+    by _solve_v, i.e. with a cached Cholesky factor for small V and by
+    conjugate gradients on the sparse V otherwise.
 
     Args:
         vector1 (numpy.ndarray):
@@ -250,31 +560,30 @@ def _cosine_cov_weighted_slow(vector1, vector2, sigma_k=None):
             second vectors (2D)
         sigma_k (Matrix):
             optional, covariance between pattern estimates
+        paired (bool):
+            compute only the angles between the i-th vectors of both sets
 
     Returns:
         cos (float):
             cosine angle between vectors
 
     """
-    n_cond = _get_n_from_reduced_vectors(vector1)
-    v = _get_v(n_cond, sigma_k)
-    # compute V^-1 vector1/2 for all vectors by solving Vx = vector1/2
-    vector1_m = np.array([scipy.sparse.linalg.cg(v, vector1[i], atol=0)[0]
-                          for i in range(vector1.shape[0])])
-    vector2_m = np.array([scipy.sparse.linalg.cg(v, vector2[i], atol=0)[0]
-                          for i in range(vector2.shape[0])])
-    # compute the inner products v1^T (V^-1 v2) for all combinations
+    vector1_m = _solve_v(vector1, sigma_k)
+    vector2_m = _solve_v(vector2, sigma_k)
+    norm1 = np.sqrt(np.einsum('ij,ij->i', vector1, vector1_m))
+    norm2 = np.sqrt(np.einsum('ij,ij->i', vector2, vector2_m))
+    if paired:
+        return np.einsum('ij,ij->i', vector1, vector2_m) / norm1 / norm2
+    # compute the inner products v1^T V^-1 v2 for all combinations
     cos = np.einsum('ij,kj->ik', vector1, vector2_m)
-    # divide by sqrt(v1^T (V^-1 v1))
-    cos /= np.sqrt(np.einsum('ij,ij->i', vector1,
-                             vector1_m)).reshape((-1, 1))
-    # divide by sqrt(v2^T (V^-1 v2))
-    cos /= np.sqrt(np.einsum('ij,ij->i', vector2,
-                             vector2_m)).reshape((1, -1))
+    # divide by sqrt(v1^T V^-1 v1)
+    cos /= norm1.reshape((-1, 1))
+    # divide by sqrt(v2^T V^-1 v2)
+    cos /= norm2.reshape((1, -1))
     return cos
 
 
-def _cosine_cov_weighted(vector1, vector2, sigma_k=None):
+def _cosine_cov_weighted(vector1, vector2, sigma_k=None, paired=False):
     """computes the cosine angles between two sets of vectors
     weighted by the covariance - linearCKA
 
@@ -283,6 +592,10 @@ def _cosine_cov_weighted(vector1, vector2, sigma_k=None):
             first vectors (2D)
         vector1 (numpy.ndarray):
             second vectors (2D)
+        sigma_k (Matrix):
+            optional, covariance between pattern estimates
+        paired (bool):
+            compute only the angles between the i-th vectors of both sets
 
     Returns:
         cos (float):
@@ -290,7 +603,11 @@ def _cosine_cov_weighted(vector1, vector2, sigma_k=None):
 
     """
     if sigma_k is not None:
-        cos = _cosine_cov_weighted_slow(vector1, vector2, sigma_k=sigma_k)
+        cos = _cosine_cov_weighted_slow(vector1, vector2, sigma_k=sigma_k,
+                                        paired=paired)
+    elif paired:
+        cos = _cosine(_cov_weighting(vector1), _cov_weighting(vector2),
+                      paired=True)
     else:
         # Compute the extended version of RDM vectors in whitened space
         vector1_m = _cov_weighting(vector1)
@@ -322,20 +639,86 @@ def _cov_weighting(vector):
     """
     N, n_dist = vector.shape
     n_cond = _get_n_from_reduced_vectors(vector)
-    vector_w = -0.5 * np.c_[vector, np.zeros((N, n_cond))]
-    rowI, colI = row_col_indicator_g(n_cond)
-    sumI = rowI + colI
-    m = vector_w @ sumI / n_cond  # Column and row means
-    mm = np.sum(vector_w * 2, axis=1) / (n_cond * n_cond)  # Overall mean
+    vector = -0.5 * vector
+    # Column and row means of the second moment matrix, computed from the
+    # row sums of the RDMs without indicator matrices
+    i_cond, j_cond = _get_triu_indices(n_cond)
+    offset = (n_cond * np.arange(N)).reshape(-1, 1)
+    m = np.bincount((i_cond + offset).ravel(), weights=vector.ravel(),
+                    minlength=N * n_cond)
+    m += np.bincount((j_cond + offset).ravel(), weights=vector.ravel(),
+                     minlength=N * n_cond)
+    m = m.reshape(N, n_cond) / n_cond
+    mm = np.sum(vector * 2, axis=1) / (n_cond * n_cond)  # Overall mean
     mm = mm.reshape(-1, 1)
     # subtract the column and row means and add overall mean
-    vector_w = vector_w - m @ sumI.T + mm
+    vector_w = np.empty((N, n_dist + n_cond))
+    vector_w[:, :n_dist] = vector - m[:, i_cond] - m[:, j_cond] + mm
+    vector_w[:, n_dist:] = mm - 2 * m
     # Weight the off-diagnoal terms double
     vector_w[:, :n_dist] = vector_w[:, :n_dist] * np.sqrt(2)
     return vector_w
 
 
-def _cosine(vector1, vector2):
+def _cov_weighting_transposed(vector_w, n_cond):
+    """Applies the transpose of the linear map computed by _cov_weighting,
+    which maps gradients with respect to the weighted vectors back to
+    gradients with respect to the RDM vectors
+
+    Args:
+        vector_w (numpy.ndarray):
+            N x (n_dist + n_cond) vectors in the weighted representation
+        n_cond (int):
+            number of conditions of the RDMs
+
+    Returns:
+        vector:
+            N x n_dist vectors
+    """
+    N = vector_w.shape[0]
+    i_cond, j_cond = _get_triu_indices(n_cond)
+    n_dist = len(i_cond)
+    vector_d = vector_w[:, :n_dist] * np.sqrt(2)
+    vector_c = vector_w[:, n_dist:]
+    # gradients of the row and column means and the overall mean
+    offset = (n_cond * np.arange(N)).reshape(-1, 1)
+    m = np.bincount((i_cond + offset).ravel(), weights=vector_d.ravel(),
+                    minlength=N * n_cond)
+    m += np.bincount((j_cond + offset).ravel(), weights=vector_d.ravel(),
+                     minlength=N * n_cond)
+    m = -m.reshape(N, n_cond) - 2 * vector_c
+    mm = np.sum(vector_d, axis=1) + np.sum(vector_c, axis=1)
+    mm = mm.reshape(-1, 1)
+    vector = vector_d + (m[:, i_cond] + m[:, j_cond]) / n_cond \
+        + 2 * mm / (n_cond * n_cond)
+    return -0.5 * vector
+
+
+def _cosine_gradient(vector1, vector2):
+    """computes the cosine angles of a single vector to a set of vectors
+    and their gradients with respect to the single vector
+
+    Args:
+        vector1 (numpy.ndarray):
+            single vector (1 x n)
+        vector2 (numpy.ndarray):
+            set of vectors (2D)
+    Returns:
+        cos (numpy.ndarray):
+            cosine angles to the vectors in vector2
+        gradient (numpy.ndarray):
+            derivatives of each cosine with respect to vector1
+
+    """
+    norm1 = np.sqrt(np.einsum('ij,ij->i', vector1, vector1))
+    norm2 = np.sqrt(np.einsum('ij,ij->i', vector2, vector2)).reshape(-1, 1)
+    cos = np.einsum('ij,kj->k', vector1, vector2) / norm1 / norm2[:, 0]
+    gradient = vector2 / norm2 / norm1 \
+        - cos.reshape(-1, 1) * vector1 / (norm1 * norm1)
+    return cos, gradient
+
+
+def _cosine(vector1, vector2, paired=False):
     """computes the cosine angles between two sets of vectors
 
     Args:
@@ -343,11 +726,18 @@ def _cosine(vector1, vector2):
             first vectors (2D)
         vector1 (numpy.ndarray):
             second vectors (2D)
+        paired (bool):
+            compute only the angles between the i-th vectors of both sets
     Returns:
         cos (float):
             cosine angle between vectors
 
     """
+    if paired:
+        cos = np.einsum('ij,ij->i', vector1, vector2)
+        cos /= np.sqrt(np.einsum('ij,ij->i', vector1, vector1))
+        cos /= np.sqrt(np.einsum('ij,ij->i', vector2, vector2))
+        return cos
     # compute all inner products
     cos = np.einsum('ij,kj->ik', vector1, vector2)
     # divide by sqrt of the inner products with themselves
@@ -407,6 +797,234 @@ def _tau_a(vector1, vector2):
     return tau
 
 
+def _kendall_batch(vectors1, vectors2, variant='a', max_categories=5,
+                   paired=False):
+    """computes kendall-tau a or b for all pairs of vectors1 and vectors2.
+
+    Each vector is sorted and converted to dense ranks only once.
+    For tau-a, vectors with at most max_categories distinct values, like
+    categorical model RDMs, are compared by counting within the categories
+    (_tau_a_categorical). All other pairs are computed by _kendall_merge.
+
+    Args:
+        vectors1 (numpy.ndarray):
+            first set of vectors (2D)
+        vectors2 (numpy.ndarray):
+            second set of vectors (2D)
+        variant (String):
+            'a' for tau-a or 'b' for tau-b
+        max_categories (int):
+            maximal number of distinct values for the counting path
+        paired (bool):
+            compute only tau between the i-th vectors of both sets
+    Returns:
+        numpy.ndarray: tau: n_vectors1 x n_vectors2 or n_vectors if paired
+
+    """
+    if paired:
+        return np.array([
+            _kendall_batch(vectors1[i:i + 1], vectors2[i:i + 1], variant,
+                           max_categories)[0, 0]
+            for i in range(vectors1.shape[0])])
+    return _kendall_ranked(_dense_ranks(vectors1), _dense_ranks(vectors2),
+                           variant, max_categories)
+
+
+def _kendall_ranked(ranked1, ranked2, variant='a', max_categories=5):
+    """computes kendall-tau a or b for all pairs of vectors given as the
+    output of _dense_ranks, see _kendall_batch
+
+    Args:
+        ranked1 (tuple):
+            ranks, perm, ties and run_start of the first set of vectors
+        ranked2 (tuple):
+            ranks, perm, ties and run_start of the second set of vectors
+        variant (String):
+            'a' for tau-a or 'b' for tau-b
+        max_categories (int):
+            maximal number of distinct values for the counting path
+    Returns:
+        numpy.ndarray: tau: n_vectors1 x n_vectors2
+
+    """
+    ranks1, perm1, ties1, run_start1 = ranked1
+    ranks2, perm2, ties2, run_start2 = ranked2
+    tau = np.empty((ranks1.shape[0], ranks2.shape[0]))
+    rows = np.ones(ranks1.shape[0], dtype=bool)
+    cols = np.ones(ranks2.shape[0], dtype=bool)
+    if variant == 'a':
+        rows = np.max(ranks1, axis=1) > max_categories
+        cols = np.max(ranks2, axis=1) > max_categories
+        for i_vec in np.nonzero(~rows)[0]:
+            tau[i_vec] = _tau_a_categorical(
+                ranks1[i_vec], perm2,
+                run_start2 if np.any(ties2 > 0) else None)
+        if np.any(rows):
+            for j_vec in np.nonzero(~cols)[0]:
+                tau[rows, j_vec] = _tau_a_categorical(
+                    ranks2[j_vec], perm1[rows],
+                    run_start1[rows] if np.any(ties1[rows] > 0) else None)
+    if np.any(rows) and np.any(cols):
+        tau[np.ix_(rows, cols)] = _kendall_merge(
+            ranks1[rows], perm1[rows], ties1[rows],
+            ranks2[cols], perm2[cols], ties2[cols], variant)
+    return tau
+
+
+def _kendall_merge(ranks1, perm1, ties1, ranks2, perm2, ties2, variant):
+    """computes kendall-tau a or b for all pairs of dense rank vectors.
+
+    For each vector of the first set its sorting permutation is applied to
+    the ranks of all vectors of the second set at once, such that only ties
+    in the first vector require sorting per pair. The discordant pairs are
+    counted by merge sort as in scipy.stats.kendalltau.
+
+    Args:
+        ranks1, ranks2 (numpy.ndarray):
+            dense ranks as returned by _dense_ranks
+        perm1, perm2 (numpy.ndarray):
+            sorting permutations of the rank vectors
+        ties1, ties2 (numpy.ndarray):
+            number of tied pairs in each rank vector
+        variant (String):
+            'a' for tau-a or 'b' for tau-b
+    Returns:
+        numpy.ndarray: tau: n_vectors1 x n_vectors2
+
+    """
+    transpose = np.any(ties1 > 0) and not np.any(ties2 > 0)
+    if transpose:
+        # the vectors without ties are sorted first, which avoids per pair
+        # sorting. Both variants are symmetric.
+        ranks1, ranks2 = ranks2, ranks1
+        ties1, ties2 = ties2, ties1
+        perm1 = perm2
+    size = ranks1.shape[1]
+    tot = (size * (size - 1)) // 2
+    tau = np.empty((ranks1.shape[0], ranks2.shape[0]))
+    for i_vec, rank1 in enumerate(ranks1):
+        x = rank1[perm1[i_vec]]
+        y = ranks2[:, perm1[i_vec]]
+        if ties1[i_vec] > 0:
+            # sort by y within the ties of x
+            order = np.argsort(x * (size + 1) + y, axis=1, kind='stable')
+            y = np.take_along_axis(y, order, axis=1)
+            ntie = _count_run_ties(
+                (x[1:] != x[:-1]) | (y[:, 1:] != y[:, :-1]))
+        else:
+            ntie = np.zeros(ranks2.shape[0], dtype=np.int64)
+        dis = np.array([_kendall_dis(x, y_i) for y_i in y], dtype=np.int64)
+        con_minus_dis = tot - ties1[i_vec] - ties2 + ntie - 2 * dis
+        if variant == 'b':
+            norm1 = np.sqrt(tot - ties1[i_vec])
+            norm2 = np.sqrt(tot - ties2)
+            if transpose:
+                norm1, norm2 = norm2, norm1
+            with np.errstate(divide='ignore', invalid='ignore'):
+                tau[i_vec] = con_minus_dis / norm1 / norm2
+            tau[i_vec, (ties1[i_vec] == tot) | (ties2 == tot)] = np.nan
+        else:
+            tau[i_vec] = con_minus_dis / tot
+    # Limit range to fix computational errors
+    tau = np.clip(tau, -1., 1.)
+    if transpose:
+        tau = tau.T
+    return tau
+
+
+def _tau_a_categorical(categories, perm, run_start=None):
+    """computes kendall-tau a between a vector with few distinct values
+    and a set of vectors by counting.
+
+    The categories are put into the sorting order of each other vector.
+    An entry j of category c_j is concordant with the L_j entries before it
+    with lower category and discordant with the H_j entries before it with
+    higher category. With n_a(j) the number of entries before j with
+    category <= a, L_j = n_(c_j - 1)(j) and H_j = n_K(j) - n_(c_j)(j), such
+    that K - 1 cumulative sums are sufficient for K categories. Entries
+    tied in the other vector are excluded by taking the counts at the start
+    of their tie block. This takes O(n * n_category) operations per pair
+    instead of a merge sort.
+
+    Args:
+        categories (numpy.ndarray):
+            dense ranks of the vector with few distinct values
+        perm (numpy.ndarray):
+            sorting permutations of the other vectors (2D)
+        run_start (numpy.ndarray):
+            start of the tie block for each sorted entry of the other
+            vectors, as returned by _dense_ranks. None if they have no ties
+    Returns:
+        numpy.ndarray: tau: one value per row of perm
+
+    """
+    size = perm.shape[1]
+    tot = (size * (size - 1)) // 2
+    n_cat = np.max(categories)
+    codes = categories.astype(np.int8)[perm]
+    if run_start is None:
+        n_before = np.arange(size)
+    else:
+        n_before = run_start
+    con_minus_dis = -np.sum(n_before * (codes != n_cat), axis=1,
+                            dtype=np.int64)
+    for category in range(1, n_cat):
+        in_lower = codes <= category
+        n_lower = np.cumsum(in_lower, axis=1, dtype=np.int32)
+        if run_start is None:
+            n_lower = n_lower - in_lower
+        else:
+            # counts before the first entry of the tie block
+            n_lower = np.take_along_axis(n_lower, run_start, axis=1) \
+                - np.take_along_axis(in_lower, run_start, axis=1)
+        con_minus_dis += np.einsum(
+            'ij,ij->i', n_lower,
+            (codes == category) | (codes == category + 1),
+            dtype=np.int64)
+    tau = con_minus_dis / tot
+    return np.clip(tau, -1., 1.)
+
+
+def _dense_ranks(vectors):
+    """ converts each row of vectors into dense ranks starting at 1 as
+    get_dense_ranks and computes the tie information of the sorted rows
+    used by the kendall methods
+
+    Returns:
+        numpy.ndarray: ranks (int)
+        numpy.ndarray: perm: stable sorting permutation of each row
+        numpy.ndarray: ties: number of tied pairs in each row
+        numpy.ndarray: run_start: position in the sorted row at which the
+        tie block of each sorted entry starts
+
+    """
+    ranks, perm, new_value = _get_sorted_dense_ranks(vectors)
+    run_start = _run_start(new_value)
+    ties = np.sum(np.arange(vectors.shape[1]) - run_start, axis=1,
+                  dtype=np.int64)
+    return ranks, perm, ties, run_start
+
+
+def _run_start(new_value):
+    """ finds the start of the run of equal values for each position in
+    each row, where new_value marks the positions at which the value changes
+    """
+    n_row, n_step = new_value.shape
+    idx = np.arange(1, n_step + 1)
+    return np.maximum.accumulate(
+        np.concatenate((np.zeros((n_row, 1), dtype=np.intp),
+                        np.where(new_value, idx, 0)), axis=1), axis=1)
+
+
+def _count_run_ties(new_value):
+    """ counts the pairs within runs of equal values in each row, where
+    new_value marks the positions at which the value changes
+    """
+    n_step = new_value.shape[1]
+    return np.sum(np.arange(n_step + 1) - _run_start(new_value), axis=1,
+                  dtype=np.int64)
+
+
 def _sort_and_rank(vector1, vector2):
     """does the sort and rank step of the _tau calculation"""
     perm = np.argsort(vector2, kind='mergesort')
@@ -439,7 +1057,155 @@ def _get_v(n_cond, sigma_k):
     return v
 
 
-def _parse_input_rdms(rdm1, rdm2):
+_v_cholesky_cache = {}
+_v_sparse_cache = {}
+_V_CHOLESKY_CACHE_BYTES = 2 ** 28
+_V_CHOLESKY_MAX_BYTES = 2 ** 26
+
+
+def _solve_v(vectors, sigma_k):
+    """ computes V^-1 v for each row v of vectors, where V is the rdm
+    covariance for sigma_k
+
+    If the dense Cholesky factor of V takes at most _V_CHOLESKY_MAX_BYTES
+    (n_cond up to about 75), the cached factor is used. For larger V the
+    equations of all vectors are solved at once by conjugate gradients on
+    the cached sparse V, which never forms a dense n_dist x n_dist matrix.
+
+    Args:
+        vectors (numpy.ndarray): RDM vectors (2D) N x n_dist
+        sigma_k (Matrix): covariance between pattern estimates or None
+
+    Returns:
+        numpy.ndarray: N x n_dist solutions
+    """
+    n_cond = _get_n_from_reduced_vectors(vectors)
+    n_dist = vectors.shape[1]
+    if 8 * n_dist * n_dist <= _V_CHOLESKY_MAX_BYTES:
+        chol = _get_v_cholesky(n_cond, sigma_k)
+        return scipy.linalg.cho_solve((chol, True), vectors.T,
+                                      check_finite=False).T
+    v = _get_v_sparse(n_cond, sigma_k)
+    return _cg_multi(v, vectors.T).T
+
+
+def _get_v_cholesky(n_cond, sigma_k):
+    """ lower Cholesky factor of the rdm covariance V for sigma_k
+
+    The factors are cached by n_cond and the content of sigma_k, as the same
+    sigma_k is typically used for many comparisons, e.g. in each loss
+    evaluation while fitting a model. V is factorized densely, because the
+    fill-in of a sparse factorization makes it slower for all but tiny V.
+    The cache holds at most _V_CHOLESKY_CACHE_BYTES, dropping the oldest
+    factors first.
+    """
+    key = _get_v_key(n_cond, sigma_k)
+    if key not in _v_cholesky_cache:
+        v = _get_v(n_cond, sigma_k)
+        chol = scipy.linalg.cholesky(v.toarray(), lower=True,
+                                     check_finite=False)
+        _add_to_v_cache(_v_cholesky_cache, key, chol)
+    return _v_cholesky_cache[key]
+
+
+def _get_v_sparse(n_cond, sigma_k):
+    """ sparse rdm covariance V for sigma_k, cached like _get_v_cholesky
+    """
+    key = _get_v_key(n_cond, sigma_k)
+    if key not in _v_sparse_cache:
+        _add_to_v_cache(_v_sparse_cache, key, _get_v(n_cond, sigma_k))
+    return _v_sparse_cache[key]
+
+
+def _get_v_key(n_cond, sigma_k):
+    """ cache key for V given by n_cond and the content of sigma_k """
+    if scipy.sparse.issparse(sigma_k):
+        sigma_k = sigma_k.toarray()
+    if sigma_k is None:
+        return (n_cond, None)
+    sigma_k = np.asarray(sigma_k, dtype=float)
+    return (n_cond, sigma_k.shape, sigma_k.tobytes())
+
+
+def _add_to_v_cache(cache, key, value):
+    """ adds a dense or sparse matrix to a cache of V or its factors,
+    dropping the oldest entries while the cache would hold more than
+    _V_CHOLESKY_CACHE_BYTES
+    """
+    def _nbytes(matrix):
+        if scipy.sparse.issparse(matrix):
+            return matrix.data.nbytes + matrix.indices.nbytes \
+                + matrix.indptr.nbytes
+        return matrix.nbytes
+    while cache and _nbytes(value) + sum(
+            _nbytes(c) for c in cache.values()) > _V_CHOLESKY_CACHE_BYTES:
+        cache.pop(next(iter(cache)))
+    cache[key] = value
+
+
+def _cg_multi(v, rhs, rtol=1e-5):
+    """ solves v x = b for all columns b of rhs at once by conjugate
+    gradients. Each column takes its own steps and stops once its residual
+    is at most rtol times the norm of b, as in scipy.sparse.linalg.cg with
+    atol=0. Thus, each iteration takes a single product of v with the
+    columns which are not converged yet.
+
+    Args:
+        v (scipy.sparse.spmatrix): symmetric positive definite n x n matrix
+        rhs (numpy.ndarray): n x N right hand sides
+        rtol (float): relative tolerance for the residual norms
+
+    Returns:
+        numpy.ndarray: n x N solutions
+    """
+    x = np.zeros(rhs.shape)
+    r = np.array(rhs, dtype=float)
+    p = r.copy()
+    rr = np.einsum('ij,ij->j', r, r)
+    bound = rtol * rtol * rr
+    active = np.nonzero(rr > bound)[0]
+    for _ in range(10 * rhs.shape[0]):
+        if len(active) == 0:
+            break
+        p_a = p[:, active]
+        vp = v @ p_a
+        alpha = rr[active] / np.einsum('ij,ij->j', p_a, vp)
+        x[:, active] += alpha * p_a
+        r_a = r[:, active] - alpha * vp
+        rr_a = np.einsum('ij,ij->j', r_a, r_a)
+        p[:, active] = r_a + rr_a / rr[active] * p_a
+        r[:, active] = r_a
+        rr[active] = rr_a
+        active = active[rr_a > bound[active]]
+    return x
+
+
+def _get_ranks(rdm):
+    """ rank transforms the RDM vectors with nans kept in place.
+    For RDMs objects the cached ranks are used.
+
+    Args:
+        rdm (pyrsa.rdm.RDMs or numpy.ndarray):
+            RDMs to be rank transformed
+
+    Returns:
+        numpy.ndarray: ranks with one row per RDM
+
+    """
+    if isinstance(rdm, np.ndarray):
+        return dense_to_average_ranks(get_dense_ranks(rdm.reshape(
+            -1, rdm.shape[-1])))
+    return rdm.get_ranks()
+
+
+def _get_vectors(rdm):
+    """ RDM vectors of an RDMs object or array as a 2D array """
+    if isinstance(rdm, np.ndarray):
+        return rdm.reshape(-1, rdm.shape[-1])
+    return rdm.get_vectors()
+
+
+def _parse_input_rdms(rdm1, rdm2, paired=False):
     """Gets the vector representation of input RDMs, raises an error if
     the two RDMs objects have different dimensions
 
@@ -448,6 +1214,8 @@ def _parse_input_rdms(rdm1, rdm2):
             first set of RDMs
         rdm2 (pyrsa.rdm.RDMs):
             second set of RDMs
+        paired (bool):
+            if True, rdm1 and rdm2 must contain equally many RDMs
 
     """
     if not isinstance(rdm1, np.ndarray):
@@ -466,6 +1234,9 @@ def _parse_input_rdms(rdm1, rdm2):
             vector2 = rdm2
     if not vector1.shape[1] == vector2.shape[1]:
         raise ValueError('rdm1 and rdm2 must be RDMs of equal shape')
+    if paired and not vector1.shape[0] == vector2.shape[0]:
+        raise ValueError('paired comparisons require equally many RDMs'
+                         + ' in rdm1 and rdm2')
     vector1_no_nan = vector1[~np.isnan(vector1)].reshape(vector1.shape[0], -1)
     vector2_no_nan = vector2[~np.isnan(vector2)].reshape(vector2.shape[0], -1)
     if not vector1_no_nan.shape[1] == vector2_no_nan.shape[1]:
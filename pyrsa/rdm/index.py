@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index of a library of RDMs for finding the RDMs most similar to a query
+"""
+
+import numpy as np
+from pyrsa.rdm.compare import _get_vectors
+from pyrsa.util.rdm_utils import get_dense_ranks
+from pyrsa.util.rdm_utils import dense_to_average_ranks
+
+
+class RDMIndex:
+    """ RDMIndex class
+
+    Stores a library of RDMs normalized once for a comparison method, such
+    that the similarity to a query is a single inner product per RDM:
+    'cosine' RDMs are scaled to unit norm, 'corr' RDMs are centered and
+    scaled and 'spearman' RDMs are rank transformed, centered and scaled.
+    Queries are answered exactly by blocked matrix products. Optionally,
+    random projection sketches of the library are stored, which allow
+    approximate queries that only compare a set of candidates exactly.
+
+    Args:
+        rdms (pyrsa.rdm.RDMs or numpy.ndarray):
+            library of RDMs, without nan entries
+        method (String):
+            comparison method: 'cosine', 'corr' or 'spearman'
+        filename (String):
+            if given, the normalized library is stored as a memory mapped
+            .npy file at this path
+        n_sketch (int):
+            number of random projections for approximate queries
+            defaults to no sketches
+        seed (int):
+            seed for the random projections
+        block_size (int):
+            number of library RDMs processed at once
+
+    Attributes:
+        vectors(numpy.ndarray): normalized library RDM vectors
+        sketches(numpy.ndarray): random projections of the vectors
+        n_rdm(int): number of library RDMs
+
+    """
+
+    def __init__(self, rdms, method='corr', filename=None, n_sketch=None,
+                 seed=None, block_size=10000):
+        if method not in ['cosine', 'corr', 'spearman']:
+            raise ValueError('RDMIndex supports the methods cosine, corr'
+                             + ' and spearman, not ' + str(method))
+        self.method = method
+        self.block_size = block_size
+        library = _get_vectors(rdms)
+        self.n_rdm, n_dist = library.shape
+        if filename is None:
+            self.vectors = np.empty((self.n_rdm, n_dist))
+        else:
+            self.vectors = np.lib.format.open_memmap(
+                filename, mode='w+', dtype=float, shape=(self.n_rdm, n_dist))
+        for start in range(0, self.n_rdm, block_size):
+            block = slice(start, start + block_size)
+            self.vectors[block] = self._normalize(library[block])
+        if n_sketch is None:
+            self.projection = None
+            self.sketches = None
+        else:
+            rng = np.random.RandomState(seed)
+            self.projection = rng.randn(n_dist, n_sketch) / np.sqrt(n_sketch)
+            self.sketches = np.empty((self.n_rdm, n_sketch))
+            for start in range(0, self.n_rdm, block_size):
+                block = slice(start, start + block_size)
+                self.sketches[block] = self.vectors[block] @ self.projection
+
+    def __len__(self) -> int:
+        """
+        returns number of RDMs in the library
+        """
+        return self.n_rdm
+
+    def query(self, rdm, k=10, approximate=False, n_candidates=None):
+        """ finds the k library RDMs most similar to each query RDM
+
+        Args:
+            rdm (pyrsa.rdm.RDMs or numpy.ndarray):
+                query RDMs, without nan entries
+            k (int):
+                number of library RDMs returned per query
+            approximate (bool):
+                if True, candidates are preselected by the random projection
+                sketches, which must have been computed with n_sketch
+            n_candidates (int):
+                number of candidates compared exactly in approximate
+                queries, defaults to 10 * k
+
+        Returns:
+            numpy.ndarray: indices: n_query x k indices of the most similar
+                library RDMs, most similar first
+            numpy.ndarray: similarities: n_query x k similarities of these
+                RDMs as computed by pyrsa.rdm.compare
+
+        """
+        query = self._normalize(_get_vectors(rdm))
+        if not query.shape[1] == self.vectors.shape[1]:
+            raise ValueError('query RDMs must have the shape of the library')
+        k = min(k, self.n_rdm)
+        if approximate:
+            if self.sketches is None:
+                raise ValueError('approximate queries require an RDMIndex'
+                                 + ' with n_sketch random projections')
+            if n_candidates is None:
+                n_candidates = 10 * k
+            candidates, _ = _top_k_blocked(query @ self.projection,
+                                           self.sketches, n_candidates,
+                                           self.block_size)
+            candidates = np.sort(candidates, axis=1)
+            similarities = np.einsum('ij,ikj->ik', query,
+                                     self.vectors[candidates.ravel()].reshape(
+                                         candidates.shape + (-1,)))
+            order = np.argsort(-similarities, axis=1, kind='stable')[:, :k]
+            indices = np.take_along_axis(candidates, order, axis=1)
+            similarities = np.take_along_axis(similarities, order, axis=1)
+        else:
+            indices, similarities = _top_k_blocked(query, self.vectors, k,
+                                                   self.block_size)
+        return indices, similarities
+
+    def _normalize(self, vectors):
+        """ transforms RDM vectors such that their inner products are the
+        similarities of the comparison method
+        """
+        if np.any(np.isnan(vectors)):
+            raise ValueError('RDMIndex requires RDMs without nan entries')
+        if self.method == 'spearman':
+            vectors = dense_to_average_ranks(get_dense_ranks(vectors))
+        if self.method in ['corr', 'spearman']:
+            vectors = vectors - np.mean(vectors, axis=1, keepdims=True)
+        return vectors / np.sqrt(np.einsum('ij,ij->i', vectors, vectors)
+                                 ).reshape(-1, 1)
+
+
+def _top_k_blocked(query, vectors, k, block_size):
+    """ finds the k rows of vectors with the largest inner products with
+    each query row, processing block_size rows of vectors at a time.
+
+    Returns:
+        numpy.ndarray: indices: n_query x k, largest inner product first
+        numpy.ndarray: values: the corresponding inner products
+
+    """
+    k = min(k, vectors.shape[0])
+    indices = np.empty((query.shape[0], 0), dtype=int)
+    values = np.empty((query.shape[0], 0))
+    for start in range(0, vectors.shape[0], block_size):
+        block_values = query @ vectors[start:start + block_size].T
+        values = np.concatenate((values, block_values), axis=1)
+        indices = np.concatenate((indices, np.broadcast_to(
+            np.arange(start, start + block_values.shape[1]),
+            block_values.shape)), axis=1)
+        if values.shape[1] > k:
+            keep = np.argpartition(-values, k - 1, axis=1)[:, :k]
+            keep = np.sort(keep, axis=1)
+            values = np.take_along_axis(values, keep, axis=1)
+            indices = np.take_along_axis(indices, keep, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    return (np.take_along_axis(indices, order, axis=1),
+            np.take_along_axis(values, order, axis=1))
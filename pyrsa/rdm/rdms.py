@@ -7,14 +7,19 @@ Definition of RSA RDMs class and subclasses
 """
 
 import numpy as np
-from scipy.stats import rankdata
 from pyrsa.util.rdm_utils import batch_to_vectors
 from pyrsa.util.rdm_utils import batch_to_matrices
+from pyrsa.util.rdm_utils import get_dense_ranks
+from pyrsa.util.rdm_utils import dense_to_average_ranks
+from pyrsa.util.rdm_utils import subsample_dense_ranks
+from pyrsa.util.rdm_utils import get_condensed_index
+from pyrsa.util.rdm_utils import apply_condensed_index
 from pyrsa.util.descriptor_utils import format_descriptor
 from pyrsa.util.descriptor_utils import bool_index
 from pyrsa.util.descriptor_utils import subset_descriptor
 from pyrsa.util.descriptor_utils import check_descriptor_length_error
 from pyrsa.util.descriptor_utils import append_descriptor
+from pyrsa.util.descriptor_utils import concat_descriptors
 from pyrsa.util.data_utils import extract_dict
 from collections.abc import Iterable
 from pyrsa.util.file_io import write_dict_hdf5
@@ -119,8 +124,21 @@ class RDMs:
                     descriptors=self.descriptors,
                     rdm_descriptors=rdm_descriptors,
                     pattern_descriptors=self.pattern_descriptors)
+        self._derive_ranks(rdms, rdm_selection=idx.reshape(-1))
         return rdms
 
+    @property
+    def dissimilarities(self):
+        """ the RDMs as a matrix with one vector per RDM.
+        Replacing it or writing into it invalidates the cached ranks.
+        """
+        return self._dissimilarities
+
+    @dissimilarities.setter
+    def dissimilarities(self, dissimilarities):
+        self._dissimilarities = dissimilarities
+        self._clear_ranks()
+
     def __len__(self) -> int:
         """
         The number of RDMs in this stack.
@@ -137,6 +155,68 @@ class RDMs:
         """
         return self.dissimilarities
 
+    def get_ranks(self):
+        """ Returns the RDM vectors transformed to ranks
+
+        Ties get their average rank as in scipy.stats.rankdata and nan
+        entries remain nan. The ranks are computed once and cached together
+        with a copy of the ranked vectors. The cache is used only as long as
+        the dissimilarities equal this copy, which takes a linear time
+        comparison instead of sorting. The ranks are returned read-only.
+        Subsets and subsamples of an RDMs object with cached ranks derive
+        their ranks from this cache without sorting.
+
+        Returns:
+            numpy.ndarray: ranks as a matrix with one row per RDM
+
+        """
+        self._check_ranks()
+        if self._ranks is None:
+            self._ranks = dense_to_average_ranks(self._get_dense_ranks())
+            self._ranks.flags.writeable = False
+        return self._ranks
+
+    def _get_dense_ranks(self):
+        """ dense ranks of the RDM vectors, cached like get_ranks """
+        self._check_ranks()
+        if self._dense_ranks is None:
+            self._ranked_vectors = np.array(self.dissimilarities)
+            self._dense_ranks = get_dense_ranks(self._ranked_vectors)
+            self._dense_ranks.flags.writeable = False
+        return self._dense_ranks
+
+    def _check_ranks(self):
+        """ clears the cached ranks if the dissimilarities were changed in
+        place since they were ranked """
+        if self._dense_ranks is not None and not np.array_equal(
+                self._ranked_vectors, self.dissimilarities, equal_nan=True):
+            self._clear_ranks()
+
+    def _clear_ranks(self):
+        """ clears the cached ranks """
+        self._ranked_vectors = None
+        self._dense_ranks = None
+        self._ranks = None
+
+    def _derive_ranks(self, rdms, rdm_selection=None, pattern_selection=None):
+        """ sets the dense ranks of rdms, which was created by selecting
+        rdms and/or patterns from this object, if this object has cached
+        ranks
+        """
+        self._check_ranks()
+        if self._dense_ranks is None:
+            return
+        dense = self._dense_ranks
+        if rdm_selection is not None:
+            dense = dense[rdm_selection]
+        if pattern_selection is not None:
+            index, valid = get_condensed_index(self.n_cond, pattern_selection)
+            dense = subsample_dense_ranks(dense, index, valid)
+        if dense.shape == rdms.dissimilarities.shape:
+            dense.flags.writeable = False
+            rdms._ranked_vectors = np.array(rdms.dissimilarities)
+            rdms._dense_ranks = dense
+
     def get_matrices(self):
         """ Returns RDMs as np.ndarray with each RDM as a matrix
 
@@ -163,7 +243,8 @@ class RDMs:
         if by is None:
             by = 'index'
         selection = bool_index(self.pattern_descriptors[by], value)
-        dissimilarities = self.get_matrices()[:, selection][:, :, selection]
+        index, _ = get_condensed_index(self.n_cond, np.nonzero(selection)[0])
+        dissimilarities = self.dissimilarities[:, index]
         descriptors = self.descriptors
         pattern_descriptors = extract_dict(
             self.pattern_descriptors, selection)
@@ -174,6 +255,7 @@ class RDMs:
                     rdm_descriptors=rdm_descriptors,
                     pattern_descriptors=pattern_descriptors,
                     dissimilarity_measure=dissimilarity_measure)
+        self._derive_ranks(rdms, pattern_selection=np.nonzero(selection)[0])
         return rdms
 
     def subsample_pattern(self, by, value):
@@ -204,13 +286,12 @@ class RDMs:
                          for i in value]
             selection = np.concatenate(selection)
         else:
-            selection = np.where(self.rdm_descriptors[by] == value)
-        selection = np.sort(selection)
-        dissimilarities = self.get_matrices()
-        for i_rdm in range(self.n_rdm):
-            np.fill_diagonal(dissimilarities[i_rdm], np.nan)
+            selection = np.asarray(
+                self.pattern_descriptors[by] == value).nonzero()[0]
         selection = np.sort(selection)
-        dissimilarities = dissimilarities[:, selection][:, :, selection]
+        index, valid = get_condensed_index(self.n_cond, selection)
+        dissimilarities = apply_condensed_index(
+            self.dissimilarities, index, valid)
         descriptors = self.descriptors
         pattern_descriptors = extract_dict(
             self.pattern_descriptors, selection)
@@ -221,6 +302,7 @@ class RDMs:
                     rdm_descriptors=rdm_descriptors,
                     pattern_descriptors=pattern_descriptors,
                     dissimilarity_measure=dissimilarity_measure)
+        self._derive_ranks(rdms, pattern_selection=selection)
         return rdms
 
     def subset(self, by, value):
@@ -249,6 +331,7 @@ class RDMs:
                     rdm_descriptors=rdm_descriptors,
                     pattern_descriptors=pattern_descriptors,
                     dissimilarity_measure=dissimilarity_measure)
+        self._derive_ranks(rdms, rdm_selection=selection)
         return rdms
 
     def subsample(self, by, value):
@@ -285,6 +368,7 @@ class RDMs:
                     rdm_descriptors=rdm_descriptors,
                     pattern_descriptors=pattern_descriptors,
                     dissimilarity_measure=dissimilarity_measure)
+        self._derive_ranks(rdms, rdm_selection=selection)
         return rdms
 
     def append(self, rdm):
@@ -417,9 +501,7 @@ def load_rdm(filename, file_type=None):
 
 def rank_transform(rdms):
     """ applyes a rank_transform and generates a new RDMs object"""
-    dissimilarities = rdms.get_vectors()
-    dissimilarities = np.array([rankdata(dissimilarities[i])
-                                for i in range(rdms.n_rdm)])
+    dissimilarities = np.array(rdms.get_ranks())
     rdms_new = RDMs(dissimilarities,
                     dissimilarity_measure=rdms.dissimilarity_measure,
                     descriptors=rdms.descriptors,
@@ -444,8 +526,19 @@ def concat(rdms):
     """
     rdm = rdms[0]
     assert isinstance(rdm, RDMs), 'rdms should be a list of RDMs objects'
+    if len(rdms) == 1:
+        return rdm
     for rdm_new in rdms[1:]:
-        rdm.append(rdm_new)
+        assert isinstance(rdm_new, RDMs), 'appended rdm should be an RDMs'
+        assert rdm_new.n_cond == rdm.n_cond, 'appended rdm had wrong shape'
+        assert rdm_new.dissimilarity_measure == rdm.dissimilarity_measure, \
+            'appended rdm had wrong dissimilarity measure'
+    # concatenate all RDMs at once instead of appending them one by one
+    rdm.dissimilarities = np.concatenate(
+        [rdm_new.dissimilarities for rdm_new in rdms], axis=0)
+    rdm.rdm_descriptors = concat_descriptors(
+        [rdm_new.rdm_descriptors for rdm_new in rdms])
+    rdm.n_rdm = rdm.dissimilarities.shape[0]
     return rdm
 
 
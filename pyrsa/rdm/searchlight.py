@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Calculation of searchlight RDMs, i.e. one RDM per local neighbourhood
+of channels
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+from joblib import Parallel, delayed, effective_n_jobs
+from pyrsa.rdm.rdms import RDMs
+from pyrsa.rdm.calc import _parse_input
+from pyrsa.rdm.calc import _calc_fold_averages
+from pyrsa.rdm.calc import _gen_default_cv_descriptor
+from pyrsa.rdm.calc import _calc_gram
+from pyrsa.rdm.calc import _gram_to_rdm
+from pyrsa.data import average_dataset_by
+
+
+def get_searchlight_neighbors(coordinates, radius, centers=None):
+    """ finds the channels within radius around each searchlight center
+
+    Args:
+        coordinates (numpy.ndarray):
+            n_channel x n_dim coordinates of the channels (e.g. voxel indices)
+        radius (float):
+            searchlight radius in the units of the coordinates
+        centers (numpy.ndarray):
+            indices of the channels used as centers
+            defaults to all channels
+
+    Returns:
+        numpy.ndarray: centers: channel index of each searchlight center
+        list: neighbors: channel indices (numpy.ndarray) for each center
+
+    """
+    coordinates = np.asarray(coordinates)
+    if coordinates.ndim == 1:
+        coordinates = coordinates.reshape(-1, 1)
+    if centers is None:
+        centers = np.arange(coordinates.shape[0])
+    else:
+        centers = np.asarray(centers)
+    tree = cKDTree(coordinates)
+    neighbors = tree.query_ball_point(coordinates[centers], radius)
+    neighbors = [np.sort(np.array(n, dtype=int)) for n in neighbors]
+    return centers, neighbors
+
+
+def calc_rdm_searchlight(dataset, neighbors=None, centers=None,
+                         method='euclidean', descriptor=None,
+                         cv_descriptor=None, coordinates=None, radius=None,
+                         prior_lambda=1, prior_weight=0.1,
+                         chunk_size=None, memory_budget=2 ** 30, n_jobs=1):
+    """
+    calculates one RDM per searchlight from an input dataset
+
+    The conditions are averaged only once for the whole dataset. The RDMs
+    are then computed for chunks of searchlights at once, which are
+    distributed over n_jobs worker processes. By default the chunk size is
+    chosen such that the intermediate arrays of all workers stay within
+    memory_budget.
+
+    The neighbourhoods are either given directly as a list of channel index
+    arrays or computed from channel coordinates and a radius using
+    get_searchlight_neighbors.
+
+    Args:
+        dataset (pyrsa.data.dataset.DatasetBase):
+            The dataset the RDMs are computed from
+        neighbors (list of numpy.ndarray):
+            channel indices contained in each searchlight
+        centers (numpy.ndarray):
+            value of the 'center' rdm_descriptor for each searchlight
+            defaults to the searchlight index
+            if coordinates are given: indices of the center channels
+        method (String):
+            a description of the dissimilarity measure
+            supported: 'euclidean', 'correlation', 'poisson', 'crossnobis'
+        descriptor (String):
+            obs_descriptor used to define the rows/columns of the RDM
+        cv_descriptor (String):
+            obs_descriptor which determines the cross-validation folds
+            used only for crossnobis
+        coordinates (numpy.ndarray):
+            n_channel x n_dim channel coordinates, used if no neighbors
+            are passed
+        radius (float):
+            searchlight radius, used if no neighbors are passed
+        chunk_size (int):
+            number of searchlights computed at once
+            defaults to the number fitting into memory_budget
+        memory_budget (int):
+            approximate memory in bytes for the intermediate arrays of all
+            workers, used if no chunk_size is passed
+        n_jobs (int):
+            number of worker processes, -1 uses all cores
+
+    Returns:
+        pyrsa.rdm.rdms.RDMs: RDMs object with one RDM per searchlight
+
+    """
+    if neighbors is None:
+        if coordinates is None or radius is None:
+            raise ValueError('searchlights require either neighbors or'
+                             + ' coordinates and a radius')
+        centers, neighbors = get_searchlight_neighbors(
+            coordinates, radius, centers)
+    elif centers is None:
+        centers = np.arange(len(neighbors))
+    if method in ['euclidean', 'correlation', 'poisson']:
+        measurements, desc, descriptor = _parse_input(dataset, descriptor)
+        if method == 'poisson':
+            measurements = (measurements + prior_lambda * prior_weight) \
+                / (prior_lambda * prior_weight)
+            # the logarithms are taken before the searchlights are padded
+            measurements = np.stack((measurements, np.log(measurements)))
+        else:
+            measurements = measurements[np.newaxis]
+    elif method == 'crossnobis':
+        if descriptor is None:
+            raise ValueError('descriptor must be a string! Crossvalidation'
+                             + 'requires multiple measurements to be grouped')
+        if cv_descriptor is None:
+            cv_desc = _gen_default_cv_descriptor(dataset, descriptor)
+            dataset.obs_descriptors['cv_desc'] = cv_desc
+            cv_descriptor = 'cv_desc'
+        dataset.sort_by(descriptor)
+        cv_folds = np.unique(np.array(dataset.obs_descriptors[cv_descriptor]))
+        measurements = np.concatenate(_calc_fold_averages(
+            dataset, descriptor, cv_descriptor, cv_folds))
+        _, desc, _ = average_dataset_by(dataset, descriptor)
+    else:
+        raise NotImplementedError(
+            f'searchlight RDMs are not implemented for method {method}')
+    if chunk_size is None:
+        chunk_size = _get_chunk_size(
+            measurements.shape[0], measurements.shape[1],
+            max(len(n) for n in neighbors),
+            memory_budget / effective_n_jobs(n_jobs))
+    chunks = [neighbors[i:i + chunk_size]
+              for i in range(0, len(neighbors), chunk_size)]
+    rdms = Parallel(n_jobs=n_jobs)(
+        delayed(_calc_searchlight_chunk)(measurements, chunk, method)
+        for chunk in chunks)
+    rdms = RDMs(dissimilarities=np.concatenate(rdms, axis=0),
+                dissimilarity_measure=method,
+                descriptors=dataset.descriptors,
+                rdm_descriptors={'center': np.asarray(centers)})
+    rdms.pattern_descriptors[descriptor] = desc
+    if method == 'crossnobis':
+        rdms.descriptors['cv_descriptor'] = cv_descriptor
+    return rdms
+
+
+def _calc_searchlight_chunk(measurements, neighbors, method):
+    """ computes the RDMs for a chunk of searchlights at once.
+    The neighbourhoods are padded to equal size with an all-zero channel,
+    which does not contribute to any inner product.
+
+    Args:
+        measurements (numpy.ndarray):
+            n_set x n_cond x n_channel averaged measurements
+            for crossnobis the first half of the sets are training and the
+            second half test averages of the folds, for poisson the second
+            set are the logarithms of the first
+        neighbors (list of numpy.ndarray):
+            channel indices for each searchlight in the chunk
+        method (String):
+            dissimilarity measure
+
+    Returns:
+        numpy.ndarray: rdms: n_searchlight x n_cond * (n_cond - 1) / 2
+
+    """
+    n_set, n_cond, n_channel = measurements.shape
+    sizes = np.array([len(n) for n in neighbors])
+    index = np.full((len(neighbors), np.max(sizes)), n_channel)
+    for i_sl, neighbor in enumerate(neighbors):
+        index[i_sl, :len(neighbor)] = neighbor
+    measurements = np.concatenate(
+        (measurements, np.zeros((n_set, n_cond, 1))), axis=2)
+    # n_set x n_searchlight x n_cond x max_size patterns
+    patterns = np.moveaxis(measurements[:, :, index], 2, 1)
+    if method == 'euclidean':
+        gram = _calc_gram(patterns[0], patterns[0])
+        rdms = _gram_to_rdm(gram) / sizes[:, None]
+    elif method == 'poisson':
+        gram = _calc_gram(patterns[0], patterns[1])
+        rdms = _gram_to_rdm(gram) / sizes[:, None]
+    elif method == 'correlation':
+        mask = (index < n_channel)[:, None, :]
+        patterns = patterns[0]
+        patterns = patterns - mask * (np.sum(patterns, axis=2, keepdims=True)
+                                      / sizes[:, None, None])
+        patterns /= np.sqrt(np.einsum('sik,sik->si', patterns, patterns)
+                            )[:, :, None]
+        i_cond, j_cond = np.triu_indices(n_cond, 1)
+        rdms = 1 - np.einsum('sik,sjk->sij', patterns, patterns)[
+            :, i_cond, j_cond]
+    elif method == 'crossnobis':
+        n_fold = n_set // 2
+        gram = _calc_gram(patterns[:n_fold], patterns[n_fold:])
+        rdms = np.sum(_gram_to_rdm(gram), axis=0)
+    return rdms
+
+
+def _get_chunk_size(n_set, n_cond, max_size, memory_budget):
+    """ number of searchlights computed at once by _calc_searchlight_chunk,
+    such that its intermediates take about memory_budget bytes. Per
+    searchlight the padded patterns are held in a few copies for indexing,
+    centering and normalizing and the inner products of each set in a few
+    n_cond x n_cond arrays for the conversion to dissimilarities.
+    """
+    per_searchlight = 8 * 3 * n_set * n_cond * (max_size + n_cond)
+    return max(int(memory_budget / per_searchlight), 1)
@@ -135,6 +135,29 @@ def append_descriptor(descriptor, desc_new):
     return descriptor
 
 
+def concat_descriptors(descriptors):
+    """
+    concatenates a list of descriptors into the first one, like repeated
+    calls of append_descriptor, but concatenating each key only once
+
+    Args:
+        descriptors(list of dict): the descriptor dictionaries
+
+    Returns:
+        descriptor(dict): the concatenated descriptor
+
+    """
+    descriptor = descriptors[0]
+    for k, v in descriptor.items():
+        for desc_new in descriptors[1:]:
+            assert k in desc_new.keys(), \
+                f'appended descriptors misses key {k}'
+        descriptor[k] = np.concatenate(
+            [v] + [desc_new[k] for desc_new in descriptors[1:]], axis=0)
+    descriptor['index'] = np.arange(len(descriptor['index']))
+    return descriptor
+
+
 def check_descriptor_length_error(descriptor, name, n_element):
     """
     Raises an error if the given descriptor does not have the right length
@@ -5,7 +5,7 @@ Inference module utilities
 """
 
 import numpy as np
-from scipy.stats import rankdata
+from joblib import Parallel, delayed, effective_n_jobs
 from pyrsa.model import Model
 from pyrsa.rdm import RDMs
 from collections.abc import Iterable
@@ -63,6 +63,60 @@ def input_check_model(model, theta=None, fitter=None, N=1):
     return evaluations, theta, fitter
 
 
+def get_sample_rngs(N, seed=None, n_jobs=1):
+    """ generates one independent random number generator per bootstrap
+    sample, such that the samples do not depend on how they are distributed
+    over workers.
+
+    For the default seed=None and n_jobs=1 no generators are created and
+    the samples are drawn from the global numpy random state as before.
+    If only n_jobs is set, the seed is drawn from the global random state,
+    such that np.random.seed still makes the results reproducible.
+
+    Args:
+        N(int): number of samples
+        seed(int or numpy.random.SeedSequence): seed for the streams
+        n_jobs(int): number of workers
+
+    Returns:
+        list: numpy.random.RandomState or None for each sample
+
+    """
+    if seed is None:
+        if n_jobs == 1:
+            return [None] * N
+        seed = np.random.randint(2 ** 32, dtype=np.uint64)
+    seeds = np.random.SeedSequence(seed).spawn(N)
+    return [np.random.RandomState(np.random.MT19937(s)) for s in seeds]
+
+
+def run_samples(function, rngs, n_jobs=1, **kwargs):
+    """ runs function on the bootstrap samples given by their random number
+    generators. The samples are split into one contiguous chunk per worker
+    and the chunks are evaluated in parallel using joblib.
+
+    function is called as function(rngs_chunk, progress, **kwargs), where
+    progress indicates whether a progress bar should be shown, which is only
+    done for a single chunk.
+
+    Args:
+        function(callable): function evaluating a chunk of samples
+        rngs(list): random number generators, one per sample
+        n_jobs(int): number of worker processes, -1 uses all cores
+
+    Returns:
+        list: results for each chunk in the order of the samples
+
+    """
+    n_chunks = min(effective_n_jobs(n_jobs), len(rngs))
+    if n_chunks <= 1:
+        return [function(rngs, True, **kwargs)]
+    chunks = np.array_split(np.arange(len(rngs)), n_chunks)
+    return Parallel(n_jobs=n_jobs)(
+        delayed(function)([rngs[i] for i in chunk], False, **kwargs)
+        for chunk in chunks)
+
+
 def pool_rdm(rdms, method='cosine', sigma_k=None):
     """pools multiple RDMs into the one with maximal performance under a given
     evaluation metric
@@ -101,18 +155,18 @@ def pool_rdm(rdms, method='cosine', sigma_k=None):
         rdm_vec = _nan_mean(rdm_vec)
         rdm_vec = rdm_vec - np.nanmin(rdm_vec)
     elif method == 'spearman' or method == 'rho-a':
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
+        rdm_vec = rdms.get_ranks()
         rdm_vec = _nan_mean(rdm_vec)
     elif method == 'rho-a':
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
+        rdm_vec = rdms.get_ranks()
         rdm_vec = _nan_mean(rdm_vec)
     elif method == 'kendall' or method == 'tau-b':
         Warning('Noise ceiling for tau based on averaged ranks!')
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
+        rdm_vec = rdms.get_ranks()
         rdm_vec = _nan_mean(rdm_vec)
     elif method == 'tau-a':
         Warning('Noise ceiling for tau based on averaged ranks!')
-        rdm_vec = np.array([_nan_rank_data(v) for v in rdm_vec])
+        rdm_vec = rdms.get_ranks()
         rdm_vec = _nan_mean(rdm_vec)
     else:
         raise ValueError('Unknown RDM comparison method requested!')
@@ -141,23 +195,6 @@ def _nan_mean(rdm_vector):
     return rdm_mean
 
 
-def _nan_rank_data(rdm_vector):
-    """ rank_data for vectors with nan entries
-
-    Args:
-        rdm_vector(numpy.ndarray): the vector to be rank_transformed
-
-    Returns:
-        ranks(numpy.ndarray): the ranks with nans where the original vector
-            had nans
-
-    """
-    ranks_no_nan = rankdata(rdm_vector[~np.isnan(rdm_vector)])
-    ranks = np.ones_like(rdm_vector) * np.nan
-    ranks[~np.isnan(rdm_vector)] = ranks_no_nan
-    return ranks
-
-
 def pair_tests(evaluations):
     """pairwise bootstrapping significance tests for a difference in model
     performance.
@@ -6,14 +6,14 @@
 """
 
 import numpy as np
-from scipy.spatial.distance import squareform
 
 
-def batch_to_vectors(x):
+def batch_to_vectors(x, out=None):
     """converts a *stack* of RDMs in vector or matrix form into vector form
 
     Args:
         x: stack of RDMs
+        out: optional preallocated array for the vectors
 
     Returns:
         tuple: **v** (np.ndarray): 2D, vector form of the stack of RDMs
@@ -27,24 +27,33 @@ def batch_to_vectors(x):
         n_rdm = x.shape[0]
         n_cond = _get_n_from_reduced_vectors(x)
     elif x.ndim == 3:
-        m = x
         n_rdm = x.shape[0]
         n_cond = x.shape[1]
-        v = np.ndarray((n_rdm, int(n_cond * (n_cond - 1) / 2)))
-        for idx in np.arange(n_rdm):
-            v[idx, :] = squareform(m[idx, :, :], checks=False)
+        i_cond, j_cond = _get_triu_indices(n_cond)
+        if out is None:
+            v = np.ndarray((n_rdm, len(i_cond)))
+        else:
+            v = out
+        # gather the upper triangles of all RDMs at once
+        _take_columns(x.reshape(n_rdm, n_cond * n_cond),
+                      i_cond * n_cond + j_cond, v)
+        return v, n_rdm, n_cond
     elif x.ndim == 1:
         v = np.array([x])
         n_rdm = 1
         n_cond = _get_n_from_reduced_vectors(v)
+    if out is not None:
+        out[...] = v
+        v = out
     return v, n_rdm, n_cond
 
 
-def batch_to_matrices(x):
+def batch_to_matrices(x, out=None):
     """converts a *stack* of RDMs in vector or matrix form into matrix form
 
     Args:
         **x**: stack of RDMs
+        **out**: optional preallocated array for the matrices
 
     Returns:
         tuple: **v** (np.ndarray): 3D, matrix form of the stack of RDMs
@@ -57,16 +66,74 @@ def batch_to_matrices(x):
         v = x
         n_rdm = x.shape[0]
         n_cond = _get_n_from_reduced_vectors(x)
-        m = np.ndarray((n_rdm, n_cond, n_cond))
-        for idx in np.arange(n_rdm):
-            m[idx, :, :] = squareform(v[idx, :])
+        if out is None:
+            m = np.ndarray((n_rdm, n_cond, n_cond))
+        else:
+            m = out
+        # gather all matrix entries from the vectors with a zero prepended
+        # for the diagonal
+        v_padded = np.ndarray((n_rdm, v.shape[1] + 1))
+        v_padded[:, 0] = 0
+        v_padded[:, 1:] = v
+        _take_columns(v_padded, _get_square_index(n_cond), m)
     elif x.ndim == 3:
         m = x
         n_rdm = x.shape[0]
         n_cond = x.shape[1]
+        if out is not None:
+            out[...] = m
+            m = out
     return m, n_rdm, n_cond
 
 
+def _take_columns(x, index, out):
+    """ writes the columns index of the 2D array x into out, which may
+    have more dimensions
+    """
+    if out.dtype == x.dtype and out.flags.c_contiguous:
+        np.take(x, index, axis=1, out=out.reshape(x.shape[0], -1),
+                mode='clip')
+    else:
+        out[...] = np.take(x, index, axis=1).reshape(out.shape)
+
+
+_triu_indices_cache = {}
+_TRIU_INDICES_CACHE_SIZE = 32
+
+
+def _get_triu_indices(n_cond):
+    """ row and column indices of the upper triangle of an n_cond x n_cond
+    matrix in the order of the RDM vectors, cached per n_cond and
+    returned read-only
+    """
+    return _get_index_arrays(n_cond)[:2]
+
+
+def _get_square_index(n_cond):
+    """ position of each entry of an n_cond x n_cond matrix in an RDM
+    vector with a zero prepended for the diagonal entries, cached per n_cond
+    """
+    return _get_index_arrays(n_cond)[2]
+
+
+def _get_index_arrays(n_cond):
+    """ computes and caches the index arrays for _get_triu_indices and
+    _get_square_index
+    """
+    if n_cond not in _triu_indices_cache:
+        if len(_triu_indices_cache) >= _TRIU_INDICES_CACHE_SIZE:
+            _triu_indices_cache.pop(next(iter(_triu_indices_cache)))
+        i_cond, j_cond = np.triu_indices(n_cond, 1)
+        square_index = np.zeros((n_cond, n_cond), dtype=np.intp)
+        square_index[i_cond, j_cond] = np.arange(1, len(i_cond) + 1)
+        square_index[j_cond, i_cond] = square_index[i_cond, j_cond]
+        square_index = square_index.ravel()
+        for array in (i_cond, j_cond, square_index):
+            array.flags.writeable = False
+        _triu_indices_cache[n_cond] = (i_cond, j_cond, square_index)
+    return _triu_indices_cache[n_cond]
+
+
 def _get_n_from_reduced_vectors(x):
     """
     calculates the size of the RDM from the vector representation
@@ -78,7 +145,96 @@ def _get_n_from_reduced_vectors(x):
         int: n: size of the RDM
 
     """
-    return int(np.ceil(np.sqrt(x.shape[1] * 2)))
+    n = int(np.ceil(np.sqrt(x.shape[1] * 2)))
+    # an empty vector is the RDM of a single condition
+    return max(n, 1)
+
+
+def get_subsample_selection(descriptor, value):
+    """
+    finds the positions of each entry of value in descriptor, i.e. the
+    concatenation of np.nonzero(descriptor == v) for v in value.
+    Repeated values are selected repeatedly.
+
+    Args:
+        descriptor(numpy.ndarray): descriptor vector
+        value(numpy.ndarray): values to be selected
+
+    Returns:
+        numpy.ndarray: selection: index vector
+
+    """
+    descriptor = np.asarray(descriptor)
+    order = np.argsort(descriptor, kind='stable')
+    descriptor_sorted = descriptor[order]
+    value = np.asarray(value)
+    start = np.searchsorted(descriptor_sorted, value, side='left')
+    n_match = np.searchsorted(descriptor_sorted, value, side='right') - start
+    offset = np.arange(np.sum(n_match)) \
+        - np.repeat(np.cumsum(n_match) - n_match, n_match)
+    selection = order[np.repeat(start, n_match) + offset]
+    return selection
+
+
+_condensed_index_cache = {}
+_CONDENSED_INDEX_CACHE_SIZE = 32
+
+
+def get_condensed_index(n_cond, selection):
+    """
+    computes where the entries of the RDM vector for a (sub)sampled set of
+    patterns are located in the RDM vector of all n_cond patterns.
+
+    Args:
+        n_cond(int): number of patterns in the original RDM
+        selection(numpy.ndarray): selected pattern indices, may contain
+            repetitions
+
+    Returns:
+        numpy.ndarray: index: position in the original RDM vector for each
+            entry of the subsampled RDM vector
+        numpy.ndarray: valid: False where an entry compares a pattern to
+            itself, i.e. where the subsampled RDM has no defined value
+
+    The index maps are cached per n_cond and selection and are returned
+    read-only.
+
+    """
+    selection = np.asarray(selection, dtype=int)
+    key = (n_cond, selection.tobytes())
+    if key in _condensed_index_cache:
+        return _condensed_index_cache[key]
+    i_sel, j_sel = _get_triu_indices(len(selection))
+    low = np.minimum(selection[i_sel], selection[j_sel])
+    high = np.maximum(selection[i_sel], selection[j_sel])
+    valid = low != high
+    index = n_cond * low - (low * (low + 1)) // 2 + high - low - 1
+    index[~valid] = 0
+    index.flags.writeable = False
+    valid.flags.writeable = False
+    if len(_condensed_index_cache) >= _CONDENSED_INDEX_CACHE_SIZE:
+        _condensed_index_cache.pop(next(iter(_condensed_index_cache)))
+    _condensed_index_cache[key] = (index, valid)
+    return index, valid
+
+
+def apply_condensed_index(vectors, index, valid):
+    """
+    extracts subsampled RDM vectors using an index map from
+    get_condensed_index. Undefined entries are set to nan.
+
+    Args:
+        vectors(numpy.ndarray): n_rdm x n_cond * (n_cond - 1) / 2
+        index(numpy.ndarray): index map
+        valid(numpy.ndarray): valid entries
+
+    Returns:
+        numpy.ndarray: subsampled RDM vectors, as float to hold the nans
+
+    """
+    vectors = vectors[:, index].astype(float)
+    vectors[:, ~valid] = np.nan
+    return vectors
 
 
 def add_pattern_index(rdms, pattern_descriptor):
@@ -96,3 +252,94 @@ def add_pattern_index(rdms, pattern_descriptor):
     pattern_select = rdms.pattern_descriptors[pattern_descriptor]
     pattern_select = np.unique(pattern_select)
     return pattern_descriptor, pattern_select
+
+
+def get_dense_ranks(vectors):
+    """
+    converts each RDM vector into dense ranks, i.e. tied values share a rank
+    and the ranks 1, 2, ... have no gaps. nan entries get rank 0.
+
+    Args:
+        vectors(numpy.ndarray): n_rdm x n_dissimilarities
+
+    Returns:
+        numpy.ndarray: dense ranks (int)
+
+    """
+    return _get_sorted_dense_ranks(vectors)[0]
+
+
+def _get_sorted_dense_ranks(vectors):
+    """
+    computes the dense ranks like get_dense_ranks and additionally returns
+    the sorting of each RDM vector used to compute them
+
+    Args:
+        vectors(numpy.ndarray): n_rdm x n_dissimilarities
+
+    Returns:
+        numpy.ndarray: dense ranks (int)
+        numpy.ndarray: perm: stable sorting permutation of each vector
+        numpy.ndarray: new_value: n_rdm x n_dissimilarities - 1, True where
+        the sorted vector changes its value
+
+    """
+    perm = np.argsort(vectors, axis=1, kind='stable')
+    sorted_vectors = np.take_along_axis(vectors, perm, axis=1)
+    new_value = sorted_vectors[:, 1:] != sorted_vectors[:, :-1]
+    sorted_ranks = np.concatenate(
+        (np.ones((vectors.shape[0], 1), dtype=int), new_value),
+        axis=1).cumsum(axis=1)
+    dense = np.empty_like(sorted_ranks)
+    np.put_along_axis(dense, perm, sorted_ranks, axis=1)
+    dense[np.isnan(vectors)] = 0
+    return dense, perm, new_value
+
+
+def dense_to_average_ranks(dense):
+    """
+    converts dense ranks into the ranks computed by scipy.stats.rankdata,
+    i.e. tied values get the average of the ranks they occupy.
+    Entries with dense rank 0 are set to nan.
+
+    Args:
+        dense(numpy.ndarray): dense ranks from get_dense_ranks
+
+    Returns:
+        numpy.ndarray: ranks
+
+    """
+    n_rdm = dense.shape[0]
+    n_bin = np.max(dense, initial=0) + 1
+    offset = np.arange(n_rdm).reshape(-1, 1) * n_bin
+    counts = np.bincount((dense + offset).ravel(), minlength=n_rdm * n_bin)
+    counts = counts.reshape(n_rdm, n_bin)
+    counts[:, 0] = 0
+    rank_values = np.cumsum(counts, axis=1) - counts + (counts + 1) / 2
+    ranks = np.take_along_axis(rank_values, dense, axis=1)
+    ranks[dense == 0] = np.nan
+    return ranks
+
+
+def subsample_dense_ranks(dense, index, valid):
+    """
+    derives the dense ranks of subsampled RDM vectors from the dense ranks
+    of the original vectors without sorting, using an index map from
+    get_condensed_index.
+
+    Args:
+        dense(numpy.ndarray): dense ranks of the original RDM vectors
+        index(numpy.ndarray): index map
+        valid(numpy.ndarray): valid entries
+
+    Returns:
+        numpy.ndarray: dense ranks of the subsampled RDM vectors
+
+    """
+    dense = dense[:, index]
+    dense[:, ~valid] = 0
+    present = np.zeros((dense.shape[0], np.max(dense, initial=0) + 1),
+                       dtype=bool)
+    present[np.arange(dense.shape[0]).reshape(-1, 1), dense] = True
+    present[:, 0] = False
+    return np.take_along_axis(np.cumsum(present, axis=1), dense, axis=1)
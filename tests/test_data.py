@@ -353,6 +353,30 @@ class TestDataComputations(unittest.TestCase):
         self.assertEqual(descriptor[-1], 5)
         assert(np.all(self.test_data.measurements[-1] == avg[-1]))
 
+    def test_average_by_equal_split(self):
+        self.test_data.obs_descriptors['conds'] = np.array(
+            [3, 0, 1, 3, 2, 0, 2, 1, 3, 5])
+        avg, descriptor, n_obs = rsd.average_dataset_by(
+            self.test_data, 'conds')
+        datasets = self.test_data.split_obs('conds')
+        for i, data in enumerate(datasets):
+            self.assertEqual(descriptor[i], data.obs_descriptors['conds'][0])
+            self.assertEqual(n_obs[i], data.n_obs)
+            np.testing.assert_allclose(avg[i], rsd.average_dataset(data))
+
+    def test_grouped_sums(self):
+        from pyrsa.data import group_index, grouped_sums
+        values, group_idx = group_index(['b', 'a', 'b', 'c'])
+        assert np.all(values == ['b', 'a', 'c'])
+        assert np.all(group_idx == [0, 1, 0, 2])
+        measurements = np.random.rand(4, 3, 2)
+        sums, counts, sums_squares = grouped_sums(
+            measurements, group_idx, 3, squares=True)
+        assert np.all(counts == [2, 1, 1])
+        np.testing.assert_allclose(sums[0], measurements[0] + measurements[2])
+        np.testing.assert_allclose(sums_squares[0],
+                                   measurements[0] ** 2 + measurements[2] ** 2)
+
 
 class TestNoiseComputations(unittest.TestCase):
     def setUp(self):
@@ -374,6 +398,18 @@ class TestNoiseComputations(unittest.TestCase):
         from pyrsa.data import cov_from_residuals
         cov = cov_from_residuals(self.res_list)
 
+    def test_cov_equal_outer_products(self):
+        from pyrsa.data import cov_from_residuals
+        cov = cov_from_residuals(self.residuals)
+        xt_x = np.einsum('ij, ik-> ijk', self.residuals, self.residuals)
+        s = np.mean(xt_x, axis=0)
+        m = np.trace(s) / s.shape[0]
+        d2 = np.sum((s - m * np.eye(s.shape[0])) ** 2)
+        b2 = min(d2, np.sum((xt_x - s) ** 2) / xt_x.shape[0] ** 2)
+        s_shrink = b2 / d2 * m * np.eye(s.shape[0]) + (d2 - b2) / d2 * s
+        s_shrink = s_shrink * 100 / 99
+        np.testing.assert_allclose(cov, s_shrink)
+
     def test_prec(self):
         from pyrsa.data import prec_from_residuals
         cov = prec_from_residuals(self.residuals)
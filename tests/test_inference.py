@@ -112,6 +112,15 @@ class TestEvaluation(unittest.TestCase):
         m = ModelFixed('test', rdms.get_vectors()[0])
         value = eval_bootstrap_pattern(m, rdms, N=10)
 
+    def test_eval_bootstrap_pattern_integer_model(self):
+        from pyrsa.inference import eval_bootstrap_pattern
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 28))  # 11 8x8 rdms
+        m = ModelFixed('test', RDMs(np.random.randint(0, 3, (1, 28))))
+        value = eval_bootstrap_pattern(m, rdms, N=10)
+        self.assertFalse(np.all(np.isnan(value.evaluations)))
+
     def test_eval_bootstrap_rdm(self):
         from pyrsa.inference import eval_bootstrap_rdm
         from pyrsa.rdm import RDMs
@@ -192,6 +201,133 @@ class TestEvaluationLists(unittest.TestCase):
         m2 = ModelFixed('test2', rdms.get_vectors()[1])
         value = eval_bootstrap_rdm([m, m2], rdms, N=10)
 
+    def test_eval_bootstrap_equal_samples(self):
+        from pyrsa.inference import eval_bootstrap
+        from pyrsa.inference import bootstrap_sample
+        from pyrsa.rdm import RDMs
+        from pyrsa.rdm import compare
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 45),  # 11 10x10 rdms
+                    rdm_descriptors={'subj': np.repeat(np.arange(4), 3)[1:]})
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        m2 = ModelFixed('test2', rdms.get_vectors()[1])
+        np.random.seed(0)
+        result = eval_bootstrap([m, m2], rdms, N=10, rdm_descriptor='subj',
+                                boot_noise_ceil=False)
+        np.random.seed(0)
+        for i in range(10):
+            sample, _, pattern_idx = bootstrap_sample(
+                rdms, rdm_descriptor='subj')
+            if len(np.unique(pattern_idx)) < 3:
+                assert np.all(np.isnan(result.evaluations[i]))
+                continue
+            for j, mod in enumerate([m, m2]):
+                pred = mod.predict_rdm().subsample_pattern('index',
+                                                           pattern_idx)
+                np.testing.assert_allclose(
+                    result.evaluations[i, j],
+                    np.mean(compare(pred, sample, 'cosine')))
+
+    def test_crossval_fixed_equal_models(self):
+        from pyrsa.inference import crossval, eval_fixed, sets_k_fold
+        from pyrsa.rdm import RDMs
+        from pyrsa.rdm import compare
+        from pyrsa.model import ModelFixed, ModelWeighted
+        rdms = RDMs(np.random.rand(11, 45))  # 11 10x10 rdms
+        models = [ModelFixed('test', rdms.get_vectors()[0]),
+                  ModelWeighted('test2', rdms.get_vectors()[1:3]),
+                  ModelFixed('test3', rdms.get_vectors()[3])]
+        train_set, test_set, _ = sets_k_fold(
+            rdms, k_pattern=2, k_rdm=2, random=False,
+            pattern_descriptor='index', rdm_descriptor='index')
+        result = crossval(models, rdms, train_set, test_set, method='corr')
+        for i, (train, test) in enumerate(zip(train_set, test_set)):
+            for j, mod in enumerate(models):
+                theta = mod.default_fitter(
+                    mod, train[0], method='corr', pattern_idx=train[1],
+                    pattern_descriptor='index')
+                pred = mod.predict_rdm(theta).subsample_pattern(
+                    'index', test[1])
+                np.testing.assert_allclose(
+                    result.evaluations[0, j, i],
+                    np.mean(compare(pred, test[0], 'corr')))
+        result = eval_fixed(models, rdms, theta=[None, [0, 1], None])
+        for j, mod in enumerate(models):
+            np.testing.assert_allclose(
+                result.evaluations[0, j],
+                np.mean(compare(mod.predict_rdm([0, 1]), rdms)))
+
+    def test_eval_bootstrap_n_jobs(self):
+        from pyrsa.inference import eval_bootstrap
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 10))  # 11 5x5 rdms
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        m2 = ModelFixed('test2', rdms.get_vectors()[1])
+        result = eval_bootstrap([m, m2], rdms, N=10, seed=2)
+        result_par = eval_bootstrap([m, m2], rdms, N=10, seed=2, n_jobs=2)
+        np.testing.assert_array_equal(result.evaluations,
+                                      result_par.evaluations)
+        np.testing.assert_array_equal(result.noise_ceiling,
+                                      result_par.noise_ceiling)
+
+    def test_bootstrap_testset_n_jobs(self):
+        from pyrsa.inference import bootstrap_testset
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelFixed
+        rdms = RDMs(np.random.rand(11, 10))  # 11 5x5 rdms
+        m = ModelFixed('test', rdms.get_vectors()[0])
+        m2 = ModelFixed('test2', rdms.get_vectors()[1])
+        evaluations, n_rdm, n_pattern = bootstrap_testset(
+            [m, m2], rdms, method='cosine', fitter=None, N=5, seed=1)
+        evaluations_par, n_rdm_par, n_pattern_par = bootstrap_testset(
+            [m, m2], rdms, method='cosine', fitter=None, N=5, seed=1,
+            n_jobs=2)
+        np.testing.assert_array_equal(evaluations, evaluations_par)
+        np.testing.assert_array_equal(n_rdm, n_rdm_par)
+        np.testing.assert_array_equal(n_pattern, n_pattern_par)
+
+    def test_bootstrap_crossval_seed_fitter_rng(self):
+        from pyrsa.inference import bootstrap_crossval
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelWeighted, fit_optimize, fit_mock
+        rdms = RDMs(np.random.rand(11, 190))  # 11 20x20 rdms
+        m = ModelWeighted('test', rdms.get_vectors()[:3])
+        state = np.random.get_state()
+        result = bootstrap_crossval(m, rdms, fitter=fit_optimize, N=3,
+                                    k_pattern=2, k_rdm=2, seed=3)
+        np.testing.assert_array_equal(np.random.get_state()[1], state[1])
+        result_2 = bootstrap_crossval(m, rdms, fitter=fit_optimize, N=3,
+                                      k_pattern=2, k_rdm=2, seed=3)
+        np.testing.assert_array_equal(result.evaluations,
+                                      result_2.evaluations)
+
+        def fitter_no_rng(model, data, method='cosine', pattern_idx=None,
+                          pattern_descriptor=None):
+            return fit_mock(model, data, method=method,
+                            pattern_idx=pattern_idx,
+                            pattern_descriptor=pattern_descriptor)
+        bootstrap_crossval(m, rdms, fitter=fitter_no_rng, N=2,
+                           k_pattern=2, k_rdm=2, seed=3)
+
+    def test_bootstrap_crossval_seed_default_fitter(self):
+        from pyrsa.inference import bootstrap_crossval
+        from pyrsa.rdm import RDMs
+        from pyrsa.model import ModelWeighted
+        rdms = RDMs(np.random.rand(11, 190))  # 11 20x20 rdms
+        m = ModelWeighted('test', rdms.get_vectors()[:3])
+        result = bootstrap_crossval(m, rdms, method='spearman', N=3,
+                                    k_pattern=2, k_rdm=2, seed=7)
+        result_2 = bootstrap_crossval(m, rdms, method='spearman', N=3,
+                                      k_pattern=2, k_rdm=2, seed=7)
+        result_par = bootstrap_crossval(m, rdms, method='spearman', N=3,
+                                        k_pattern=2, k_rdm=2, seed=7,
+                                        n_jobs=2)
+        np.testing.assert_array_equal(result.evaluations,
+                                      result_2.evaluations)
+        np.testing.assert_array_equal(result.evaluations,
+                                      result_par.evaluations)
+
     def test_bootstrap_testset(self):
         from pyrsa.inference import bootstrap_testset
         from pyrsa.rdm import RDMs
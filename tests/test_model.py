@@ -76,6 +76,29 @@ class TestModelSelect(unittest.TestCase):
         theta = m.fit(train)
         assert theta == 1
 
+    def test_fit_select_pattern_idx(self):
+        from pyrsa.rdm import RDMs, compare
+        rdm = np.random.rand(20, 15)
+        pattern_descriptors = {'index': np.arange(6)}
+        rdm_obj = RDMs(rdm, pattern_descriptors=pattern_descriptors)
+        m = model.ModelSelect('Test Model', rdm_obj)
+        pattern_idx = np.array([0, 1, 1, 3, 5])
+        data = RDMs(rdm[7] + 0.1 * np.random.rand(3, 15),
+                    pattern_descriptors=pattern_descriptors)
+        data = data.subsample_pattern('index', pattern_idx)
+        for method in ['cosine', 'spearman', 'kendall']:
+            theta = model.fit_select(m, data, method=method,
+                                     pattern_idx=pattern_idx,
+                                     pattern_descriptor='index')
+            evaluations = [np.mean(compare(
+                m.predict_rdm(i_rdm).subsample_pattern('index', pattern_idx),
+                data, method=method)) for i_rdm in range(20)]
+            self.assertEqual(theta, np.argmax(evaluations))
+        rdm[np.arange(20), np.arange(20) % 15] = np.nan
+        m = model.ModelSelect('Test Model', rdm)
+        data = RDMs(rdm[7] + 0.1 * np.random.rand(3, 15))
+        self.assertEqual(model.fit_select(m, data), 7)
+
 
 class TestModelWeighted(unittest.TestCase):
     """ Tests for the fixed model class
@@ -113,6 +136,66 @@ class TestModelWeighted(unittest.TestCase):
         train = rdm_obj.subset('ind', 2)
         theta = m.fit(train)
 
+    def test_fit_regress_nn(self):
+        from pyrsa.rdm import RDMs
+        from pyrsa.model.fitter import fit_regress_nn, _loss
+        rdm = np.random.rand(5, 15)
+        pattern_descriptors = {'index': np.arange(6)}
+        rdm_obj = RDMs(rdm, pattern_descriptors=pattern_descriptors)
+        m = model.ModelWeighted('Test Model', rdm_obj)
+        data = RDMs(2 * rdm[1] + rdm[3] + 0.2 * np.random.rand(3, 15),
+                    pattern_descriptors=pattern_descriptors)
+        pattern_idx = np.array([0, 1, 1, 3, 5])
+        data_sample = data.subsample_pattern('index', pattern_idx)
+        for method in ['cosine', 'corr', 'cosine_cov', 'corr_cov']:
+            theta = fit_regress_nn(m, data, method=method)
+            assert np.all(theta >= 0)
+            loss = _loss(theta, m, data, method=method)
+            for _ in range(20):
+                theta_rand = np.random.rand(5)
+                assert loss <= _loss(theta_rand, m, data, method=method)
+        theta = fit_regress_nn(m, data_sample, method='corr',
+                               pattern_idx=pattern_idx,
+                               pattern_descriptor='index')
+        loss = _loss(theta, m, data_sample, method='corr',
+                     pattern_idx=pattern_idx, pattern_descriptor='index')
+        for _ in range(20):
+            theta_rand = np.random.rand(5)
+            assert loss <= _loss(theta_rand, m, data_sample, method='corr',
+                                 pattern_idx=pattern_idx,
+                                 pattern_descriptor='index')
+        theta = fit_regress_nn(
+            m, RDMs(rdm[2], pattern_descriptors=pattern_descriptors))
+        np.testing.assert_array_almost_equal(theta / theta[2],
+                                             [0, 0, 1, 0, 0])
+
+    def test_fit_optimize_gradient(self):
+        from pyrsa.rdm import RDMs
+        from pyrsa.model.fitter import _loss, _loss_gradient
+        rdm = np.random.rand(5, 15)
+        pattern_descriptors = {'index': np.arange(6)}
+        rdm_obj = RDMs(rdm, pattern_descriptors=pattern_descriptors)
+        m = model.ModelWeighted('Test Model', rdm_obj)
+        pattern_idx = np.array([0, 1, 1, 3, 5])
+        data = RDMs(np.random.rand(3, 15),
+                    pattern_descriptors=pattern_descriptors)
+        data = data.subsample_pattern('index', pattern_idx)
+        theta = np.random.rand(5)
+        kwargs = {'method': 'corr', 'pattern_idx': pattern_idx,
+                  'pattern_descriptor': 'index'}
+        loss, gradient = _loss_gradient(theta, m, data, **kwargs)
+        self.assertAlmostEqual(loss, _loss(theta, m, data, **kwargs))
+        eps = 1e-6
+        for i_param in range(5):
+            step = np.zeros(5)
+            step[i_param] = eps
+            self.assertAlmostEqual(
+                gradient[i_param],
+                (_loss(theta + step, m, data, **kwargs)
+                 - _loss(theta - step, m, data, **kwargs)) / (2 * eps))
+        theta = model.fit_optimize(m, data, **kwargs)
+        assert _loss(theta, m, data, **kwargs) <= loss
+
 
 class TestModelInterpolate(unittest.TestCase):
     """ Tests for the fixed model class
@@ -150,3 +233,43 @@ class TestModelInterpolate(unittest.TestCase):
         train = rdm_obj.subset('ind', 2)
         theta = m.fit(train)
         pre = m.predict(theta)
+
+    def test_fit_pairs(self):
+        import scipy.optimize as opt
+        from pyrsa.rdm import RDMs
+        from pyrsa.model.fitter import _loss
+        rdm = np.cumsum(np.random.rand(8, 15), axis=0)
+        pattern_descriptors = {'index': np.arange(6)}
+        rdm_obj = RDMs(rdm, pattern_descriptors=pattern_descriptors)
+        m = model.ModelInterpolate('Test Model', rdm_obj)
+        pattern_idx = np.array([0, 1, 1, 3, 5])
+        data = RDMs(0.3 * rdm[4] + 0.7 * rdm[5]
+                    + 0.5 * np.random.rand(3, 15),
+                    pattern_descriptors=pattern_descriptors)
+        data = data.subsample_pattern('index', pattern_idx)
+        kwargs = {'method': 'corr', 'pattern_idx': pattern_idx,
+                  'pattern_descriptor': 'index'}
+        theta = model.fit_interpolate(m, data, **kwargs)
+        self.assertAlmostEqual(np.sum(theta), 1)
+        assert np.all(theta >= 0)
+        assert np.count_nonzero(theta) <= 2
+        loss = _loss(theta, m, data, **kwargs)
+        for i_pair in range(7):
+            def loss_pair(w):
+                theta_pair = np.zeros(8)
+                theta_pair[i_pair] = w
+                theta_pair[i_pair + 1] = 1 - w
+                return _loss(theta_pair, m, data, **kwargs)
+            result = opt.minimize_scalar(loss_pair, method='bounded',
+                                         bounds=(0, 1))
+            assert loss <= result.fun + 1e-6
+
+    def test_fit_nan_loss(self):
+        from pyrsa.rdm import RDMs
+        rdm = np.random.rand(4, 15)
+        m = model.ModelInterpolate('Test Model', rdm)
+        data = RDMs(np.ones((2, 15)))
+        theta = model.fit_interpolate(m, data, method='corr', n_grid=11,
+                                      n_refine=2)
+        self.assertAlmostEqual(np.sum(theta), 1)
+        assert np.count_nonzero(theta) <= 2
@@ -55,3 +55,32 @@ class TestNoiseCeiling(unittest.TestCase):
             descriptors=des
         )
         _, _ = boot_noise_ceiling(rdms, method=method)
+
+    @parameterized.expand([
+        ['cosine'],
+        ['rho-a'],
+        ['spearman'],
+        ['corr'],
+    ])
+    def test_boot_noise_ceiling_equal_loop(self, method):
+        from pyrsa.inference import boot_noise_ceiling
+        from pyrsa.inference import sets_leave_one_out_rdm
+        from pyrsa.util.inference_util import pool_rdm
+        from pyrsa.rdm import RDMs
+        from pyrsa.rdm import compare
+        dis = np.random.rand(11, 10)  # 11 5x5 rdms
+        rdm_des = {'session': np.array([1, 1, 2, 2, 4, 5, 6, 7, 7, 7, 7])}
+        rdms = RDMs(dissimilarities=dis, rdm_descriptors=rdm_des)
+        noise_min, noise_max = boot_noise_ceiling(
+            rdms, method=method, rdm_descriptor='session')
+        _, test_set, ceil_set = sets_leave_one_out_rdm(rdms, 'session')
+        pred_test = pool_rdm(rdms, method=method)
+        noise_min_loop = np.mean([
+            np.mean(compare(pool_rdm(ceil[0], method=method), test[0],
+                            method))
+            for ceil, test in zip(ceil_set, test_set)])
+        noise_max_loop = np.mean([
+            np.mean(compare(pred_test, test[0], method))
+            for test in test_set])
+        self.assertAlmostEqual(noise_min, noise_min_loop)
+        self.assertAlmostEqual(noise_max, noise_max_loop)
@@ -145,6 +145,25 @@ class TestRDM(unittest.TestCase):
         assert_array_equal(rdms_sample.pattern_descriptors['type'],
                            [0, 1, 2, 2, 2, 2])
 
+    def test_rdm_subsample_pattern_matrices(self):
+        dis = np.random.rand(4, 10)
+        pattern_des = {'type': np.array([0, 1, 2, 2, 4])}
+        rdms = rsr.RDMs(dissimilarities=dis,
+                        pattern_descriptors=pattern_des)
+        matrices = rdms.get_matrices()
+        for i_rdm in range(4):
+            np.fill_diagonal(matrices[i_rdm], np.nan)
+        selection = np.array([0, 1, 2, 2, 3, 3])
+        rdms_sample = rdms.subsample_pattern('type', [2, 0, 1, 2])
+        assert_array_equal(
+            rdms_sample.get_vectors(),
+            rsr.RDMs(matrices[:, selection][:, :, selection]).get_vectors())
+        rdms_subset = rdms.subset_pattern('type', [1, 4])
+        assert_array_equal(rdms_subset.get_matrices(),
+                           rdms.get_matrices()[:, [1, 4]][:, :, [1, 4]])
+        rdms_sample = rdms.subsample_pattern('type', 2)
+        self.assertEqual(rdms_sample.n_cond, 2)
+
     def test_rdm_idx(self):
         dis = np.zeros((8, 10))
         mes = "Euclidean"
@@ -225,6 +244,56 @@ class TestRDM(unittest.TestCase):
         assert rank_rdm.n_rdm == rdms.n_rdm
         assert rank_rdm.n_cond == rdms.n_cond
 
+    def test_rank_cache(self):
+        from scipy.stats import rankdata
+        dis = np.random.randint(0, 4, size=(5, 15)).astype(float)
+        dis[:, 3] = np.nan
+        pattern_des = {'type': np.array([0, 1, 2, 2, 4, 5])}
+        rdms = rsr.RDMs(dissimilarities=dis,
+                        pattern_descriptors=pattern_des)
+        ranks = rdms.get_ranks()
+        ranks_loop = np.full_like(dis, np.nan)
+        ranks_loop[:, ~np.isnan(dis[0])] = rankdata(
+            dis[:, ~np.isnan(dis[0])], axis=1)
+        assert_array_almost_equal(ranks, ranks_loop)
+        self.assertIs(rdms.get_ranks(), ranks)
+        sub = rdms.subsample_pattern('type', [0, 1, 2, 5])
+        assert_array_almost_equal(
+            sub.get_ranks(),
+            rsr.RDMs(sub.dissimilarities).get_ranks())
+        sub = rdms.subset('index', [1, 3])
+        assert_array_almost_equal(sub.get_ranks(), ranks_loop[[1, 3]])
+        rdms.reorder(np.array([5, 4, 3, 2, 1, 0]))
+        assert_array_almost_equal(
+            rdms.get_ranks(),
+            rsr.RDMs(rdms.dissimilarities).get_ranks())
+        self.assertFalse(np.allclose(rdms.get_ranks(), ranks,
+                                     equal_nan=True))
+
+    def test_rank_cache_in_place(self):
+        dis = np.random.rand(2, 15)
+        rdms = rsr.RDMs(dissimilarities=dis)
+        self.assertIs(rdms.get_vectors(), dis)
+        ranks = rdms.get_ranks().copy()
+        rdms.dissimilarities *= -1
+        assert_array_equal(rdms.get_ranks(), 16 - ranks)
+        rdms.get_vectors()[0] = -rdms.get_vectors()[0]
+        assert_array_equal(rdms.get_ranks()[0], ranks[0])
+        assert_array_equal(rdms.get_ranks()[1], 16 - ranks[1])
+        dis[1] = -dis[1]
+        assert_array_equal(rdms[1].get_ranks()[0], ranks[1])
+
+    def test_rank_cache_in_place_spearman(self):
+        from pyrsa.rdm import compare
+        dis = np.random.rand(3, 15)
+        model = rsr.RDMs(np.random.rand(1, 15))
+        rdms = rsr.RDMs(dissimilarities=dis)
+        compare(model, rdms, method='spearman')
+        dis[0] = dis[0, ::-1]
+        assert_array_almost_equal(
+            compare(model, rdms, method='spearman'),
+            compare(model, rsr.RDMs(dis.copy()), method='spearman'))
+
     def test_rdm_append(self):
         dis = np.zeros((8, 10))
         mes = "Euclidean"
@@ -420,6 +489,22 @@ class TestCalcRDM(unittest.TestCase):
             rdm.dissimilarities.flatten()
         )
 
+    def test_gram_to_rdm(self):
+        from pyrsa.rdm.calc import _calc_gram
+        from pyrsa.rdm.calc import _gram_to_rdm
+        measurements1 = np.random.rand(6, 5) + 100
+        measurements2 = np.random.rand(6, 5)
+        noise = np.random.randn(10, 5)
+        noise = np.matmul(noise.T, noise)
+        rdm = _gram_to_rdm(_calc_gram(measurements1, measurements2, noise))
+        rdm_loop = []
+        for i_cond in range(6):
+            for j_cond in range(i_cond + 1, 6):
+                diff1 = measurements1[i_cond] - measurements1[j_cond]
+                diff2 = measurements2[i_cond] - measurements2[j_cond]
+                rdm_loop.append(diff1 @ noise @ diff2)
+        assert_array_almost_equal(rdm, np.array(rdm_loop))
+
     def test_calc_mahalanobis(self):
         rdm = rsr.calc_rdm(self.test_data, descriptor='conds',
                            method='mahalanobis')
@@ -431,11 +516,44 @@ class TestCalcRDM(unittest.TestCase):
                                       cv_descriptor='fold')
         assert rdm.n_cond == 6
 
+    def test_calc_crossnobis_equal_loop(self):
+        from pyrsa.data import average_dataset_by
+        noise = np.random.randn(10, 5)
+        noise = np.matmul(noise.T, noise)
+        rdm = rsr.calc_rdm_crossnobis(self.test_data,
+                                      descriptor='conds',
+                                      cv_descriptor='fold',
+                                      noise=noise)
+        rdm_loop = np.zeros(15)
+        for fold in [0, 1]:
+            data_test = self.test_data.subset_obs('fold', fold)
+            data_train = self.test_data.subset_obs('fold', 1 - fold)
+            m_train, _, _ = average_dataset_by(data_train, 'conds')
+            m_test, _, _ = average_dataset_by(data_test, 'conds')
+            k = 0
+            for i_cond in range(6):
+                for j_cond in range(i_cond + 1, 6):
+                    diff_train = m_train[i_cond] - m_train[j_cond]
+                    diff_test = m_test[i_cond] - m_test[j_cond]
+                    rdm_loop[k] += np.sum(diff_train * (noise @ diff_test))
+                    k += 1
+        assert_array_almost_equal(rdm.dissimilarities[0], rdm_loop)
+
     def test_calc_crossnobis_no_descriptors(self):
         rdm = rsr.calc_rdm_crossnobis(self.test_data_balanced,
                                       descriptor='conds')
         assert rdm.n_cond == 5
 
+    def test_calc_crossnobis_missing_condition(self):
+        obs_des = {'conds': np.array([0, 0, 1, 1, 2, 2, 2, 3, 4, 5,
+                                      0, 0, 1, 1, 2, 2, 2, 3, 4, 4]),
+                   'fold': self.test_data.obs_descriptors['fold']}
+        data = rsa.data.Dataset(self.test_data.measurements,
+                                obs_descriptors=obs_des)
+        with self.assertRaisesRegex(ValueError, 'condition 5 .* fold 1'):
+            rsr.calc_rdm(data, descriptor='conds', cv_descriptor='fold',
+                         method='crossnobis')
+
     def test_calc_crossnobis_noise(self):
         noise = np.random.randn(10, 5)
         noise = np.matmul(noise.T, noise)
@@ -496,6 +614,51 @@ class TestCalcRDM(unittest.TestCase):
                            method='poisson_cv')
         assert rdm.n_cond == 6
 
+    def test_calc_list_equal_loop(self):
+        datasets = [self.test_data] + [
+            rsa.data.Dataset(np.random.rand(20, 5),
+                             obs_descriptors=self.test_data.obs_descriptors)
+            for _ in range(2)]
+        noise = np.eye(5) + 0.1
+        for method in ['euclidean', 'correlation', 'mahalanobis',
+                       'poisson']:
+            rdms = rsr.calc_rdm(datasets, method=method, descriptor='conds',
+                                noise=noise)
+            rdms_loop = [rsr.calc_rdm(dat, method=method, descriptor='conds',
+                                      noise=noise)
+                         for dat in datasets]
+            self.assertEqual(rdms.n_rdm, 3)
+            self.assertEqual(rdms.dissimilarity_measure,
+                             rdms_loop[0].dissimilarity_measure)
+            assert_array_almost_equal(
+                rdms.get_vectors(),
+                np.concatenate([r.get_vectors() for r in rdms_loop]))
+            assert_array_equal(rdms.pattern_descriptors['conds'],
+                               rdms_loop[0].pattern_descriptors['conds'])
+            assert_array_equal(rdms.rdm_descriptors['index'], [0, 1, 2])
+
+    def test_calc_list_unequal_channels(self):
+        from pyrsa.rdm.calc import _calc_rdm_stack
+        data_small = rsa.data.Dataset(
+            np.random.rand(20, 3),
+            obs_descriptors=self.test_data.obs_descriptors)
+        datasets = [self.test_data, data_small]
+        self.assertIsNone(_calc_rdm_stack(datasets, descriptor='conds'))
+        rdms = rsr.calc_rdm(datasets, descriptor='conds')
+        self.assertEqual(rdms.n_rdm, 2)
+
+    def test_concat(self):
+        rdms = [rsr.RDMs(np.random.rand(i + 1, 10),
+                         rdm_descriptors={'session': np.arange(i + 1)})
+                for i in range(4)]
+        vectors = np.concatenate([r.get_vectors() for r in rdms])
+        rdm = rsr.concat(rdms)
+        assert_array_equal(rdm.get_vectors(), vectors)
+        self.assertEqual(rdm.n_rdm, 10)
+        assert_array_equal(rdm.rdm_descriptors['session'],
+                           [0, 0, 1, 0, 1, 2, 0, 1, 2, 3])
+        assert_array_equal(rdm.rdm_descriptors['index'], np.arange(10))
+
 
 class TestCalcRDMMovie(unittest.TestCase):
 
@@ -591,6 +754,148 @@ class TestCalcRDMMovie(unittest.TestCase):
         assert len([r for r in rdm]) == 5
         assert rdm.rdm_descriptors['time'][0] == np.mean(time[:3])
 
+    def test_calc_rdm_movie_equal_time_points(self):
+        noise = np.eye(5) + 0.1
+        for method in ['euclidean', 'correlation', 'mahalanobis',
+                       'crossnobis', 'poisson']:
+            rdm = rsr.calc_rdm_movie(self.test_data_time, descriptor='conds',
+                                     method=method, noise=noise,
+                                     cv_descriptor='fold')
+            for i_time in [0, 7, 14]:
+                data = rsa.data.Dataset(
+                    self.test_data_time.measurements[:, :, i_time],
+                    obs_descriptors=self.test_data_time.obs_descriptors)
+                rdm_single = rsr.calc_rdm(data, descriptor='conds',
+                                          method=method, noise=noise,
+                                          cv_descriptor='fold')
+                assert_array_almost_equal(
+                    rdm.dissimilarities[i_time],
+                    rdm_single.dissimilarities[0])
+
+    def test_calc_rdm_movie_window(self):
+        time = self.test_data_time.time_descriptors['time']
+        rdm = rsr.calc_rdm_movie(self.test_data_time, descriptor='conds',
+                                 method='crossnobis', cv_descriptor='fold',
+                                 window=3)
+        self.assertEqual(rdm.n_rdm, 13)
+        self.assertAlmostEqual(rdm.rdm_descriptors['time'][0],
+                               np.mean(time[:3]))
+        rdm_binned = rsr.calc_rdm_movie(self.test_data_time,
+                                        descriptor='conds',
+                                        method='crossnobis',
+                                        cv_descriptor='fold',
+                                        bins=[time[1:4]])
+        assert_array_almost_equal(rdm.dissimilarities[1],
+                                  rdm_binned.dissimilarities[0])
+
+    def test_calc_rdm_movie_window_time_descriptors(self):
+        from pyrsa.rdm.calc import _sliding_window_descriptors
+        time_descriptors = {'time': np.linspace(0, 200, 15),
+                            'sample': np.arange(15),
+                            'label': np.array(['t%d' % i
+                                               for i in range(15)])}
+        windowed = _sliding_window_descriptors(time_descriptors, 3)
+        assert_array_almost_equal(windowed['sample'], np.arange(1, 14))
+        assert_array_equal(windowed['label'],
+                           time_descriptors['label'][:13])
+        data = rsa.data.TemporalDataset(
+            self.test_data_time_balanced.measurements,
+            obs_descriptors=self.test_data_time_balanced.obs_descriptors,
+            time_descriptors=time_descriptors)
+        rdm = rsr.calc_rdm_movie(data, descriptor='conds',
+                                 method='poisson_cv', cv_descriptor='fold',
+                                 time_descriptor='sample', window=3)
+        self.assertEqual(rdm.n_rdm, 13)
+        assert_array_almost_equal(rdm.rdm_descriptors['sample'],
+                                  np.arange(1, 14))
+
+
+class TestCalcRDMSearchlight(unittest.TestCase):
+
+    def setUp(self):
+        measurements = np.random.rand(20, 12)
+        obs_des = {'conds': np.array([0, 0, 1, 1, 2, 2, 3, 3, 4, 4,
+                                      0, 0, 1, 1, 2, 2, 3, 3, 4, 4]),
+                   'fold': np.array([0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+                                     1, 1, 1, 1, 1, 1, 1, 1, 1, 1])
+                   }
+        self.test_data = rsa.data.Dataset(
+            measurements=measurements,
+            obs_descriptors=obs_des)
+        self.coordinates = np.random.randint(0, 3, size=(12, 3))
+
+    def test_searchlight_neighbors(self):
+        from pyrsa.rdm import get_searchlight_neighbors
+        centers, neighbors = get_searchlight_neighbors(self.coordinates, 1.5)
+        assert len(centers) == 12
+        for center, neighbor in zip(centers, neighbors):
+            assert center in neighbor
+            dist = np.sqrt(np.sum((self.coordinates[neighbor]
+                                   - self.coordinates[center]) ** 2, axis=1))
+            assert np.all(dist <= 1.5)
+
+    def test_searchlight_equal_calc_rdm(self):
+        from pyrsa.rdm import calc_rdm_searchlight
+        from pyrsa.rdm import get_searchlight_neighbors
+        centers, neighbors = get_searchlight_neighbors(self.coordinates, 2)
+        for method in ['euclidean', 'poisson', 'crossnobis']:
+            rdms = calc_rdm_searchlight(
+                self.test_data, neighbors, centers, method=method,
+                descriptor='conds', cv_descriptor='fold', chunk_size=5)
+            assert rdms.n_rdm == 12
+            assert_array_equal(rdms.rdm_descriptors['center'], centers)
+            for i_sl, neighbor in enumerate(neighbors):
+                data = rsa.data.Dataset(
+                    self.test_data.measurements[:, neighbor],
+                    obs_descriptors=self.test_data.obs_descriptors)
+                rdm = rsr.calc_rdm(data, method=method, descriptor='conds',
+                                   cv_descriptor='fold')
+                assert_array_almost_equal(rdms.dissimilarities[i_sl],
+                                          rdm.dissimilarities[0])
+
+    def test_searchlight_poisson_negative(self):
+        from pyrsa.rdm import calc_rdm_searchlight
+        measurements = self.test_data.measurements.copy()
+        measurements[:, 0] = -1
+        data = rsa.data.Dataset(
+            measurements, obs_descriptors=self.test_data.obs_descriptors)
+        neighbors = [np.array([0, 1]), np.array([1, 2])]
+        with np.errstate(invalid='ignore'):
+            rdms = calc_rdm_searchlight(data, neighbors, method='poisson',
+                                        descriptor='conds')
+            rdm = rsr.calc_rdm(
+                rsa.data.Dataset(
+                    measurements[:, :2],
+                    obs_descriptors=self.test_data.obs_descriptors),
+                method='poisson', descriptor='conds')
+        assert np.all(np.isnan(rdm.dissimilarities))
+        assert np.all(np.isnan(rdms.dissimilarities[0]))
+        assert not np.any(np.isnan(rdms.dissimilarities[1]))
+
+    def test_searchlight_radius(self):
+        from pyrsa.rdm import calc_rdm_searchlight
+        rdms = calc_rdm_searchlight(
+            self.test_data, coordinates=self.coordinates, radius=1,
+            method='correlation', descriptor='conds', n_jobs=2,
+            chunk_size=4)
+        assert rdms.n_rdm == 12
+        assert rdms.n_cond == 5
+
+    def test_searchlight_memory_budget(self):
+        from pyrsa.rdm import calc_rdm_searchlight
+        from pyrsa.rdm.searchlight import _get_chunk_size
+        self.assertLess(_get_chunk_size(24, 200, 123, 2 ** 30), 100)
+        rdms = calc_rdm_searchlight(
+            self.test_data, coordinates=self.coordinates, radius=2,
+            method='crossnobis', descriptor='conds', cv_descriptor='fold',
+            chunk_size=12)
+        rdms_budget = calc_rdm_searchlight(
+            self.test_data, coordinates=self.coordinates, radius=2,
+            method='crossnobis', descriptor='conds', cv_descriptor='fold',
+            memory_budget=10000)
+        assert_array_almost_equal(rdms.dissimilarities,
+                                  rdms_budget.dissimilarities)
+
 
 class TestCompareRDM(unittest.TestCase):
 
@@ -634,6 +939,131 @@ class TestCompareRDM(unittest.TestCase):
                                              sigma_k=np.eye(6))
         assert np.all(result < 1)
 
+    def test_compare_cosine_cov_sigma_k_solve(self):
+        from pyrsa.rdm.compare import compare_cosine_cov_weighted
+        from pyrsa.rdm.compare import _get_v
+        sigma_k = np.eye(6) + 0.5
+        result = compare_cosine_cov_weighted(self.test_rdm2,
+                                             self.test_rdm3,
+                                             sigma_k=sigma_k)
+        from scipy.linalg import inv
+        v_inv = inv(_get_v(6, sigma_k).toarray())
+        d1 = self.test_rdm2.get_vectors()
+        d2 = self.test_rdm3.get_vectors()
+        result_loop = np.zeros_like(result)
+        for i in range(result_loop.shape[0]):
+            for j in range(result_loop.shape[1]):
+                result_loop[i, j] = (d1[i] @ v_inv @ d2[j]
+                                     / np.sqrt(d1[i] @ v_inv @ d1[i])
+                                     / np.sqrt(d2[j] @ v_inv @ d2[j]))
+        assert_array_almost_equal(result, result_loop)
+        result_2 = compare_cosine_cov_weighted(self.test_rdm2,
+                                               self.test_rdm3,
+                                               sigma_k=sigma_k.copy())
+        assert_array_equal(result, result_2)
+        with patch('pyrsa.rdm.compare._V_CHOLESKY_MAX_BYTES', 0):
+            result_cg = compare_cosine_cov_weighted(self.test_rdm2,
+                                                    self.test_rdm3,
+                                                    sigma_k=sigma_k)
+        assert_array_almost_equal(result, result_cg, decimal=4)
+
+    def test_cg_multi(self):
+        from scipy.sparse.linalg import cg
+        from pyrsa.rdm.compare import _get_v
+        from pyrsa.rdm.compare import _get_v_sparse
+        from pyrsa.rdm.compare import _cg_multi
+        sigma_k = np.eye(6) + 0.5
+        v = _get_v_sparse(6, sigma_k)
+        self.assertIs(_get_v_sparse(6, sigma_k.copy()), v)
+        assert_array_equal(v.toarray(), _get_v(6, sigma_k).toarray())
+        rhs = np.random.rand(15, 4)
+        rhs[:, 1] = 0
+        x = _cg_multi(v, rhs)
+        x_loop = np.array([cg(v, b, atol=0)[0] for b in rhs.T]).T
+        assert_array_almost_equal(x, x_loop)
+        assert_array_equal(x[:, 1], 0)
+
+    def test_compare_blocked(self):
+        import os
+        import tempfile
+        from pyrsa.rdm.compare import compare
+        from pyrsa.rdm.compare import compare_blocked
+        sigma_k = np.eye(self.test_rdm2.n_cond) + 0.5
+        for method in ['cosine', 'corr', 'spearman', 'rho-a', 'kendall',
+                       'tau-a', 'cosine_cov', 'corr_cov']:
+            for sigma in [None, sigma_k]:
+                result = compare(self.test_rdm2, self.test_rdm3,
+                                 method=method, sigma_k=sigma)
+                result_blocked = compare_blocked(
+                    self.test_rdm2, self.test_rdm3, method=method,
+                    sigma_k=sigma, memory_budget=10000, n_jobs=2)
+                if sigma is None or method not in ['cosine_cov',
+                                                   'corr_cov']:
+                    assert_array_equal(result, result_blocked)
+                else:
+                    assert_array_almost_equal(result, result_blocked)
+        with self.assertRaises(ValueError):
+            compare_blocked(self.test_rdm2, self.test_rdm3, method='bla')
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'comparison.npy')
+            result_blocked = compare_blocked(
+                self.test_rdm2, self.test_rdm3, memory_budget=10000,
+                filename=filename)
+            assert_array_equal(result_blocked, np.load(filename))
+            del result_blocked
+
+    def test_compare_paired(self):
+        from pyrsa.rdm.compare import compare
+        rdm4 = rsa.rdm.RDMs(np.random.rand(3, 15))
+        for method in ['cosine', 'corr', 'spearman', 'rho-a', 'kendall',
+                       'tau-a', 'cosine_cov', 'corr_cov']:
+            result = compare(self.test_rdm2, rdm4, method=method)
+            result_paired = compare(self.test_rdm2, rdm4, method=method,
+                                    paired=True)
+            assert_array_equal(np.diag(result), result_paired)
+        with self.assertRaises(ValueError):
+            compare(self.test_rdm2, self.test_rdm3, paired=True)
+
+    def test_compare_gradient(self):
+        from pyrsa.rdm.compare import compare, compare_gradient
+        sigma_k = np.eye(6) + 0.2
+        eps = 1e-6
+        for method in ['cosine', 'corr', 'cosine_cov', 'corr_cov']:
+            for sigma in [None, sigma_k]:
+                sim, gradient = compare_gradient(
+                    self.test_rdm1, self.test_rdm2, method=method,
+                    sigma_k=sigma)
+                assert_array_almost_equal(
+                    sim, compare(self.test_rdm1, self.test_rdm2,
+                                 method=method, sigma_k=sigma)[0])
+                vector = self.test_rdm1.get_vectors()
+                for i_dist in [0, 7, 14]:
+                    step = np.zeros((1, 15))
+                    step[0, i_dist] = eps
+                    diff = compare(vector + step, self.test_rdm2,
+                                   method=method, sigma_k=sigma) \
+                        - compare(vector - step, self.test_rdm2,
+                                  method=method, sigma_k=sigma)
+                    assert_array_almost_equal(gradient[:, i_dist],
+                                              diff[0] / (2 * eps))
+        with self.assertRaises(ValueError):
+            compare_gradient(self.test_rdm1, self.test_rdm2,
+                             method='spearman')
+
+    def test_cov_weighting_indicator(self):
+        from pyrsa.rdm.compare import _cov_weighting
+        from pyrsa.util.matrix import row_col_indicator_g
+        vectors = np.concatenate((self.test_rdm2.get_vectors(),
+                                  self.test_rdm3.get_vectors()))
+        vector_w = -0.5 * np.c_[vectors, np.zeros((10, 6))]
+        row_i, col_i = row_col_indicator_g(6)
+        sum_i = row_i + col_i
+        m = np.einsum('ij,jk->ik', vector_w, sum_i) / 6
+        mm = np.sum(vector_w * 2, axis=1, keepdims=True) / 36
+        vector_w = vector_w - np.einsum('ij,kj->ik', m, sum_i) + mm
+        vector_w[:, :15] = vector_w[:, :15] * np.sqrt(2)
+        assert_array_almost_equal(_cov_weighting(vectors), vector_w)
+
     def test_compare_cosine_loop(self):
         from pyrsa.rdm.compare import compare_cosine
         result = compare_cosine(self.test_rdm2, self.test_rdm3)
@@ -748,6 +1178,37 @@ class TestCompareRDM(unittest.TestCase):
         result = compare_kendall_tau_a(self.test_rdm1, self.test_rdm2)
         assert np.all(result < 1)
 
+    def test_kendall_batch_equal_loop(self):
+        from pyrsa.rdm.compare import _kendall_batch
+        from pyrsa.rdm.compare import _all_combinations
+        from pyrsa.rdm.compare import _tau_a
+        from pyrsa.rdm.compare import _kendall_tau
+        vectors1 = np.random.rand(4, 45)
+        vectors2 = np.random.randint(0, 3, (3, 45)).astype(float)
+        vectors2[0] = np.random.rand(45)
+        for v1, v2 in [(vectors1, vectors2), (vectors2, vectors1),
+                       (vectors2, vectors2)]:
+            assert_array_almost_equal(
+                _kendall_batch(v1, v2, variant='a'),
+                _all_combinations(v1, v2, _tau_a))
+            assert_array_almost_equal(
+                _kendall_batch(v1, v2, variant='b'),
+                _all_combinations(v1, v2, _kendall_tau))
+
+    def test_tau_a_categorical_equal_loop(self):
+        from pyrsa.rdm.compare import compare_kendall_tau_a
+        from pyrsa.rdm.compare import _all_combinations
+        from pyrsa.rdm.compare import _tau_a
+        models = np.random.randint(0, 4, (3, 45)).astype(float)
+        data = np.round(np.random.rand(4, 45), 1)  # data with ties
+        data[0] = np.random.rand(45)
+        assert_array_almost_equal(
+            compare_kendall_tau_a(models, data),
+            _all_combinations(models, data, _tau_a))
+        assert_array_almost_equal(
+            compare_kendall_tau_a(data, models),
+            _all_combinations(data, models, _tau_a))
+
     def test_compare(self):
         from pyrsa.rdm.compare import compare
         result = compare(self.test_rdm1, self.test_rdm1)
@@ -760,6 +1221,50 @@ class TestCompareRDM(unittest.TestCase):
         result = compare(self.test_rdm1, self.test_rdm2, method='kendall')
 
 
+class TestRDMIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.library = np.random.rand(50, 15)
+        self.query = np.random.rand(3, 15)
+
+    def test_query_exact(self):
+        from pyrsa.rdm import RDMIndex
+        from pyrsa.rdm import compare
+        for method in ['cosine', 'corr', 'spearman']:
+            index = RDMIndex(self.library, method=method, block_size=7)
+            indices, similarities = index.query(self.query, k=5)
+            sim = compare(self.query, self.library, method=method)
+            # spearman similarities may be tied, such that only the
+            # similarities of the returned RDMs are unique
+            assert_array_almost_equal(similarities,
+                                      -np.sort(-sim, axis=1)[:, :5])
+            assert_array_almost_equal(
+                similarities, np.take_along_axis(sim, indices, axis=1))
+
+    def test_query_approximate(self):
+        from pyrsa.rdm import RDMIndex
+        index = RDMIndex(self.library, n_sketch=20, seed=0)
+        indices, _ = index.query(self.query, k=5)
+        indices_approx, similarities = index.query(
+            self.query, k=5, approximate=True, n_candidates=50)
+        assert_array_equal(indices, indices_approx)
+        indices_approx, similarities = index.query(
+            self.query, k=5, approximate=True)
+        self.assertEqual(indices_approx.shape, (3, 5))
+        assert np.all(np.diff(similarities, axis=1) <= 0)
+
+    def test_memmap(self):
+        import os
+        import tempfile
+        from pyrsa.rdm import RDMIndex
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'library.npy')
+            index = RDMIndex(rsr.RDMs(self.library), filename=filename)
+            assert_array_equal(index.vectors, np.load(filename))
+            self.assertEqual(len(index), 50)
+            del index
+
+
 class TestSave(unittest.TestCase):
     def test_dict_conversion(self):
         dis = np.zeros((8, 10))
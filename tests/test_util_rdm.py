@@ -30,3 +30,38 @@ class TestRdmUtils(unittest.TestCase):
         assert y.shape[2] == 5
         assert n_rdm == 8
         assert n_cond == 5
+
+    def test_batch_conversion_squareform(self):
+        from scipy.spatial.distance import squareform
+        from pyrsa.util.rdm_utils import batch_to_vectors
+        from pyrsa.util.rdm_utils import batch_to_matrices
+        vectors = np.random.rand(4, 15)
+        vectors[1, 3] = np.nan
+        matrices = np.array([squareform(v) for v in vectors])
+        m, n_rdm, n_cond = batch_to_matrices(vectors)
+        np.testing.assert_array_equal(m, matrices)
+        out = np.empty((4, 6, 6))
+        m, _, _ = batch_to_matrices(vectors, out=out)
+        self.assertIs(m, out)
+        np.testing.assert_array_equal(out, matrices)
+        out = np.empty((4, 15))
+        v, n_rdm, n_cond = batch_to_vectors(matrices, out=out)
+        self.assertIs(v, out)
+        np.testing.assert_array_equal(v, vectors)
+        assert n_rdm == 4
+        assert n_cond == 6
+
+    def test_condensed_index_equal_subsample(self):
+        from pyrsa.rdm import RDMs
+        from pyrsa.util.rdm_utils import get_subsample_selection
+        from pyrsa.util.rdm_utils import get_condensed_index
+        from pyrsa.util.rdm_utils import apply_condensed_index
+        rdms = RDMs(np.random.rand(3, 15),
+                    pattern_descriptors={'type': np.array([0, 1, 1, 2, 3, 3])})
+        sample = np.array([3, 1, 1, 0])
+        selection = np.sort(get_subsample_selection(
+            rdms.pattern_descriptors['type'], sample))
+        index, valid = get_condensed_index(6, selection)
+        vectors = apply_condensed_index(rdms.get_vectors(), index, valid)
+        rdms_sample = rdms.subsample_pattern('type', sample)
+        np.testing.assert_array_equal(vectors, rdms_sample.get_vectors())